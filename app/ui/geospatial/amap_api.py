@@ -1,10 +1,35 @@
 # -*- coding: utf-8 -*-
 """高德地图API调用模块"""
 
+import math
+import threading
 import requests
 import json
 import requests.utils
-from .coordinate_utils import wgs84_to_gcj02, gcj02_to_wgs84
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import config
+from ...utils import amap_api
+from ...utils.http_session import get_session
+from ...utils.api_cache import get_api_cache
+from ...utils.batch_geocoder import get_amap_rate_limiter
+from ...utils.retry_policy import AmapAPIError, ERROR_KEY, ERROR_QUOTA
+from .coordinate_utils import wgs84_to_gcj02, gcj02_to_wgs84, gcj02_to_wgs84_array
+
+# 周边搜索每页的POI数（高德接口上限为25）和最多翻页数
+POI_PAGE_SIZE = 25
+POI_MAX_PAGES = 100
+
+def _cached_get(endpoint, cache_params, url):
+    """请求高德API并解析JSON，先查询结果缓存，成功的结果写入缓存"""
+    cache = get_api_cache()
+    data = cache.get(endpoint, cache_params)
+    if data is None:
+        response = get_session().get(url, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        if data.get("status") == "1":
+            cache.set(endpoint, cache_params, data)
+    return data
 
 def get_address_from_amap(lon_wgs, lat_wgs, api_key):
     """使用高德逆地理编码API获取地址信息 (输入WGS-84, API使用GCJ-02)"""
@@ -12,12 +37,17 @@ def get_address_from_amap(lon_wgs, lat_wgs, api_key):
         return "错误：请在配置中设置您的高德API Key"
     
     lon_gcj, lat_gcj = wgs84_to_gcj02(lon_wgs, lat_wgs)
+    return get_address_from_amap_gcj(lon_gcj, lat_gcj, api_key)
+
+def get_address_from_amap_gcj(lon_gcj, lat_gcj, api_key):
+    """使用高德逆地理编码API获取地址信息 (输入已转换好的GCJ-02坐标，供批量处理使用)"""
+    if not api_key:
+        return "错误：请在配置中设置您的高德API Key"
+    
     url = f"https://restapi.amap.com/v3/geocode/regeo?output=json&location={lon_gcj},{lat_gcj}&key={api_key}&radius=1000&extensions=base"
     
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = _cached_get('geocode/regeo', {'location': f"{lon_gcj},{lat_gcj}", 'radius': 1000, 'extensions': 'base'}, url)
         if data.get("status") == "1" and data.get("regeocode"):
             return data["regeocode"].get("formatted_address", "地址未找到")
         else:
@@ -27,21 +57,25 @@ def get_address_from_amap(lon_wgs, lat_wgs, api_key):
     except json.JSONDecodeError:
         return "解析高德API响应失败"
 
-def get_coords_from_amap(address, city, api_key):
-    """使用高德地理编码API获取经纬度信息 (返回WGS-84)"""
+def get_coords_from_amap(address, city, api_key, to_wgs84=True):
+    """使用高德地理编码API获取经纬度信息 (默认返回WGS-84)
+    
+    批量处理时可传入 to_wgs84=False 直接获取GCJ-02坐标，
+    再使用 gcj02_to_wgs84_array 统一转换。
+    """
     if not api_key:
         return "错误：请在配置中设置您的高德API Key", None, None
     
     url = f"https://restapi.amap.com/v3/geocode/geo?address={requests.utils.quote(address)}&city={requests.utils.quote(city)}&output=json&key={api_key}"
     
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = _cached_get('geocode/geo', {'address': address, 'city': city}, url)
         if data.get("status") == "1" and data.get("geocodes"):
             location_gcj_str = data["geocodes"][0].get("location")
             if location_gcj_str:
                 lon_gcj_str, lat_gcj_str = location_gcj_str.split(',')
+                if not to_wgs84:
+                    return None, float(lon_gcj_str), float(lat_gcj_str)
                 lon_wgs, lat_wgs = gcj02_to_wgs84(float(lon_gcj_str), float(lat_gcj_str))
                 return None, lon_wgs, lat_wgs
             else:
@@ -53,64 +87,115 @@ def get_coords_from_amap(address, city, api_key):
     except (json.JSONDecodeError, IndexError):
         return "解析高德API响应或数据格式错误", None, None
 
-def search_nearby_pois_amap(lon_wgs, lat_wgs, radius_meters, search_keywords, search_types="", api_key=None):
-    """使用高德周边搜索API查找POI (输入WGS-84, API使用GCJ-02, 输出WGS-84)"""
+def _fetch_poi_page(query, page, stop=None):
+    """通过共享的AmapAPI请求周边搜索的一页结果（含缓存、重试、请求合并和全局停止），并遵守QPS限制"""
+    if stop is not None and stop.is_set():
+        return None
+    get_amap_rate_limiter().acquire()
+    return amap_api.search_around(page=page, **query)
+
+def _parse_poi_page(data):
+    """提取一页结果中有效的POI，坐标整页一次性转换为WGS-84"""
+    valid_pois = [poi_data for poi_data in data.get("pois") or []
+                  if poi_data.get("name") and poi_data.get("location")]
+    if not valid_pois:
+        return []
+    gcj_coords = [poi_data["location"].split(',') for poi_data in valid_pois]
+    wgs_lons, wgs_lats = gcj02_to_wgs84_array([float(lon) for lon, _ in gcj_coords],
+                                              [float(lat) for _, lat in gcj_coords])
+    return [{
+        "id": poi_data.get("id") or "",
+        "name": poi_data["name"],
+        "wgs84_lon": float(wgs_lon),
+        "wgs84_lat": float(wgs_lat),
+        "gcj02_location_from_amap": poi_data["location"]
+    } for poi_data, wgs_lon, wgs_lat in zip(valid_pois, wgs_lons, wgs_lats)]
+
+def _api_error(error):
+    return f"高德API错误: {error} (infocode: {error.infocode})" if error.infocode else f"高德API错误: {error}"
+
+def search_nearby_pois_amap(lon_wgs, lat_wgs, radius_meters, search_keywords, search_types="", api_key=None,
+                            on_page=None):
+    """使用高德周边搜索API查找POI (输入WGS-84, API使用GCJ-02, 输出WGS-84)
+    
+    先请求第1页，由返回的结果总数得出总页数，其余页并发请求。所有页面都通过共享的AmapAPI请求，
+    配额用尽或Key无效时不再请求剩余页面。相邻页的结果可能重叠，按POI id去重。
+    
+    Args:
+        on_page (callable): 每页结果到达时调用，参数为(页码, 该页新增的POI列表, 已完成页数, 总页数)，
+            在调用本函数的线程中执行
+            
+    Returns:
+        tuple: (错误信息, POI列表)，POI按页码顺序排列；部分页面失败时同时返回错误信息和已获取的POI
+    """
     if not api_key:
         return "错误：请在配置中设置您的高德API Key", []
     
     lon_gcj, lat_gcj = wgs84_to_gcj02(lon_wgs, lat_wgs)
 
-    url_params = {
-        "key": api_key,
+    query = {
         "location": f"{lon_gcj},{lat_gcj}",
         "keywords": search_keywords,
-        "radius": str(radius_meters),
-        "offset": "25",
-        "page": "1",
-        "output": "json"
+        "radius": radius_meters,
+        "types": search_types,
+        "offset": POI_PAGE_SIZE,
     }
-    if search_types:
-        url_params["types"] = search_types
     
-    base_url = "https://restapi.amap.com/v3/place/around"
-    query_string_parts = []
-    for k, v in url_params.items():
-        if v:
-            query_string_parts.append(f"{k}={requests.utils.quote(str(v))}")
-
-    url = f"{base_url}?{'&'.join(query_string_parts)}"
+    seen = set()
+    pages = {}
+    
+    def accept(page, data, total_pages):
+        new_pois = []
+        for poi in _parse_poi_page(data):
+            key = poi["id"] or (poi["name"], poi["gcj02_location_from_amap"])
+            if key not in seen:
+                seen.add(key)
+                new_pois.append(poi)
+        pages[page] = new_pois
+        if on_page:
+            on_page(page, new_pois, len(pages), total_pages)
     
-    pois = []
-    response_text = "N/A"
     try:
-        response = requests.get(url, timeout=10)
-        response_text = response.text
-        response.raise_for_status()
-        data = response.json()
+        try:
+            data = _fetch_poi_page(query, 1)
+        except AmapAPIError as e:
+            return _api_error(e), []
         
-        if data.get("status") == "1":
-            if "pois" in data and data["pois"]:
-                for poi_data in data["pois"]:
-                    name = poi_data.get("name")
-                    location_gcj_str = poi_data.get("location")
-                    if name and location_gcj_str:
-                        gcj_lon_str, gcj_lat_str = location_gcj_str.split(',')
-                        wgs_lon, wgs_lat = gcj02_to_wgs84(float(gcj_lon_str), float(gcj_lat_str))
-                        pois.append({
-                            "name": name,
-                            "wgs84_lon": wgs_lon,
-                            "wgs84_lat": wgs_lat,
-                            "gcj02_location_from_amap": location_gcj_str
-                        })
-                return None, pois
-            else:
-                return "未找到符合条件的POI", [] 
-        else:
-            return f"高德API错误: {data.get('info', '未知错误')} (infocode: {data.get('infocode')})", []
+        total_pages = min(POI_MAX_PAGES, max(1, math.ceil(int(data.get("count") or 0) / POI_PAGE_SIZE)))
+        accept(1, data, total_pages)
+        
+        errors = []
+        skipped = 0
+        if total_pages > 1:
+            stop = threading.Event()
+            workers = min(config.get('api_settings.batch_workers', 8), total_pages - 1)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(_fetch_poi_page, query, page, stop): page
+                           for page in range(2, total_pages + 1)}
+                for future in as_completed(futures):
+                    try:
+                        data = future.result()
+                    except AmapAPIError as e:
+                        errors.append(_api_error(e))
+                        if e.category in (ERROR_QUOTA, ERROR_KEY):
+                            # 配额用尽或Key无效：剩余页面不再请求
+                            stop.set()
+                        continue
+                    except Exception as e:
+                        errors.append(f"第{futures[future]}页查询失败: {e}")
+                        continue
+                    if data is None:
+                        skipped += 1
+                    else:
+                        accept(futures[future], data, total_pages)
+        
+        pois = [poi for page in sorted(pages) for poi in pages[page]]
+        if errors:
+            failed = len(errors) + skipped
+            return f"{failed}/{total_pages}页查询失败，结果不完整: {errors[0]}", pois
+        if not pois:
+            return "未找到符合条件的POI", []
+        return None, pois
             
-    except requests.exceptions.RequestException as e:
-        return f"网络请求错误: {e}", []
-    except json.JSONDecodeError:
-        return f"解析高德API响应失败. URL: {url}, Response: {response_text}", []
     except Exception as e:
-        return f"处理POI数据时发生未知错误: {e}", []
\ No newline at end of file
+        return f"处理POI数据时发生未知错误: {e}", []
@@ -3,10 +3,19 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
+import threading
 import xml.etree.ElementTree as ET
 import openpyxl
-from .amap_api import get_address_from_amap, get_coords_from_amap
-from .kml_utils import create_kml_placemark, create_kml_circle_placemark, parse_kml_points, pretty_print_xml
+from .coordinate_utils import wgs84_to_gcj02_array, gcj02_to_wgs84_array
+from ...utils.batch_geocoder import BatchGeocoder
+from ...utils.batch_journal import BatchJournal
+from ...utils import amap_api
+from ...utils.amap_api import AMAP_BATCH_SIZE
+from ...utils.geodesic_buffer import geodesic_circles, merge_circles
+from .kml_utils import KmlWriter, iter_kml_features, buffer_geometry
+
+# 点画圆时每批一起计算顶点的点数
+CIRCLE_BATCH_SIZE = 4096
 
 class ConversionTab:
     """格式转换选项卡"""
@@ -102,16 +111,44 @@ class ConversionTab:
         
         info_text = (
             "• Excel 转 KML: 将包含经纬度的Excel文件转换为KML格式\n"
-            "• KML 转 Excel: 将KML文件中的点位信息导出为Excel\n"
+            "• KML 转 Excel: 将KML/KMZ文件中的点、线、面要素导出为Excel\n"
             "• 地址转经纬度: 批量将地址转换为坐标（需要高德API）\n"
             "• 经纬度转地址: 批量将坐标转换为地址（需要高德API）\n"
-            "• KML点画圆: 为KML文件中的每个点生成指定半径的圆形区域\n"
+            "• KML点画圆: 为KML/KMZ文件中的每个点生成指定半径的圆形区域，线和面生成缓冲区\n"
             "• 下载Excel模板: 提供标准格式的Excel模板文件，便于数据导入"
         )
         
         info_label = ttk.Label(info_frame, text=info_text, justify=tk.LEFT)
         info_label.pack(padx=10, pady=10)
     
+    def _set_status(self, message):
+        """更新状态栏（可在后台线程中调用）"""
+        if self.update_status:
+            self.parent.after(0, self.update_status, message)
+    
+    def _show_message(self, show, title, message):
+        """在主线程中弹出提示框（可在后台线程中调用）"""
+        self.parent.after(0, lambda: show(title, message))
+    
+    def _run_in_background(self, task, error_title, error_prefix, status_prefix):
+        """
+        在后台线程中执行转换任务，避免大文件或批量API请求阻塞界面
+        
+        Args:
+            task (callable): 转换任务，文件选择等对话框需在启动任务前于主线程中完成
+            error_title (str): 任务出错时提示框的标题
+            error_prefix (str): 任务出错时提示信息的前缀
+            status_prefix (str): 任务出错时状态栏信息的前缀
+        """
+        def run():
+            try:
+                task()
+            except Exception as e:
+                self._show_message(messagebox.showerror, error_title, f"{error_prefix}: {e}")
+                self._set_status(f"{status_prefix}: {e}")
+        
+        threading.Thread(target=run, daemon=True).start()
+    
     def convert_excel_to_kml(self):
         """Excel转KML"""
         file_path = filedialog.askopenfilename(
@@ -121,13 +158,25 @@ class ConversionTab:
         if not file_path:
             return
         
-        try:
-            workbook = openpyxl.load_workbook(file_path)
-            sheet = workbook.active
-            
-            kml = ET.Element("kml", xmlns="http://www.opengis.net/kml/2.2")
-            document = ET.SubElement(kml, "Document")
-            
+        # 保存KML文件
+        save_path = filedialog.asksaveasfilename(
+            defaultextension=".kml",
+            filetypes=[("KML 文件", "*.kml"), ("KMZ 文件", "*.kmz"), ("所有文件", "*.*")],
+            title="保存KML文件"
+        )
+        if not save_path:
+            return
+        
+        self._set_status("正在转换Excel为KML...")
+        self._run_in_background(lambda: self._excel_to_kml(file_path, save_path),
+                                "转换失败", "Excel转KML时发生错误", "Excel转KML失败")
+    
+    def _excel_to_kml(self, file_path, save_path):
+        """后台线程：只读模式逐行读取Excel，点位直接写入KML文件"""
+        workbook = openpyxl.load_workbook(file_path, read_only=True)
+        sheet = workbook.active
+        
+        with KmlWriter(save_path) as writer:
             # 假设第一行是标题，从第二行开始读取数据
             for row in sheet.iter_rows(min_row=2, values_only=True):
                 if len(row) >= 3 and row[0] and row[1] and row[2]:
@@ -137,89 +186,68 @@ class ConversionTab:
                         lat = float(row[2])
                         description = str(row[3]) if len(row) > 3 and row[3] else ""
                         
-                        placemark = create_kml_placemark(name, lon, lat, description)
-                        document.append(placemark)
+                        writer.write_point(name, lon, lat, description)
                     except (ValueError, TypeError):
                         continue
-            
-            # 保存KML文件
-            save_path = filedialog.asksaveasfilename(
-                defaultextension=".kml",
-                filetypes=[("KML 文件", "*.kml"), ("所有文件", "*.*")],
-                title="保存KML文件"
-            )
-            
-            if save_path:
-                tree_string = ET.tostring(kml, encoding='utf-8', method='xml')
-                pretty_xml_string = pretty_print_xml(tree_string.decode('utf-8'))
-                with open(save_path, "w", encoding="utf-8") as f:
-                    f.write(pretty_xml_string)
-                messagebox.showinfo("转换成功", f"Excel已成功转换为KML:\n{save_path}")
-                if self.update_status:
-                    self.update_status(f"Excel转KML完成: {save_path}")
+        workbook.close()
         
-        except Exception as e:
-            messagebox.showerror("转换失败", f"Excel转KML时发生错误: {e}")
-            if self.update_status:
-                self.update_status(f"Excel转KML失败: {e}")
+        self._show_message(messagebox.showinfo, "转换成功", f"Excel已成功转换为KML:\n{save_path}")
+        self._set_status(f"Excel转KML完成: {save_path}")
     
     def convert_kml_to_excel(self):
         """KML转Excel"""
         file_path = filedialog.askopenfilename(
             title="选择KML文件进行转换",
-            filetypes=[("KML 文件", "*.kml"), ("所有文件", "*.*")]
+            filetypes=[("KML/KMZ 文件", "*.kml *.kmz"), ("所有文件", "*.*")]
         )
         if not file_path:
             return
         
+        # 保存Excel文件
+        save_path = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel 工作簿", "*.xlsx"), ("所有文件", "*.*")],
+            title="保存Excel文件"
+        )
+        if not save_path:
+            return
+        
+        self._set_status("正在读取KML...")
+        self._run_in_background(lambda: self._kml_to_excel(file_path, save_path),
+                                "转换失败", "KML转Excel时发生错误", "KML转Excel失败")
+    
+    def _kml_to_excel(self, file_path, save_path):
+        """后台线程：流式解析KML，要素逐行写入只写模式的工作簿，不在内存中保留全部要素"""
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet("KML数据")
+        # 设置标题行；线和面的经纬度为其顶点的平均位置
+        sheet.append(["名称", "经度", "纬度", "描述", "几何类型", "顶点数"])
+        
+        count = 0
         try:
-            points, error_msg = parse_kml_points(file_path)
-            if error_msg:
-                messagebox.showerror("解析失败", error_msg)
-                if self.update_status:
-                    self.update_status(f"KML解析失败: {error_msg}")
-                return
-            
-            if not points:
-                messagebox.showinfo("无数据", "KML文件中没有找到有效的点数据。")
-                if self.update_status:
-                    self.update_status("KML文件中无有效点数据")
-                return
-            
-            # 保存Excel文件
-            save_path = filedialog.asksaveasfilename(
-                defaultextension=".xlsx",
-                filetypes=[("Excel 工作簿", "*.xlsx"), ("所有文件", "*.*")],
-                title="保存Excel文件"
-            )
-            
-            if save_path:
-                workbook = openpyxl.Workbook()
-                sheet = workbook.active
-                sheet.title = "KML数据"
-                
-                # 设置标题行
-                sheet["A1"] = "名称"
-                sheet["B1"] = "经度"
-                sheet["C1"] = "纬度"
-                sheet["D1"] = "描述"
-                
-                # 写入数据
-                for row_idx, point in enumerate(points, start=2):
-                    sheet[f"A{row_idx}"] = point['name']
-                    sheet[f"B{row_idx}"] = point['lon']
-                    sheet[f"C{row_idx}"] = point['lat']
-                    sheet[f"D{row_idx}"] = point['description']
-                
-                workbook.save(save_path)
-                messagebox.showinfo("转换成功", f"KML已成功转换为Excel:\n{save_path}\n共转换 {len(points)} 个点")
-                if self.update_status:
-                    self.update_status(f"KML转Excel完成: {len(points)}个点")
+            for feature in iter_kml_features(file_path):
+                geometry = feature['geometry']
+                lon, lat = geometry.representative_point()
+                sheet.append([feature['name'], lon, lat, feature['description'],
+                              geometry.geom_type, geometry.vertex_count])
+                count += 1
+                if count % 10000 == 0:
+                    self._set_status(f"正在读取KML: {count}个要素")
+        except ET.ParseError as e:
+            error_msg = f"KML文件解析错误: {e}"
+            self._show_message(messagebox.showerror, "解析失败", error_msg)
+            self._set_status(f"KML解析失败: {error_msg}")
+            return
+        
+        if not count:
+            self._show_message(messagebox.showinfo, "无数据", "KML文件中没有找到有效的要素数据。")
+            self._set_status("KML文件中无有效要素数据")
+            return
         
-        except Exception as e:
-            messagebox.showerror("转换失败", f"KML转Excel时发生错误: {e}")
-            if self.update_status:
-                self.update_status(f"KML转Excel失败: {e}")
+        workbook.save(save_path)
+        self._show_message(messagebox.showinfo, "转换成功",
+                           f"KML已成功转换为Excel:\n{save_path}\n共转换 {count} 个要素")
+        self._set_status(f"KML转Excel完成: {count}个要素")
     
     def convert_address_to_coords_excel(self):
         """地址转经纬度（Excel批量处理）"""
@@ -235,90 +263,111 @@ class ConversionTab:
         if not file_path:
             return
         
-        try:
-            workbook = openpyxl.load_workbook(file_path)
-            sheet = workbook.active
-            
-            results = []
-            total_rows = sheet.max_row - 1  # 减去标题行
-            processed = 0
-            
-            if self.update_status:
-                self.update_status("正在批量转换地址...")
-            
-            # 假设第一列是地址，第二列是城市（可选）
-            for row_idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), 1):
-                if row and row[0]:  # 确保地址不为空
-                    address = str(row[0]).strip()
-                    city = str(row[1]).strip() if len(row) > 1 and row[1] else ""
-                    
-                    error_msg, lon, lat = get_coords_from_amap(address, city, api_key)
-                    
-                    if error_msg:
-                        results.append({
-                            'address': address,
-                            'city': city,
-                            'lon': 'N/A',
-                            'lat': 'N/A',
-                            'error': error_msg
-                        })
-                    else:
-                        results.append({
-                            'address': address,
-                            'city': city,
-                            'lon': lon,
-                            'lat': lat,
-                            'error': ''
-                        })
-                    
-                    processed += 1
-                    if self.update_status:
-                        self.update_status(f"正在处理地址转换: {processed}/{total_rows}")
-            
-            # 保存结果
-            if results:
-                save_path = filedialog.asksaveasfilename(
-                    defaultextension=".xlsx",
-                    filetypes=[("Excel 工作簿", "*.xlsx"), ("所有文件", "*.*")],
-                    title="保存转换结果"
-                )
-                
-                if save_path:
-                    result_workbook = openpyxl.Workbook()
-                    result_sheet = result_workbook.active
-                    result_sheet.title = "地址转坐标结果"
-                    
-                    # 设置标题行
-                    result_sheet["A1"] = "地址"
-                    result_sheet["B1"] = "城市"
-                    result_sheet["C1"] = "经度"
-                    result_sheet["D1"] = "纬度"
-                    result_sheet["E1"] = "错误信息"
-                    
-                    # 写入结果
-                    for row_idx, result in enumerate(results, start=2):
-                        result_sheet[f"A{row_idx}"] = result['address']
-                        result_sheet[f"B{row_idx}"] = result['city']
-                        result_sheet[f"C{row_idx}"] = result['lon']
-                        result_sheet[f"D{row_idx}"] = result['lat']
-                        result_sheet[f"E{row_idx}"] = result['error']
-                    
-                    result_workbook.save(save_path)
-                    
-                    success_count = sum(1 for r in results if not r['error'])
-                    messagebox.showinfo("转换完成", 
-                                      f"地址转坐标完成！\n"
-                                      f"总计: {len(results)} 条\n"
-                                      f"成功: {success_count} 条\n"
-                                      f"失败: {len(results) - success_count} 条\n"
-                                      f"结果已保存到: {save_path}")
-                    if self.update_status:
-                        self.update_status(f"地址转换完成: {success_count}/{len(results)}")
-        
-        except Exception as e:
-            messagebox.showerror("转换失败", f"地址转坐标时发生错误: {e}")
-            if self.update_status:
-                self.update_status(f"地址转换失败: {e}")
+        save_path = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel 工作簿", "*.xlsx"), ("所有文件", "*.*")],
+            title="保存转换结果"
+        )
+        if not save_path:
+            return
+        
+        self._set_status("正在批量转换地址...")
+        self._run_in_background(lambda: self._address_to_coords(file_path, save_path),
+                                "转换失败", "地址转坐标时发生错误", "地址转换失败")
+    
+    def _address_to_coords(self, file_path, save_path):
+        """后台线程：批量地理编码并保存结果"""
+        workbook = openpyxl.load_workbook(file_path)
+        sheet = workbook.active
+        
+        results = []
+        
+        # 假设第一列是地址，第二列是城市（可选）
+        requests_list = []
+        for row in sheet.iter_rows(min_row=2, values_only=True):
+            if row and row[0]:  # 确保地址不为空
+                address = str(row[0]).strip()
+                city = str(row[1]).strip() if len(row) > 1 and row[1] else ""
+                requests_list.append((address, city))
+        
+        def on_progress(done, total):
+            self._set_status(f"正在处理地址转换: {done}/{total}")
+        
+        # 已完成的地址记录在源文件旁的日志中，中断后重新转换同一文件时跳过这些地址
+        journal = BatchJournal.for_source(file_path, 'geocode')
+        
+        # 并发调用批量地理编码接口，每次请求最多10个地址；城市参数对整批生效，因此按城市分组打包
+        # 先获取GCJ-02坐标，全部完成后统一转换为WGS-84
+        responses = BatchGeocoder().run_batched(
+            requests_list,
+            lambda batch: amap_api.geocode_batch([address for address, _ in batch], batch[0][1]),
+            batch_size=AMAP_BATCH_SIZE,
+            group_key=lambda item: item[1],
+            progress_callback=on_progress,
+            journal=journal)
+        
+        for (address, city), response in zip(requests_list, responses):
+            if response['status'] != 'success':
+                results.append({
+                    'address': address,
+                    'city': city,
+                    'lon': 'N/A',
+                    'lat': 'N/A',
+                    'error': f"高德API错误: {response.get('message', '未知错误')}"
+                })
+            else:
+                results.append({
+                    'address': address,
+                    'city': city,
+                    'lon': response['lng'],
+                    'lat': response['lat'],
+                    'error': ''
+                })
+        
+        # 批量将GCJ-02坐标转换为WGS-84
+        valid_results = [r for r in results if not r['error']]
+        lons_wgs, lats_wgs = gcj02_to_wgs84_array([r['lon'] for r in valid_results],
+                                                  [r['lat'] for r in valid_results])
+        for result, lon_wgs, lat_wgs in zip(valid_results, lons_wgs, lats_wgs):
+            result['lon'] = float(lon_wgs)
+            result['lat'] = float(lat_wgs)
+        
+        # 保存结果
+        if not results:
+            self._show_message(messagebox.showinfo, "无数据", "Excel文件中没有找到地址数据。")
+            self._set_status("Excel文件中无地址数据")
+            return
+        
+        result_workbook = openpyxl.Workbook()
+        result_sheet = result_workbook.active
+        result_sheet.title = "地址转坐标结果"
+        
+        # 设置标题行
+        result_sheet["A1"] = "地址"
+        result_sheet["B1"] = "城市"
+        result_sheet["C1"] = "经度"
+        result_sheet["D1"] = "纬度"
+        result_sheet["E1"] = "错误信息"
+        
+        # 写入结果
+        for row_idx, result in enumerate(results, start=2):
+            result_sheet[f"A{row_idx}"] = result['address']
+            result_sheet[f"B{row_idx}"] = result['city']
+            result_sheet[f"C{row_idx}"] = result['lon']
+            result_sheet[f"D{row_idx}"] = result['lat']
+            result_sheet[f"E{row_idx}"] = result['error']
+        
+        result_workbook.save(save_path)
+        journal.finish()
+        
+        success_count = sum(1 for r in results if not r['error'])
+        self._show_message(messagebox.showinfo, "转换完成",
+                           f"地址转坐标完成！\n"
+                           f"总计: {len(results)} 条\n"
+                           f"成功: {success_count} 条\n"
+                           f"失败: {len(results) - success_count} 条\n"
+                           f"结果已保存到: {save_path}")
+        self._set_status(f"地址转换完成: {success_count}/{len(results)}")
     
     def convert_coords_to_address_excel(self):
         """经纬度转地址（Excel批量处理）"""
@@ -334,157 +383,211 @@ class ConversionTab:
         if not file_path:
             return
         
-        try:
-            workbook = openpyxl.load_workbook(file_path)
-            sheet = workbook.active
-            
-            results = []
-            total_rows = sheet.max_row - 1  # 减去标题行
-            processed = 0
-            
-            if self.update_status:
-                self.update_status("正在批量转换坐标...")
-            
-            # 假设第一列是经度，第二列是纬度
-            for row_idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), 1):
-                if row and len(row) >= 2 and row[0] and row[1]:
-                    try:
-                        lon = float(row[0])
-                        lat = float(row[1])
-                        name = str(row[2]) if len(row) > 2 and row[2] else f"点{row_idx}"
-                        
-                        address = get_address_from_amap(lon, lat, api_key)
-                        
-                        results.append({
-                            'name': name,
-                            'lon': lon,
-                            'lat': lat,
-                            'address': address
-                        })
-                    except (ValueError, TypeError):
-                        results.append({
-                            'name': f"点{row_idx}",
-                            'lon': 'N/A',
-                            'lat': 'N/A',
-                            'address': '坐标格式错误'
-                        })
-                    
-                    processed += 1
-                    if self.update_status:
-                        self.update_status(f"正在处理坐标转换: {processed}/{total_rows}")
-            
-            # 保存结果
-            if results:
-                save_path = filedialog.asksaveasfilename(
-                    defaultextension=".xlsx",
-                    filetypes=[("Excel 工作簿", "*.xlsx"), ("所有文件", "*.*")],
-                    title="保存转换结果"
-                )
-                
-                if save_path:
-                    result_workbook = openpyxl.Workbook()
-                    result_sheet = result_workbook.active
-                    result_sheet.title = "坐标转地址结果"
-                    
-                    # 设置标题行
-                    result_sheet["A1"] = "名称"
-                    result_sheet["B1"] = "经度"
-                    result_sheet["C1"] = "纬度"
-                    result_sheet["D1"] = "地址"
-                    
-                    # 写入结果
-                    for row_idx, result in enumerate(results, start=2):
-                        result_sheet[f"A{row_idx}"] = result['name']
-                        result_sheet[f"B{row_idx}"] = result['lon']
-                        result_sheet[f"C{row_idx}"] = result['lat']
-                        result_sheet[f"D{row_idx}"] = result['address']
-                    
-                    result_workbook.save(save_path)
-                    messagebox.showinfo("转换完成", f"坐标转地址完成！\n共处理 {len(results)} 条记录\n结果已保存到: {save_path}")
-                    if self.update_status:
-                        self.update_status(f"坐标转换完成: {len(results)}条记录")
-        
-        except Exception as e:
-            messagebox.showerror("转换失败", f"坐标转地址时发生错误: {e}")
-            if self.update_status:
-                self.update_status(f"坐标转换失败: {e}")
+        save_path = filedialog.asksaveasfilename(
+            defaultextension=".xlsx",
+            filetypes=[("Excel 工作簿", "*.xlsx"), ("所有文件", "*.*")],
+            title="保存转换结果"
+        )
+        if not save_path:
+            return
+        
+        self._set_status("正在批量转换坐标...")
+        self._run_in_background(lambda: self._coords_to_address(file_path, save_path),
+                                "转换失败", "坐标转地址时发生错误", "坐标转换失败")
+    
+    def _coords_to_address(self, file_path, save_path):
+        """后台线程：批量逆地理编码并保存结果"""
+        workbook = openpyxl.load_workbook(file_path)
+        sheet = workbook.active
+        
+        results = []
+        
+        # 假设第一列是经度，第二列是纬度
+        for row_idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), 1):
+            if row and len(row) >= 2 and row[0] and row[1]:
+                try:
+                    lon = float(row[0])
+                    lat = float(row[1])
+                    name = str(row[2]) if len(row) > 2 and row[2] else f"点{row_idx}"
+                    results.append({
+                        'name': name,
+                        'lon': lon,
+                        'lat': lat,
+                        'address': None
+                    })
+                except (ValueError, TypeError):
+                    results.append({
+                        'name': f"点{row_idx}",
+                        'lon': 'N/A',
+                        'lat': 'N/A',
+                        'address': '坐标格式错误'
+                    })
+        
+        # 所有有效坐标一次性转换为GCJ-02，再并发调用批量逆地理编码API
+        valid_results = [r for r in results if r['address'] is None]
+        lons_gcj, lats_gcj = wgs84_to_gcj02_array([r['lon'] for r in valid_results],
+                                                  [r['lat'] for r in valid_results])
+        
+        def on_progress(done, total):
+            self._set_status(f"正在处理坐标转换: {done}/{total}")
+        
+        # 使用批量逆地理编码接口，每次请求最多包含10个坐标
+        responses = BatchGeocoder().run_batched(
+            [(float(lon), float(lat)) for lon, lat in zip(lons_gcj, lats_gcj)],
+            amap_api.regeocode_batch,
+            batch_size=AMAP_BATCH_SIZE,
+            progress_callback=on_progress)
+        for result, response in zip(valid_results, responses):
+            if response['status'] == 'success':
+                result['address'] = response['formatted_address'] or "地址未找到"
+            else:
+                result['address'] = f"高德API错误: {response.get('message', '未知错误')}"
+        
+        # 保存结果
+        if not results:
+            self._show_message(messagebox.showinfo, "无数据", "Excel文件中没有找到坐标数据。")
+            self._set_status("Excel文件中无坐标数据")
+            return
+        
+        result_workbook = openpyxl.Workbook()
+        result_sheet = result_workbook.active
+        result_sheet.title = "坐标转地址结果"
+        
+        # 设置标题行
+        result_sheet["A1"] = "名称"
+        result_sheet["B1"] = "经度"
+        result_sheet["C1"] = "纬度"
+        result_sheet["D1"] = "地址"
+        
+        # 写入结果
+        for row_idx, result in enumerate(results, start=2):
+            result_sheet[f"A{row_idx}"] = result['name']
+            result_sheet[f"B{row_idx}"] = result['lon']
+            result_sheet[f"C{row_idx}"] = result['lat']
+            result_sheet[f"D{row_idx}"] = result['address']
+        
+        result_workbook.save(save_path)
+        self._show_message(messagebox.showinfo, "转换完成",
+                           f"坐标转地址完成！\n共处理 {len(results)} 条记录\n结果已保存到: {save_path}")
+        self._set_status(f"坐标转换完成: {len(results)}条记录")
     
     def convert_points_to_circles(self):
         """KML点画圆"""
         file_path = filedialog.askopenfilename(
             title="选择包含点的KML文件",
-            filetypes=[("KML 文件", "*.kml"), ("所有文件", "*.*")]
+            filetypes=[("KML/KMZ 文件", "*.kml *.kmz"), ("所有文件", "*.*")]
         )
         if not file_path:
             return
         
+        # 询问圆的半径
+        radius_str = simpledialog.askstring("设置半径", "请输入圆的半径（米）:", initialvalue="1000")
+        if not radius_str:
+            return
+        
         try:
-            points, error_msg = parse_kml_points(file_path)
-            if error_msg:
-                messagebox.showerror("解析失败", error_msg)
-                if self.update_status:
-                    self.update_status(f"KML解析失败: {error_msg}")
-                return
-            
-            if not points:
-                messagebox.showinfo("无数据", "KML文件中没有找到有效的点数据。")
-                if self.update_status:
-                    self.update_status("KML文件中无有效点数据")
+            radius_meters = float(radius_str)
+            if radius_meters <= 0:
+                messagebox.showerror("输入错误", "半径必须大于0")
                 return
-            
-            # 询问圆的半径
-            radius_str = simpledialog.askstring("设置半径", "请输入圆的半径（米）:", initialvalue="1000")
-            if not radius_str:
-                return
-            
-            try:
-                radius_meters = float(radius_str)
-                if radius_meters <= 0:
-                    messagebox.showerror("输入错误", "半径必须大于0")
-                    return
-            except ValueError:
-                messagebox.showerror("输入错误", "请输入有效的数字")
+        except ValueError:
+            messagebox.showerror("输入错误", "请输入有效的数字")
+            return
+        
+        # 大量点的圆相互重叠时，可合并为覆盖范围以减小文件和方便查看
+        merge = messagebox.askyesnocancel(
+            "合并重叠圆形",
+            "是否将相互重叠的圆形合并为覆盖范围？\n\n"
+            "是：点的圆形合并为覆盖范围多边形\n否：每个点单独生成圆形"
+        )
+        if merge is None:
+            return
+        
+        # 保存结果
+        save_path = filedialog.asksaveasfilename(
+            defaultextension=".kml",
+            filetypes=[("KML 文件", "*.kml"), ("KMZ 文件", "*.kmz"), ("所有文件", "*.*")],
+            title="保存圆形KML文件"
+        )
+        if not save_path:
+            return
+        
+        self._set_status("正在生成圆形...")
+        self._run_in_background(lambda: self._points_to_circles(file_path, save_path, radius_meters, merge),
+                                "转换失败", "点画圆时发生错误", "点画圆失败")
+    
+    def _points_to_circles(self, file_path, save_path, radius_meters, merge):
+        """后台线程：要素边解析边生成圆形或缓冲区，直接写入文件"""
+        # 圆周顶点保留7位小数（约1厘米）
+        writer = KmlWriter(save_path, "点画圆结果", precision=7)
+        # 点要素攒够一批后一次计算所有圆的顶点
+        pending = []
+        
+        def flush_circles():
+            if not pending:
                 return
-            
-            # 创建包含圆形的KML
-            kml = ET.Element("kml", xmlns="http://www.opengis.net/kml/2.2")
-            document = ET.SubElement(kml, "Document")
-            ET.SubElement(document, "name").text = "点画圆结果"
-            
-            for point in points:
-                circle_placemark = create_kml_circle_placemark(
-                    f"{point['name']}_圆形_{radius_meters}m",
-                    point['lon'],
-                    point['lat'],
-                    radius_meters,
-                    f"原点: {point['name']}\n半径: {radius_meters}米\n{point['description']}"
+            lons, lats = zip(*(feature['geometry'].representative_point() for feature in pending))
+            for feature, ring in zip(pending, geodesic_circles(lons, lats, radius_meters)):
+                writer.write_polygons(
+                    f"{feature['name']}_圆形_{radius_meters}m",
+                    [[ring]],
+                    f"原点: {feature['name']}\n半径: {radius_meters}米\n{feature['description']}"
                 )
-                document.append(circle_placemark)
-            
-            # 保存结果
-            save_path = filedialog.asksaveasfilename(
-                defaultextension=".kml",
-                filetypes=[("KML 文件", "*.kml"), ("所有文件", "*.*")],
-                title="保存圆形KML文件"
-            )
+            pending.clear()
+        
+        count = 0
+        merge_points = []
+        try:
+            for feature in iter_kml_features(file_path):
+                count += 1
+                geometry = feature['geometry']
+                if geometry.geom_type == 'Point':
+                    if merge:
+                        merge_points.append(geometry.representative_point())
+                        continue
+                    pending.append(feature)
+                    if len(pending) >= CIRCLE_BATCH_SIZE:
+                        flush_circles()
+                else:
+                    # 线、面和多几何体生成缓冲区，先写出之前的点以保持要素顺序
+                    flush_circles()
+                    writer.write_polygons(
+                        f"{feature['name']}_缓冲区_{radius_meters}m",
+                        buffer_geometry(geometry, radius_meters),
+                        f"原要素: {feature['name']}（{geometry.geom_type}）\n缓冲半径: {radius_meters}米\n{feature['description']}"
+                    )
+                if count % 10000 == 0:
+                    self._set_status(f"正在生成圆形: {count}个要素")
+            flush_circles()
             
-            if save_path:
-                tree_string = ET.tostring(kml, encoding='utf-8', method='xml')
-                pretty_xml_string = pretty_print_xml(tree_string.decode('utf-8'))
-                with open(save_path, "w", encoding="utf-8") as f:
-                    f.write(pretty_xml_string)
-                messagebox.showinfo("转换成功", 
-                                  f"点画圆完成！\n"
-                                  f"处理了 {len(points)} 个点\n"
-                                  f"半径: {radius_meters} 米\n"
-                                  f"结果已保存到: {save_path}")
-                if self.update_status:
-                    self.update_status(f"点画圆完成: {len(points)}个圆形")
+            if merge_points:
+                self._set_status(f"正在合并{len(merge_points)}个点的圆形...")
+                lons, lats = zip(*merge_points)
+                for n, polygon in enumerate(merge_circles(lons, lats, radius_meters), 1):
+                    writer.write_polygons(f"覆盖范围_{n}", [polygon], f"半径: {radius_meters}米")
+        except ET.ParseError as e:
+            writer.abort()
+            error_msg = f"KML文件解析错误: {e}"
+            self._show_message(messagebox.showerror, "解析失败", error_msg)
+            self._set_status(f"KML解析失败: {error_msg}")
+            return
+        except Exception:
+            writer.abort()
+            raise
+        
+        if not writer.count:
+            writer.abort()
+            self._show_message(messagebox.showinfo, "无数据", "KML文件中没有找到有效的要素数据。")
+            self._set_status("KML文件中无有效要素数据")
+            return
         
-        except Exception as e:
-            messagebox.showerror("转换失败", f"点画圆时发生错误: {e}")
-            if self.update_status:
-                self.update_status(f"点画圆失败: {e}")
+        writer.close()
+        self._show_message(messagebox.showinfo, "转换成功",
+                           f"点画圆完成！\n"
+                           f"处理了 {count} 个要素，生成 {writer.count} 个多边形\n"
+                           f"半径: {radius_meters} 米\n"
+                           f"结果已保存到: {save_path}")
+        self._set_status(f"点画圆完成: {count}个要素")
     
     def download_excel_templates(self):
         """下载Excel模板文件"""
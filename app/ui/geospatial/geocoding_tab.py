@@ -3,8 +3,11 @@ from tkinter import ttk, filedialog, messagebox
 import threading
 import os
 import openpyxl
-from ...utils.coordinate_converter import wgs84_to_gcj02
+from ...utils.coordinate_converter import wgs84_to_gcj02_array
 from ...utils import amap_api
+from ...utils.batch_geocoder import BatchGeocoder
+from ...utils.batch_journal import BatchJournal
+from ...utils.amap_api import AMAP_BATCH_SIZE
 
 
 class GeocodingTab:
@@ -190,23 +193,29 @@ class GeocodingTab:
                 self.parent.after(0, lambda: messagebox.showerror("错误", "未找到有效的坐标数据，请检查Excel文件格式"))
                 return
             
-            results = []
-            total_rows = len(data_rows)
+            api_key = self.config.get_amap_api_key()
+            if not api_key:
+                self.parent.after(0, lambda: messagebox.showerror("错误", "未配置API密钥"))
+                self.parent.after(0, lambda: self.update_status("查询失败"))
+                return
             
-            for i, row in enumerate(data_rows):
-                lng = ws.cell(row=row, column=1).value
-                lat = ws.cell(row=row, column=2).value
+            # 将所有WGS-84坐标一次性转换为GCJ-02坐标（高德地图使用的坐标系）
+            lngs = [ws.cell(row=row, column=1).value for row in data_rows]
+            lats = [ws.cell(row=row, column=2).value for row in data_rows]
+            lngs_gcj, lats_gcj = wgs84_to_gcj02_array(lngs, lats)
+            
+            results = [None] * len(data_rows)
+            pending = []
+            
+            def fill_row(i, result):
+                """将一行的查询结果写入Excel单元格，返回该行的结果说明"""
+                row = data_rows[i]
+                lng = lngs[i]
+                lat = lats[i]
                 
                 try:
-                    # 将WGS-84坐标转换为GCJ-02坐标（高德地图使用的坐标系）
-                    lng_gcj, lat_gcj = wgs84_to_gcj02(float(lng), float(lat))
-                    
-                    # 直接调用高德API进行逆地理编码
-                    api_key = self.config.get_amap_api_key()
-                    if not api_key:
-                        raise Exception("未配置API密钥")
-                    
-                    result = amap_api.regeocode(lng_gcj, lat_gcj)
+                    lng_gcj = float(lngs_gcj[i])
+                    lat_gcj = float(lats_gcj[i])
                     
                     # 在结果中记录坐标转换信息
                     coord_conversion = f"坐标转换: WGS-84({lng:.6f}, {lat:.6f}) -> GCJ-02({lng_gcj:.6f}, {lat_gcj:.6f})"
@@ -224,17 +233,17 @@ class GeocodingTab:
                         ws.cell(row=row, column=5, value=district)
                         ws.cell(row=row, column=6, value=formatted_address)
                         
-                        results.append(f"行{row}: {coord_conversion} -> 查询成功: {province} {city} {district}")
-                    else:
-                        # API调用失败，记录错误信息
-                        error_msg = result.get('message', '未知错误')
-                        ws.cell(row=row, column=3, value="查询失败")
-                        ws.cell(row=row, column=4, value="查询失败")
-                        ws.cell(row=row, column=5, value="查询失败")
-                        ws.cell(row=row, column=6, value=f"API错误: {error_msg}")
-                        
-                        results.append(f"行{row}: {coord_conversion} -> 查询失败: {error_msg}")
-                        
+                        return f"行{row}: {coord_conversion} -> 查询成功: {province} {city} {district}"
+                    
+                    # API调用失败，记录错误信息
+                    error_msg = result.get('message', '未知错误')
+                    ws.cell(row=row, column=3, value="查询失败")
+                    ws.cell(row=row, column=4, value="查询失败")
+                    ws.cell(row=row, column=5, value="查询失败")
+                    ws.cell(row=row, column=6, value=f"API错误: {error_msg}")
+                    
+                    return f"行{row}: {coord_conversion} -> 查询失败: {error_msg}"
+                    
                 except Exception as e:
                     # 处理异常
                     ws.cell(row=row, column=3, value="查询失败")
@@ -242,18 +251,41 @@ class GeocodingTab:
                     ws.cell(row=row, column=5, value="查询失败")
                     ws.cell(row=row, column=6, value=f"错误: {str(e)}")
                     
-                    results.append(f"行{row}: 查询失败 - {str(e)}")
-                
-                # 更新进度
-                progress = ((i + 1) / total_rows) * 100
+                    return f"行{row}: 查询失败 - {str(e)}"
+            
+            def on_result(i, result):
+                # 每行得到结果后立即写入单元格，结果说明等到本批完成时一起显示
+                results[i] = fill_row(i, result)
+                pending.append(results[i])
+            
+            def on_progress(done, total):
+                # 更新进度，并追加显示本批完成的行
+                progress = (done / total) * 100
                 self.parent.after(0, lambda p=progress: self.progress_var.set(p))
-                
-                # 更新结果显示
-                if (i + 1) % 10 == 0 or i == total_rows - 1:  # 每10条或最后一条更新一次显示
-                    self.parent.after(0, lambda r=results.copy(): self._update_result_display(r))
+                if pending:
+                    lines = pending[:]
+                    pending.clear()
+                    self.parent.after(0, lambda r=lines: self._append_result_display(r))
+            
+            self.parent.after(0, lambda: self._update_result_display([]))
+            
+            # 已完成的行记录在源文件旁的日志中，中断后重新查询同一文件时从断点继续
+            journal = BatchJournal.for_source(self.excel_file_path, 'regeocode')
+            if journal.completed:
+                completed = journal.completed
+                self.parent.after(0, lambda: self.update_status(f"从上次中断处继续查询，已完成 {completed} 行"))
+            
+            # 并发调用高德批量逆地理编码接口（每次请求最多10个坐标），每批完成后即显示该批结果
+            BatchGeocoder().run_batched(
+                [(float(lng_gcj), float(lat_gcj)) for lng_gcj, lat_gcj in zip(lngs_gcj, lats_gcj)],
+                amap_api.regeocode_batch,
+                batch_size=AMAP_BATCH_SIZE,
+                progress_callback=on_progress,
+                journal=journal,
+                on_result=on_result)
             
             # 保存结果到新文件
-            self.parent.after(0, lambda: self._save_results(wb, results))
+            self.parent.after(0, lambda: self._save_results(wb, results, journal))
             
         except Exception as e:
             self.parent.after(0, lambda: messagebox.showerror("错误", f"批量查询失败: {str(e)}"))
@@ -266,8 +298,14 @@ class GeocodingTab:
             self.geocoding_result_text.insert(tk.END, result + "\n")
         self.geocoding_result_text.see(tk.END)
     
-    def _save_results(self, wb, results):
-        """保存查询结果"""
+    def _append_result_display(self, results):
+        """在结果显示末尾追加若干行"""
+        for result in results:
+            self.geocoding_result_text.insert(tk.END, result + "\n")
+        self.geocoding_result_text.see(tk.END)
+    
+    def _save_results(self, wb, results, journal=None):
+        """保存查询结果，保存成功后删除断点续传日志"""
         try:
             # 生成输出文件名
             base_name = os.path.splitext(self.excel_file_path)[0]
@@ -275,6 +313,8 @@ class GeocodingTab:
             
             # 保存Excel文件
             wb.save(output_file)
+            if journal:
+                journal.finish()
             
             # 更新状态和结果显示
             self.update_status(f"查询完成，结果已保存到: {os.path.basename(output_file)}")
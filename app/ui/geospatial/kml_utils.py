@@ -1,9 +1,22 @@
 # -*- coding: utf-8 -*-
 """KML文件处理工具模块"""
 
+import io
+import os
+import re
+import zipfile
+import contextlib
 import xml.etree.ElementTree as ET
 from xml.dom.minidom import parseString
-import math
+from xml.sax.saxutils import escape
+import numpy as np
+from ...utils.geodesic_buffer import CIRCLE_TOLERANCE, geodesic_circles, segment_rings
+
+# 几何部分的类型
+PART_POINT = 0   # 点
+PART_LINE = 1    # 线（LineString，或不属于多边形的LinearRing）
+PART_OUTER = 2   # 多边形外环
+PART_INNER = 3   # 多边形内环（洞），属于其前面最近的外环
 
 def create_kml_placemark(name, lon, lat, description=""):
     """创建KML点标记"""
@@ -15,99 +28,549 @@ def create_kml_placemark(name, lon, lat, description=""):
     ET.SubElement(point, "coordinates").text = f"{lon},{lat},0"
     return placemark
 
-def create_kml_circle_placemark(name, center_lon, center_lat, radius_meters, description=""):
-    """创建圆形KML Placemark，使用Polygon近似圆形"""
+def create_kml_circle_placemark(name, center_lon, center_lat, radius_meters, description="",
+                                tolerance=CIRCLE_TOLERANCE):
+    """创建圆形KML Placemark，使用测地线多边形近似圆形，顶点数按半径和允许误差（米）自动选择"""
+    return create_kml_polygon_placemark(
+        name, [[circle_ring(center_lon, center_lat, radius_meters, tolerance=tolerance)]], description)
+
+def format_kml_coordinates(coords, precision=None):
+    """
+    将 (N, 2) 经纬度数组格式化为KML坐标字符串
+    
+    Args:
+        coords (array-like): (N, 2) 经纬度
+        precision (int): 保留的小数位数，为None时保留完整精度；
+            7位小数约为1厘米，格式化速度约为完整精度的3倍
+    """
+    values = np.asarray(coords, dtype=np.float64).ravel().tolist()
+    if not values:
+        return ""
+    pair = "%r,%r,0 " if precision is None else f"%.{int(precision)}f,%.{int(precision)}f,0 "
+    return (pair * (len(values) // 2) % tuple(values))[:-1]
+
+def create_kml_polygon_placemark(name, polygons, description=""):
+    """
+    创建多边形KML Placemark
+    
+    Args:
+        name (str): 名称
+        polygons (list): 多边形列表，每个多边形为环的列表 [外环, 内环...]，
+            每个环为 (N, 2) 的经纬度数组；多于一个多边形时使用MultiGeometry
+        description (str): 描述
+    """
     placemark = ET.Element("Placemark")
     ET.SubElement(placemark, "name").text = name
     if description:
         ET.SubElement(placemark, "description").text = description
     
-    # 创建圆形的多边形近似（36个点）
-    polygon = ET.SubElement(placemark, "Polygon")
-    outer_boundary = ET.SubElement(polygon, "outerBoundaryIs")
-    linear_ring = ET.SubElement(outer_boundary, "LinearRing")
+    parent = ET.SubElement(placemark, "MultiGeometry") if len(polygons) > 1 else placemark
+    for rings in polygons:
+        polygon = ET.SubElement(parent, "Polygon")
+        for i, ring in enumerate(rings):
+            boundary = ET.SubElement(polygon, "outerBoundaryIs" if i == 0 else "innerBoundaryIs")
+            linear_ring = ET.SubElement(boundary, "LinearRing")
+            ET.SubElement(linear_ring, "coordinates").text = format_kml_coordinates(ring)
+    return placemark
+
+class KmlGeometry:
+    """
+    Placemark的几何数据（列式存储）
+    
+    所有顶点的经纬度连续存放在一个 (N, 2) 数组中，按部分（点、线、环）划分：
+    第i个部分的顶点为 coords[offsets[i]:offsets[i + 1]]，类型为 kinds[i]。
+    MultiGeometry中的各个几何体依次展开为多个部分。
+    """
+    
+    __slots__ = ('coords', 'offsets', 'kinds')
+    
+    def __init__(self, coords, offsets, kinds):
+        self.coords = coords
+        self.offsets = offsets
+        self.kinds = kinds
+    
+    @classmethod
+    def from_parts(cls, parts):
+        """由 [(类型, (n, 2)数组), ...] 构建"""
+        if not parts:
+            return cls(np.empty((0, 2)), np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int8))
+        if len(parts) == 1:
+            # 绝大多数要素只有一个部分，避免拼接
+            kind, coords = parts[0]
+            return cls(coords, np.array([0, len(coords)], dtype=np.int64), np.array([kind], dtype=np.int8))
+        sizes = [len(coords) for _, coords in parts]
+        offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        return cls(np.concatenate([coords for _, coords in parts]),
+                   offsets, np.array([kind for kind, _ in parts], dtype=np.int8))
+    
+    def __len__(self):
+        return len(self.kinds)
+    
+    def part(self, i):
+        """第i个部分：(类型, 顶点数组)"""
+        return int(self.kinds[i]), self.coords[self.offsets[i]:self.offsets[i + 1]]
+    
+    def parts(self):
+        """依次返回各部分的 (类型, 顶点数组)"""
+        for i in range(len(self.kinds)):
+            yield self.part(i)
+    
+    def polygons(self):
+        """按多边形分组的环：[[外环, 内环...], ...]"""
+        polygons = []
+        for kind, coords in self.parts():
+            if kind == PART_OUTER:
+                polygons.append([coords])
+            elif kind == PART_INNER and polygons:
+                polygons[-1].append(coords)
+        return polygons
+    
+    @property
+    def geom_type(self):
+        """几何类型：Point、LineString、Polygon 或 MultiGeometry"""
+        kinds = set(self.kinds.tolist())
+        if len(self.kinds) == 1 and kinds == {PART_POINT}:
+            return 'Point'
+        if len(self.kinds) == 1 and kinds == {PART_LINE}:
+            return 'LineString'
+        if kinds and kinds <= {PART_OUTER, PART_INNER} and int((self.kinds == PART_OUTER).sum()) == 1:
+            return 'Polygon'
+        return 'MultiGeometry'
+    
+    @property
+    def is_points(self):
+        """是否只包含点"""
+        return len(self.kinds) > 0 and bool((self.kinds == PART_POINT).all())
     
-    # 计算圆周上的点
-    coordinates_list = []
-    num_points = 36  # 圆周上的点数
+    @property
+    def vertex_count(self):
+        return len(self.coords)
     
-    # 地球半径（米）
-    earth_radius = 6378137.0
+    def points(self):
+        """所有点部分的坐标，(M, 2) 数组"""
+        if len(self.kinds) == 1:
+            return self.coords[:1] if self.kinds[0] == PART_POINT else self.coords[:0]
+        starts = self.offsets[:-1][self.kinds == PART_POINT]
+        return self.coords[starts]
     
-    for i in range(num_points + 1):  # +1 to close the polygon
-        angle = 2 * math.pi * i / num_points
+    def representative_point(self):
+        """
+        代表点：点类型为点本身，其他类型为第一个部分顶点的平均位置
         
-        # 计算相对于中心点的偏移（以度为单位）
-        lat_offset = (radius_meters * math.cos(angle)) / earth_radius * (180 / math.pi)
-        lon_offset = (radius_meters * math.sin(angle)) / (earth_radius * math.cos(math.radians(center_lat))) * (180 / math.pi)
+        Returns:
+            tuple: (经度, 纬度)，没有几何数据时返回None
+        """
+        if not len(self.kinds):
+            return None
+        kind, coords = self.part(0)
+        if kind in (PART_OUTER, PART_INNER) and len(coords) > 1 and (coords[0] == coords[-1]).all():
+            coords = coords[:-1]  # 闭合环的最后一个顶点与第一个重复
+        lon, lat = coords.mean(axis=0) if kind != PART_POINT else coords[0]
+        return float(lon), float(lat)
+
+def parse_kml_coordinates(text):
+    """
+    解析KML坐标字符串
+    
+    Args:
+        text (str): 空白分隔的 "lon,lat[,alt]" 元组
         
-        point_lat = center_lat + lat_offset
-        point_lon = center_lon + lon_offset
+    Returns:
+        numpy.ndarray: (N, 2) 经纬度数组，格式错误时抛出 ValueError
+    """
+    tuples = text.split() if text else []
+    if not tuples:
+        return np.empty((0, 2))
+    try:
+        dims = tuples[0].count(',') + 1
+        values = np.array(','.join(tuples).split(','), dtype=np.float64)
+        if dims < 2:
+            raise ValueError
+        return values.reshape(-1, dims)[:, :2]
+    except ValueError:
+        # 兼容逗号前后带空格的写法，如 "116.4, 39.9"
+        tuples = re.sub(r'\s*,\s*', ',', text.strip()).split()
+        dims = tuples[0].count(',') + 1
+        if dims < 2:
+            raise ValueError(f"坐标格式错误: {tuples[0]}")
+        values = np.array(','.join(tuples).split(','), dtype=np.float64)
+        return values.reshape(-1, dims)[:, :2]
+
+def _geometry_parts(elem, namespace, parts):
+    """将几何元素（可为MultiGeometry）解析为部分列表，无法识别的元素返回False"""
+    tag = elem.tag[len(namespace):] if elem.tag.startswith(namespace) else None
+    if tag == 'Point':
+        # 点只取第一个坐标，直接解析比数组解析快
+        values = (elem.findtext(f'{namespace}coordinates') or '').replace(',', ' ').split()
+        if values:
+            try:
+                parts.append((PART_POINT, np.array([[float(values[0]), float(values[1])]])))
+            except IndexError:
+                raise ValueError(f"坐标格式错误: {values[0]}")
+    elif tag in ('LineString', 'LinearRing'):
+        coords = parse_kml_coordinates(elem.findtext(f'{namespace}coordinates'))
+        if len(coords):
+            parts.append((PART_LINE, coords))
+    elif tag == 'Polygon':
+        ring_path = f'{namespace}LinearRing/{namespace}coordinates'
+        outer = parse_kml_coordinates(elem.findtext(f'{namespace}outerBoundaryIs/{ring_path}'))
+        if len(outer):
+            parts.append((PART_OUTER, outer))
+            for inner_text in elem.iterfind(f'{namespace}innerBoundaryIs/{ring_path}'):
+                inner = parse_kml_coordinates(inner_text.text)
+                if len(inner):
+                    parts.append((PART_INNER, inner))
+    elif tag == 'MultiGeometry':
+        for child in elem:
+            _geometry_parts(child, namespace, parts)
+    else:
+        return False
+    return True
+
+# 命名空间前缀 -> 该命名空间下的几何元素标签集合
+_geometry_tag_sets = {}
+
+def _geometry_tags(namespace):
+    tags = _geometry_tag_sets.get(namespace)
+    if tags is None:
+        tags = {f'{namespace}{tag}' for tag in ('Point', 'LineString', 'LinearRing', 'Polygon', 'MultiGeometry')}
+        _geometry_tag_sets[namespace] = tags
+    return tags
+
+def parse_placemark_geometry(placemark, namespace=''):
+    """
+    解析Placemark的几何数据，支持Point、LineString、LinearRing、Polygon及其MultiGeometry组合
+    
+    Returns:
+        KmlGeometry: 几何数据，坐标格式错误时抛出 ValueError
+    """
+    parts = []
+    found = False
+    geometry_tags = _geometry_tags(namespace)
+    for child in placemark:
+        if child.tag in geometry_tags:
+            found = _geometry_parts(child, namespace, parts) or found
+    if not found:
+        # 兼容几何元素未作为Placemark直接子元素的文件
+        for tag in ('MultiGeometry', 'Polygon', 'LineString', 'Point'):
+            elem = placemark.find(f'.//{namespace}{tag}')
+            if elem is not None:
+                _geometry_parts(elem, namespace, parts)
+                break
+    return KmlGeometry.from_parts(parts)
+
+def circle_ring(center_lon, center_lat, radius_meters, num_points=None, tolerance=CIRCLE_TOLERANCE):
+    """以 (center_lon, center_lat) 为中心的测地线圆形多边形顶点，(K + 1, 2)，首尾闭合"""
+    return geodesic_circles([center_lon], [center_lat], radius_meters, tolerance, num_points)[0]
+
+def buffer_geometry(geometry, radius_meters, num_points=None, tolerance=CIRCLE_TOLERANCE):
+    """
+    生成几何数据的缓冲区
+    
+    点为圆形；线为各顶点处的圆与各线段两侧的四边形；多边形为多边形本身（含内环）
+    加上各边界环的线缓冲区。各部分可能相互重叠，合起来即为缓冲区范围。
+    
+    Args:
+        geometry (KmlGeometry): 几何数据
+        radius_meters (float): 缓冲半径（米）
+        num_points (int): 每个圆的顶点数，为None时按 tolerance 自动选择
+        tolerance (float): 圆周允许的最大偏差（米）
         
-        coordinates_list.append(f"{point_lon},{point_lat},0")
+    Returns:
+        list: 多边形列表，格式同 create_kml_polygon_placemark 的 polygons 参数
+    """
+    polygons = [[ring] for ring in geodesic_circles(*geometry.points().T, radius_meters, tolerance, num_points)] \
+        if (geometry.kinds == PART_POINT).any() else []
     
-    coordinates_text = " ".join(coordinates_list)
-    ET.SubElement(linear_ring, "coordinates").text = coordinates_text
+    for rings in geometry.polygons():
+        polygons.append(rings)
+    for kind, coords in geometry.parts():
+        if kind == PART_POINT:
+            continue
+        polygons.extend([ring] for ring in geodesic_circles(coords[:, 0], coords[:, 1], radius_meters,
+                                                             tolerance, num_points))
+        polygons.extend([ring] for ring in segment_rings(coords, radius_meters))
+    return polygons
+
+def _element_text(elem):
+    return elem.text.strip() if elem is not None and elem.text else ""
+
+def _find_child_or_descendant(elem, tag):
+    """查找直接子元素，没有时再查找第一个后代元素"""
+    found = elem.find(tag)
+    if found is None:
+        found = elem.find(f'.//{tag}')
+    return found
+
+def _kmz_main_entry(archive):
+    """KMZ中的主KML文档：doc.kml，没有时为第一个 .kml 文件"""
+    names = [name for name in archive.namelist() if name.lower().endswith('.kml')]
+    if not names:
+        raise ValueError("KMZ文件中没有KML文档")
+    for name in names:
+        if name.lower() == 'doc.kml':
+            return name
+    return names[0]
+
+@contextlib.contextmanager
+def open_kml(path):
+    """
+    以二进制流打开KML或KMZ文件
     
-    return placemark
+    KMZ（zip压缩的KML）直接从压缩包中流式解压主KML文档，不解压到磁盘。
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            with archive.open(_kmz_main_entry(archive)) as f:
+                yield f
+    else:
+        with open(path, 'rb') as f:
+            yield f
 
-def parse_kml_points(file_path):
-    """解析KML文件中的点信息"""
-    try:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
+def iter_kml_placemarks(source):
+    """
+    流式读取KML文件中的Placemark元素
+    
+    基于 iterparse 逐个读取，每个Placemark读完即交给调用方，返回后将其与
+    同一父元素下此前已读完的元素（样式等）一起从树中移除，
+    内存占用与文件大小无关，适用于数百MB的KML文件。
+    
+    Args:
+        source: KML/KMZ文件路径或已打开的KML二进制文件对象
         
-        # 确定命名空间
-        namespace = ''
-        if '}' in root.tag:
-            namespace = root.tag.split('}')[0] + '}'
+    Yields:
+        tuple: (Placemark元素, 命名空间前缀如 '{http://www.opengis.net/kml/2.2}')，
+            元素仅在下一次迭代前有效
         
-        points = []
-        placemark_query = f'.//{namespace}Placemark'
+    Raises:
+        ET.ParseError: 文件不是有效的XML
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open_kml(source) as f:
+            yield from iter_kml_placemarks(f)
+        return
+    
+    stack = []          # 当前元素的祖先链，用于从父元素中移除已处理的元素
+    
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
         
-        for placemark in root.findall(placemark_query):
-            # 获取名称
-            name_elem = placemark.find(f'{namespace}name')
-            if name_elem is None:
-                name_elem = placemark.find(f'.//{namespace}name')
-            name = name_elem.text.strip() if name_elem is not None and name_elem.text else "未命名点"
-            
-            # 获取坐标（只处理Point类型）
-            point_elem = placemark.find(f'.//{namespace}Point')
-            if point_elem is not None:
-                coords_elem = point_elem.find(f'{namespace}coordinates')
-                if coords_elem is None:
-                    coords_elem = point_elem.find(f'.//{namespace}coordinates')
-                
-                if coords_elem is not None and coords_elem.text:
-                    coords_text = coords_elem.text.strip()
-                    try:
-                        # 处理坐标格式：lon,lat,alt 或 lon,lat
-                        coords_parts = coords_text.replace(',', ' ').split()
-                        lon = float(coords_parts[0])
-                        lat = float(coords_parts[1])
-                        
-                        # 获取描述
-                        desc_elem = placemark.find(f'{namespace}description')
-                        if desc_elem is None:
-                            desc_elem = placemark.find(f'.//{namespace}description')
-                        description = desc_elem.text.strip() if desc_elem is not None and desc_elem.text else ""
-                        
-                        points.append({
-                            'name': name,
-                            'lon': lon,
-                            'lat': lat,
-                            'description': description
-                        })
-                    except (ValueError, IndexError):
-                        continue
+        stack.pop()
+        if elem.tag.endswith('Placemark'):
+            # Placemark及其几何元素使用同一个命名空间
+            yield elem, elem.tag[:-len('Placemark')]
+            # 父元素中此前的子元素均已读完，连同当前Placemark一起移除
+            if stack:
+                del stack[-1][:]
+
+def iter_kml_features(source):
+    """
+    流式解析KML/KMZ文件中的所有要素，支持任意命名空间
+    
+    Args:
+        source: KML/KMZ文件路径或已打开的KML二进制文件对象
         
-        return points, None
+    Yields:
+        dict: {'name', 'description', 'geometry'}，geometry 为 KmlGeometry；
+            没有几何数据或坐标格式错误的Placemark被跳过
+        
+    Raises:
+        ET.ParseError: 文件不是有效的XML
+    """
+    for placemark, namespace in iter_kml_placemarks(source):
+        try:
+            geometry = parse_placemark_geometry(placemark, namespace)
+        except ValueError:
+            continue
+        if not len(geometry):
+            continue
+        yield {
+            'name': _element_text(_find_child_or_descendant(placemark, f'{namespace}name')) or "未命名点",
+            'description': _element_text(_find_child_or_descendant(placemark, f'{namespace}description')),
+            'geometry': geometry
+        }
+
+def iter_kml_points(source):
+    """
+    流式解析KML/KMZ文件中的点信息
+    
+    Args:
+        source: KML/KMZ文件路径或已打开的KML二进制文件对象
+        
+    Yields:
+        dict: {'name', 'lon', 'lat', 'description'}，每个包含点的Placemark取其第一个点
+        
+    Raises:
+        ET.ParseError: 文件不是有效的XML
+    """
+    for feature in iter_kml_features(source):
+        points = feature['geometry'].points()
+        if not len(points):
+            continue
+        yield {
+            'name': feature['name'],
+            'lon': float(points[0, 0]),
+            'lat': float(points[0, 1]),
+            'description': feature['description']
+        }
+
+def parse_kml_points(file_path):
+    """解析KML文件中的点信息"""
+    try:
+        return list(iter_kml_points(file_path)), None
     except ET.ParseError as e:
         return [], f"KML文件解析错误: {e}"
     except Exception as e:
         return [], f"读取KML文件时发生错误: {e}"
 
+KML_NAMESPACE = "http://www.opengis.net/kml/2.2"
+
+class KmlWriter:
+    """
+    流式KML写入器
+    
+    Placemark逐个直接写入文件，不在内存中构建完整的文档树，输出大小只受磁盘空间限制。
+    扩展名为 .kmz 时写入zip压缩的KMZ（压缩包内为 doc.kml）。
+    内容先写入同目录的临时文件，close() 时再替换目标文件，中途出错不会留下不完整的文件。
+    
+    用法：
+        with KmlWriter(path, "点画圆结果") as writer:
+            writer.write_point(name, lon, lat, description)
+    """
+    
+    def __init__(self, path, document_name=None, indent="  ", kmz=None, precision=None):
+        """
+        Args:
+            path (str): 输出文件路径
+            document_name (str): 文档名称，为None时不写
+            indent (str): 每级缩进的字符串，为空时输出紧凑格式（文件更小、写入更快）
+            kmz (bool): 是否输出KMZ，默认按扩展名判断
+            precision (int): 多边形顶点坐标保留的小数位数，为None时保留完整精度
+        """
+        self.path = path
+        self.precision = precision
+        self.kmz = path.lower().endswith('.kmz') if kmz is None else kmz
+        self.indent = indent or ""
+        self.count = 0
+        self._tmp_path = f"{path}.part"
+        self._archive = None
+        self._raw = open(self._tmp_path, 'wb')
+        try:
+            if self.kmz:
+                self._archive = zipfile.ZipFile(self._raw, 'w', zipfile.ZIP_DEFLATED)
+                self._stream = self._archive.open('doc.kml', 'w', force_zip64=True)
+            else:
+                self._stream = self._raw
+            self._file = io.TextIOWrapper(io.BufferedWriter(self._stream, 1024 * 1024)
+                                          if self.kmz else self._stream,
+                                          encoding='utf-8', newline='\n', write_through=False)
+            self._file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+            self._file.write(f'<kml xmlns="{KML_NAMESPACE}">{self._newline(0)}<Document>')
+            if document_name is not None:
+                self._file.write(f'{self._newline(1)}<name>{escape(str(document_name))}</name>')
+        except Exception:
+            self.abort()
+            raise
+    
+    def _newline(self, level):
+        return "\n" + self.indent * level if self.indent else ""
+    
+    def _write_header(self, name, description):
+        nl = self._newline(2)
+        self._file.write(f'{self._newline(1)}<Placemark>{nl}<name>{escape(str(name))}</name>')
+        if description:
+            self._file.write(f'{nl}<description>{escape(str(description))}</description>')
+    
+    def write_point(self, name, lon, lat, description=""):
+        """写入点要素"""
+        self._write_header(name, description)
+        nl2, nl3 = self._newline(2), self._newline(3)
+        self._file.write(f'{nl2}<Point>{nl3}<coordinates>{lon},{lat},0</coordinates>{nl2}</Point>'
+                         f'{self._newline(1)}</Placemark>')
+        self.count += 1
+    
+    def write_polygons(self, name, polygons, description=""):
+        """
+        写入多边形要素
+        
+        Args:
+            name (str): 名称
+            polygons (list): 多边形列表，每个多边形为环的列表 [外环, 内环...]，
+                每个环为 (N, 2) 的经纬度数组；多于一个多边形时使用MultiGeometry
+            description (str): 描述
+        """
+        self._write_header(name, description)
+        multi = len(polygons) > 1
+        level = 3 if multi else 2
+        if multi:
+            self._file.write(f'{self._newline(2)}<MultiGeometry>')
+        for rings in polygons:
+            self._file.write(f'{self._newline(level)}<Polygon>')
+            for i, ring in enumerate(rings):
+                boundary = "outerBoundaryIs" if i == 0 else "innerBoundaryIs"
+                self._file.write(f'{self._newline(level + 1)}<{boundary}>'
+                                 f'{self._newline(level + 2)}<LinearRing>'
+                                 f'{self._newline(level + 3)}<coordinates>')
+                self._file.write(format_kml_coordinates(ring, self.precision))
+                self._file.write(f'</coordinates>{self._newline(level + 2)}</LinearRing>'
+                                 f'{self._newline(level + 1)}</{boundary}>')
+            self._file.write(f'{self._newline(level)}</Polygon>')
+        if multi:
+            self._file.write(f'{self._newline(2)}</MultiGeometry>')
+        self._file.write(f'{self._newline(1)}</Placemark>')
+        self.count += 1
+    
+    def write_element(self, element):
+        """写入任意 ElementTree 元素（如 create_kml_placemark 创建的Placemark）"""
+        if self.indent:
+            ET.indent(element, space=self.indent, level=1)
+        self._file.write(self._newline(1))
+        self._file.write(ET.tostring(element, encoding='unicode'))
+        self.count += 1
+    
+    def close(self):
+        """结束文档并替换目标文件"""
+        if self._raw is None:
+            return
+        self._file.write(f'{self._newline(0)}</Document>\n</kml>\n')
+        self._file.flush()
+        self._file.close()  # 同时关闭压缩包内的文档流
+        if self._archive is not None:
+            self._archive.close()
+        self._raw.close()
+        self._raw = None
+        os.replace(self._tmp_path, self.path)
+    
+    def abort(self):
+        """放弃写入，删除临时文件"""
+        if self._raw is None:
+            return
+        try:
+            if hasattr(self, '_file'):
+                self._file.close()
+        except Exception:
+            pass
+        try:
+            self._raw.close()
+        finally:
+            self._raw = None
+            try:
+                os.remove(self._tmp_path)
+            except OSError:
+                pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
 def pretty_print_xml(xml_string):
     """格式化XML字符串"""
     parsed_string = parseString(xml_string)
@@ -1,12 +1,13 @@
 # -*- coding: utf-8 -*-
 """POI搜索选项卡模块"""
 
+import bisect
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, simpledialog
-import xml.etree.ElementTree as ET
 import openpyxl
 from .amap_api import search_nearby_pois_amap
-from .kml_utils import create_kml_placemark, pretty_print_xml
+from .kml_utils import KmlWriter
 
 class POISearchTab:
     """POI搜索选项卡"""
@@ -17,6 +18,10 @@ class POISearchTab:
         self.config = config
         self.favorite_manager = favorite_manager
         self.current_results = []
+        # 与 current_results 一一对应的排序键 (页码, 页内序号)，使分页并发到达的结果按页码顺序显示
+        self._result_keys = []
+        # 每次查询递增，旧查询在新查询开始后到达的结果被忽略
+        self._search_id = 0
         self.update_status = None  # 状态更新回调函数
         
         # 创建选项卡
@@ -185,24 +190,60 @@ class POISearchTab:
         for i in self.results_tree.get_children():
             self.results_tree.delete(i)
         self.current_results = []
+        self._result_keys = []
+        self._search_id += 1
+        self.search_button.config(state=tk.DISABLED)
+        
+        # 在新线程中分页查询，每页结果到达后立即显示
+        thread = threading.Thread(target=self._search_thread,
+                                  args=(self._search_id, wgs_lon, wgs_lat, radius_meters, keywords, api_key))
+        thread.daemon = True
+        thread.start()
+    
+    def _search_thread(self, search_id, wgs_lon, wgs_lat, radius_meters, keywords, api_key):
+        """POI查询线程"""
+        def on_page(page, pois, done_pages, total_pages):
+            self.parent.after(0, self._add_page_results, search_id, page, pois, done_pages, total_pages)
+        
+        error_msg, pois = search_nearby_pois_amap(wgs_lon, wgs_lat, radius_meters, keywords, api_key=api_key,
+                                                  on_page=on_page)
+        self.parent.after(0, self._finish_search, search_id, error_msg, pois)
+    
+    def _add_page_results(self, search_id, page, pois, done_pages, total_pages):
+        """把一页新增的POI按页码顺序插入结果表格"""
+        if search_id != self._search_id:
+            return
+        for seq, poi in enumerate(pois):
+            key = (page, seq)
+            index = bisect.bisect(self._result_keys, key)
+            self._result_keys.insert(index, key)
+            self.current_results.insert(index, poi)
+            self.results_tree.insert("", index, values=(
+                poi["name"],
+                f"{poi['wgs84_lon']:.6f}",
+                f"{poi['wgs84_lat']:.6f}"
+            ))
+        if self.update_status:
+            self.update_status(f"正在查询... 已完成 {done_pages}/{total_pages} 页，找到 {len(self.current_results)} 个结果")
+    
+    def _finish_search(self, search_id, error_msg, pois):
+        """查询结束"""
+        if search_id != self._search_id:
+            return
+        self.search_button.config(state=tk.NORMAL)
         
-        # 执行搜索
-        error_msg, pois = search_nearby_pois_amap(wgs_lon, wgs_lat, radius_meters, keywords, api_key=api_key)
-        
-        if error_msg:
+        if error_msg and pois:
+            # 部分页面失败，保留已获取的结果
+            messagebox.showwarning("查询结果不完整", f"{error_msg}")
+            if self.update_status:
+                self.update_status(f"查询完成，找到 {len(self.current_results)} 个结果（部分页面失败）")
+        elif error_msg:
             messagebox.showerror("查询失败", f"{error_msg}")
             if self.update_status:
                 self.update_status(f"查询失败: {error_msg}")
         elif pois:
-            self.current_results = pois
-            for poi in pois:
-                self.results_tree.insert("", "end", values=(
-                    poi["name"],
-                    f"{poi['wgs84_lon']:.6f}",
-                    f"{poi['wgs84_lat']:.6f}"
-                ))
             if self.update_status:
-                self.update_status(f"查询完成，找到 {len(pois)} 个结果")
+                self.update_status(f"查询完成，找到 {len(self.current_results)} 个结果")
         else:
             messagebox.showinfo("查询结果", "未找到符合条件的POI。")
             if self.update_status:
@@ -260,25 +301,17 @@ class POISearchTab:
         
         file_path = filedialog.asksaveasfilename(
             defaultextension=".kml",
-            filetypes=[("KML 文件", "*.kml"), ("所有文件", "*.*")],
+            filetypes=[("KML 文件", "*.kml"), ("KMZ 文件", "*.kmz"), ("所有文件", "*.*")],
             title="保存查询结果为KML"
         )
         
         if not file_path:
             return
         
-        kml = ET.Element("kml", xmlns="http://www.opengis.net/kml/2.2")
-        document = ET.SubElement(kml, "Document")
-        
-        for poi in self.current_results:
-            placemark = create_kml_placemark(poi["name"], poi["wgs84_lon"], poi["wgs84_lat"])
-            document.append(placemark)
-        
         try:
-            tree_string = ET.tostring(kml, encoding='utf-8', method='xml')
-            pretty_xml_string = pretty_print_xml(tree_string.decode('utf-8'))
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(pretty_xml_string)
+            with KmlWriter(file_path) as writer:
+                for poi in self.current_results:
+                    writer.write_point(poi["name"], poi["wgs84_lon"], poi["wgs84_lat"])
             messagebox.showinfo("导出成功", f"结果已成功导出到:\n{file_path}")
             if self.update_status:
                 self.update_status(f"KML结果已导出到 {file_path}")
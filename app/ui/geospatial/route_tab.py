@@ -2,9 +2,9 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import threading
+import asyncio
 from ...utils.coordinate_converter import wgs84_to_gcj02, gcj02_to_wgs84, convert_coordinates, calculate_distance
-from ...utils import amap_api
+from ...utils.async_amap import async_amap_api, get_event_loop_thread
 from .utils import call_amap_api, format_api_result, show_history_window, show_favorites_window, show_settings_window
 
 class RouteTab:
@@ -134,19 +134,17 @@ class RouteTab:
             if self.update_status:
                 self.update_status("正在计算路径...")
             
-            # 在新线程中执行路径计算
-            thread = threading.Thread(target=self._calculate_routes_thread, 
-                                    args=(start_lng, start_lat, end_lng, end_lat))
-            thread.daemon = True
-            thread.start()
+            # 在后台事件循环中执行路径计算，各项查询并发进行
+            get_event_loop_thread().submit(
+                self._calculate_routes_async(start_lng, start_lat, end_lng, end_lat))
             
         except Exception as e:
             messagebox.showerror("错误", f"计算路径时出错: {str(e)}")
             if self.update_status:
                 self.update_status("就绪")
             
-    def _calculate_routes_thread(self, start_lng, start_lat, end_lng, end_lat):
-        """在线程中计算路径"""
+    async def _calculate_routes_async(self, start_lng, start_lat, end_lng, end_lat):
+        """在后台事件循环中计算路径"""
         try:
             # 将WGS-84坐标转换为GCJ-02坐标（高德地图使用的坐标系）
             start_lng_gcj, start_lat_gcj = wgs84_to_gcj02(start_lng, start_lat)
@@ -160,53 +158,41 @@ class RouteTab:
             
             results = [coord_info]
             
-            # 首先获取起点和终点的地址信息
             if self.update_status:
-                self.parent.after(0, lambda: self.update_status("正在获取起点地址..."))
-            start_address_result = self._call_amap_api("maps_regeocode", {
-                "location": origin
-            })
+                self.parent.after(0, lambda: self.update_status("正在查询起终点地址、直线距离、驾车和步行路径..."))
             
-            if self.update_status:
-                self.parent.after(0, lambda: self.update_status("正在获取终点地址..."))
-            end_address_result = self._call_amap_api("maps_regeocode", {
-                "location": destination
-            })
+            # 起终点地址、直线距离、驾车和步行路径相互独立，并发查询
+            (start_address_result, end_address_result, straight_distance_result,
+             driving_result, walking_result) = await asyncio.gather(
+                self._call_amap_api("maps_regeocode", {
+                    "location": origin
+                }),
+                self._call_amap_api("maps_regeocode", {
+                    "location": destination
+                }),
+                self._call_amap_api("maps_distance", {
+                    "origins": origin,
+                    "destination": destination,
+                    "type": "0"  # 直线距离
+                }),
+                self._call_amap_api("maps_direction_driving", {
+                    "origin": origin,
+                    "destination": destination
+                }),
+                self._call_amap_api("maps_direction_walking", {
+                    "origin": origin,
+                    "destination": destination
+                }))
             
             # 显示地址信息
             if start_address_result:
                 results.append(f"起点地址信息:\n{start_address_result}\n")
             if end_address_result:
                 results.append(f"终点地址信息:\n{end_address_result}\n")
-            
-            # 计算直线距离
-            if self.update_status:
-                self.parent.after(0, lambda: self.update_status("正在计算直线距离..."))
-            straight_distance_result = self._call_amap_api("maps_distance", {
-                "origins": origin,
-                "destination": destination,
-                "type": "0"  # 直线距离
-            })
             if straight_distance_result:
                 results.append(f"直线距离:\n{straight_distance_result}\n")
-            
-            # 计算驾车路径
-            if self.update_status:
-                self.parent.after(0, lambda: self.update_status("正在计算驾车路径..."))
-            driving_result = self._call_amap_api("maps_direction_driving", {
-                "origin": origin,
-                "destination": destination
-            })
             if driving_result:
                 results.append(f"驾车路径:\n{driving_result}\n")
-            
-            # 计算步行路径
-            if self.update_status:
-                self.parent.after(0, lambda: self.update_status("正在计算步行路径..."))
-            walking_result = self._call_amap_api("maps_direction_walking", {
-                "origin": origin,
-                "destination": destination
-            })
             if walking_result:
                 results.append(f"步行路径:\n{walking_result}\n")
             
@@ -232,8 +218,8 @@ class RouteTab:
             if self.update_status:
                 self.parent.after(0, lambda: self.update_status("计算失败"))
             
-    def _call_amap_api(self, tool_name, params):
-        """调用高德地图API"""
+    async def _call_amap_api(self, tool_name, params):
+        """调用高德地图API（异步）"""
         try:
             # 检查是否配置了API密钥
             api_key = self.config.get_amap_api_key()
@@ -243,27 +229,27 @@ class RouteTab:
             
             # 调用真实API
             if tool_name == "maps_direction_driving":
-                result = amap_api.direction_driving(params['origin'], params['destination'])
+                result = await async_amap_api.direction_driving(params['origin'], params['destination'])
                 if result['status'] == 'success':
                     return self._format_driving_result(result)
                 else:
                     return f"驾车路径查询失败: {result.get('message', '未知错误')}"
             elif tool_name == "maps_direction_walking":
-                result = amap_api.direction_walking(params['origin'], params['destination'])
+                result = await async_amap_api.direction_walking(params['origin'], params['destination'])
                 if result['status'] == 'success':
                     return self._format_walking_result(result)
                 else:
                     return f"步行路径查询失败: {result.get('message', '未知错误')}"
             elif tool_name == "maps_distance":
                 distance_type = int(params.get('type', '1'))
-                result = amap_api.distance(params['origins'], params['destination'], distance_type)
+                result = await async_amap_api.distance(params['origins'], params['destination'], distance_type)
                 if result['status'] == 'success':
                     return self._format_distance_result(result, distance_type)
                 else:
                     return f"距离查询失败: {result.get('message', '未知错误')}"
             elif tool_name == "maps_regeocode":
                 lng, lat = map(float, params['location'].split(','))
-                result = amap_api.regeocode(lng, lat)
+                result = await async_amap_api.regeocode(lng, lat)
                 if result['status'] == 'success':
                     return self._format_regeocode_result(result)
                 else:
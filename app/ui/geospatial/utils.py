@@ -4,6 +4,7 @@ import tkinter as tk
 from tkinter import messagebox
 import threading
 from ...utils import amap_api
+from ...utils.api_cache import get_api_cache
 
 
 class HistoryManager:
@@ -256,7 +257,7 @@ def show_settings_window(parent, config, theme):
         # 创建设置窗口
         settings_window = tk.Toplevel(parent)
         settings_window.title("设置")
-        settings_window.geometry("400x300")
+        settings_window.geometry("400x420")
         settings_window.transient(parent)
         
         # 居中显示
@@ -280,13 +281,24 @@ def show_settings_window(parent, config, theme):
         cache_frame.pack(fill=tk.X, padx=10, pady=10)
         
         cache_enabled_var = tk.BooleanVar()
-        cache_enabled_var.set(config.get('cache_enabled', True))
+        cache_enabled_var.set(config.get('cache_settings.enable_cache', True))
         tk.Checkbutton(cache_frame, text="启用结果缓存", variable=cache_enabled_var).pack(anchor=tk.W)
         
         tk.Label(cache_frame, text="缓存过期时间(小时):").pack(anchor=tk.W)
         cache_ttl_entry = tk.Entry(cache_frame, width=10)
         cache_ttl_entry.pack(anchor=tk.W, pady=5)
-        cache_ttl_entry.insert(0, str(config.get('cache_ttl_hours', 24)))
+        cache_ttl_entry.insert(0, str(config.get('cache_settings.cache_duration_hours', 24)))
+        
+        tk.Label(cache_frame, text="缓存大小上限(MB):").pack(anchor=tk.W)
+        cache_size_entry = tk.Entry(cache_frame, width=10)
+        cache_size_entry.pack(anchor=tk.W, pady=5)
+        cache_size_entry.insert(0, str(config.get('cache_settings.max_cache_size_mb', 50)))
+        
+        def clear_cache():
+            get_api_cache().clear()
+            messagebox.showinfo("成功", "缓存已清空")
+        
+        tk.Button(cache_frame, text="清空缓存", command=clear_cache).pack(anchor=tk.W)
         
         # 历史记录设置
         history_frame = tk.LabelFrame(settings_window, text="历史记录设置", padx=10, pady=10)
@@ -308,12 +320,19 @@ def show_settings_window(parent, config, theme):
                 new_api_key = api_key_entry.get().strip()
                 if new_api_key:
                     config.set_amap_api_key(new_api_key)
+                    # 同步到API实例，并解除因旧Key无效而停止的请求
+                    amap_api.set_api_key(new_api_key)
                 
                 # 保存缓存设置
-                config.set('cache_enabled', cache_enabled_var.get())
+                config.set('cache_settings.enable_cache', cache_enabled_var.get())
                 try:
                     cache_ttl = int(cache_ttl_entry.get())
-                    config.set('cache_ttl_hours', cache_ttl)
+                    config.set('cache_settings.cache_duration_hours', cache_ttl)
+                except ValueError:
+                    pass
+                try:
+                    cache_size = int(cache_size_entry.get())
+                    config.set('cache_settings.max_cache_size_mb', cache_size)
                 except ValueError:
                     pass
                 
@@ -4,6 +4,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from config import config
+from ..utils.async_amap import async_amap_api, get_event_loop_thread
 from .geospatial.dialogs import ConfigDialog
 from .geospatial.poi_search_tab import POISearchTab
 from .geospatial.conversion_tab import ConversionTab
@@ -19,6 +20,7 @@ class GeospatialTool:
         self.parent = parent
         self.theme = theme
         self.status_text = tk.StringVar(value="就绪")
+        self.api_status_text = tk.StringVar(value="API: 检测中...")
         
         # 初始化配置和管理器
         self.config = config
@@ -30,6 +32,9 @@ class GeospatialTool:
         
         # 设置UI
         self.setup_ui()
+        
+        # 窗口显示后再在后台测试API连接，不阻塞启动
+        self.parent.after_idle(self.check_api_health)
     
     def check_api_key(self):
         """检查API密钥"""
@@ -119,6 +124,16 @@ class GeospatialTool:
         )
         status_label.pack(side=tk.LEFT, padx=5, pady=2)
         
+        # API连接状态
+        self.api_status_label = tk.Label(
+            status_frame, 
+            textvariable=self.api_status_text,
+            font=("微软雅黑", 9), 
+            bg=self.theme.bg_color, 
+            fg=self.theme.text_color
+        )
+        self.api_status_label.pack(side=tk.LEFT, padx=15, pady=2)
+        
         # 工具按钮
         button_frame = tk.Frame(status_frame, bg=self.theme.bg_color)
         button_frame.pack(side=tk.RIGHT, padx=5, pady=2)
@@ -176,6 +191,34 @@ class GeospatialTool:
         self.status_text.set(message)
         self.parent.update_idletasks()
     
+    def check_api_health(self, force=False):
+        """
+        在后台测试高德API连接，结果显示在状态栏
+        
+        Args:
+            force (bool): 忽略有效期内的测试结果，重新测试（如修改配置后）
+        """
+        if not self.config.get_amap_api_key():
+            self.api_status_text.set("API: 未配置Key")
+            return
+        self.api_status_text.set("API: 检测中...")
+        get_event_loop_thread().run_in_tk(
+            self.parent, async_amap_api.check_health(force),
+            self._show_api_health,
+            lambda e: self._show_api_health((False, f"连接测试失败: {e}", None)))
+    
+    def _show_api_health(self, health):
+        """显示API连接测试结果"""
+        ok, message, _ = health
+        if ok:
+            self.api_status_text.set("API: ✅ 连接正常")
+        else:
+            # 状态栏只显示简短说明，完整信息输出到控制台
+            short = message if len(message) <= 30 else message[:30] + "..."
+            self.api_status_text.set(f"API: ❌ {short}")
+            print(f"警告：高德地图API不可用 - {message}")
+            print("地理空间相关功能可能受限。")
+    
     def show_history(self):
         """显示历史记录"""
         show_history_window(self.parent, self.history_manager, self.theme)
@@ -196,6 +239,8 @@ class GeospatialTool:
             if hasattr(self.poi_search_tab, 'update_favorite_locations'):
                 self.poi_search_tab.update_favorite_locations()
             self.update_status("配置已更新")
+            # Key可能已更改，重新测试API连接
+            self.check_api_health(force=True)
     
     def show_help(self):
         """显示帮助信息"""
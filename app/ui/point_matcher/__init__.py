@@ -2,7 +2,12 @@
 """点匹配工具模块"""
 
 from .point_matcher_tab import PointMatcherTab
-from .distance_calculator import haversine_distance, haversine_distance_vectorized
+from .distance_calculator import (haversine_distance, haversine_distance_vectorized, haversine_distance_pairwise,
+                                  haversine_nearest_chunked)
+from .spatial_index import SpatialIndex
+from .parallel_matcher import parallel_query
 from .template_generator import TemplateGenerator
 
-__all__ = ['PointMatcherTab', 'haversine_distance', 'haversine_distance_vectorized', 'TemplateGenerator']
\ No newline at end of file
+__all__ = ['PointMatcherTab', 'haversine_distance', 'haversine_distance_vectorized',
+           'haversine_distance_pairwise', 'haversine_nearest_chunked', 'SpatialIndex', 'parallel_query',
+           'TemplateGenerator']
\ No newline at end of file
@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
-"""距离计算模块"""
+"""距离计算模块
+
+通用的距离计算由 app.utils.coordinate_converter 提供，此处保留点位匹配使用的接口和分块最近点计算。
+"""
 
 import numpy as np
-from math import radians, sin, cos, sqrt, atan2
+from ...utils.coordinate_converter import EARTH_RADIUS, calculate_distance, distance_one_to_many, distance_pairwise
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     """
@@ -18,18 +21,7 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     Returns:
         float: 两点之间的距离（米）
     """
-    # 将经纬度转换为弧度
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    
-    # Haversine公式
-    dlon = lon2 - lon1
-    dlat = lat2 - lat1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-    r = 6371000  # 地球半径（米）
-    distance = r * c
-    
-    return distance
+    return calculate_distance(lon1, lat1, lon2, lat2)
 
 def haversine_distance_vectorized(lat1, lon1, lat2_array, lon2_array):
     """
@@ -44,19 +36,75 @@ def haversine_distance_vectorized(lat1, lon1, lat2_array, lon2_array):
     Returns:
         numpy.ndarray: 距离数组（米）
     """
-    # 将经纬度转换为弧度
-    lat1_rad = np.radians(lat1)
-    lon1_rad = np.radians(lon1)
-    lat2_rad = np.radians(lat2_array)
-    lon2_rad = np.radians(lon2_array)
+    return distance_one_to_many(lon1, lat1, lon2_array, lat2_array)
+
+def haversine_nearest_chunked(lat_array, lon_array, ref_lat_array, ref_lon_array, max_memory_mb=256):
+    """
+    分块矩阵计算每个目标点到所有基准点的Haversine距离，返回最近基准点
+    
+    每次计算一块目标点 × 全部基准点的距离矩阵，块大小由内存上限决定，
+    避免逐行Python循环的解释器开销。
+    
+    Args:
+        lat_array (numpy.ndarray): 目标点纬度数组
+        lon_array (numpy.ndarray): 目标点经度数组
+        ref_lat_array (numpy.ndarray): 基准点纬度数组
+        ref_lon_array (numpy.ndarray): 基准点经度数组
+        max_memory_mb (float): 单块距离矩阵计算允许使用的内存上限（MB）
+        
+    Returns:
+        tuple: (最近基准点索引数组, 最近距离数组（米）)，
+               经纬度无效的目标点索引为-1、距离为NaN
+    """
+    lat_rad = np.radians(np.asarray(lat_array, dtype=np.float64))
+    lon_rad = np.radians(np.asarray(lon_array, dtype=np.float64))
+    ref_lat_rad = np.radians(np.asarray(ref_lat_array, dtype=np.float64))
+    ref_lon_rad = np.radians(np.asarray(ref_lon_array, dtype=np.float64))
+    ref_cos_lat = np.cos(ref_lat_rad)
+    r = EARTH_RADIUS
     
-    # Haversine公式的向量化计算
-    dlon = lon2_rad - lon1_rad
-    dlat = lat2_rad - lat1_rad
+    n = len(lat_rad)
+    indices = np.full(n, -1, dtype=np.int64)
+    distances = np.full(n, np.nan)
+    if n == 0 or len(ref_lat_rad) == 0:
+        return indices, distances
     
-    a = np.sin(dlat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(dlon/2)**2
-    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
-    r = 6371000  # 地球半径（米）
-    distances = r * c
+    # 每块约同时存在4个 (块大小 × 基准点数) 的float64临时矩阵
+    bytes_per_row = len(ref_lat_rad) * 8 * 4
+    chunk_size = max(1, int(max_memory_mb * 1024 * 1024 // bytes_per_row))
     
-    return distances
\ No newline at end of file
+    for start in range(0, n, chunk_size):
+        end = min(start + chunk_size, n)
+        lat_block = lat_rad[start:end, None]
+        lon_block = lon_rad[start:end, None]
+        
+        # 最近点只需比较haversine中间量a，a越小距离越近
+        a = np.sin((ref_lat_rad - lat_block) / 2) ** 2
+        a += np.cos(lat_block) * ref_cos_lat * np.sin((ref_lon_rad - lon_block) / 2) ** 2
+        a[np.isnan(a)] = np.inf
+        
+        block_idx = np.argmin(a, axis=1)
+        block_a = a[np.arange(end - start), block_idx]
+        found = np.isfinite(block_a)
+        block_a = np.minimum(block_a, 1.0)
+        c = 2 * np.arctan2(np.sqrt(block_a), np.sqrt(1 - block_a))
+        
+        indices[start:end] = np.where(found, block_idx, -1)
+        distances[start:end] = np.where(found, r * c, np.nan)
+    
+    return indices, distances
+
+def haversine_distance_pairwise(lat1_array, lon1_array, lat2_array, lon2_array):
+    """
+    逐对计算两组点之间的Haversine距离
+    
+    Args:
+        lat1_array (numpy.ndarray): 第一组点的纬度数组
+        lon1_array (numpy.ndarray): 第一组点的经度数组
+        lat2_array (numpy.ndarray): 第二组点的纬度数组（与第一组等长）
+        lon2_array (numpy.ndarray): 第二组点的经度数组（与第一组等长）
+        
+    Returns:
+        numpy.ndarray: 对应点对之间的距离数组（米）
+    """
+    return distance_pairwise(lon1_array, lat1_array, lon2_array, lat2_array)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""基准点位索引缓存模块
+
+将解析好的基准点位（名称、经纬度）和构建好的空间索引保存到磁盘，
+以源文件的内容哈希和修改时间作为键。再次使用同一基准文件时，
+直接以内存映射方式加载数组，无需重新解析表格和构建索引。
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import numpy as np
+from .spatial_index import SpatialIndex
+
+# 缓存格式版本，格式或解析规则变化时递增以使旧缓存失效
+CACHE_VERSION = 2
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'cache', 'point_index')
+
+
+def file_digest(path, block_size=1024 * 1024):
+    """计算文件内容的SHA-1哈希"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ReferenceIndexCache:
+    """基准点位索引的磁盘缓存"""
+
+    def __init__(self, cache_dir=None, max_entries=20):
+        """
+        Args:
+            cache_dir (str): 缓存目录，默认为项目根目录下的 cache/point_index
+            max_entries (int): 最多保留的缓存条目数，超出时删除最久未使用的条目
+        """
+        self.cache_dir = os.path.abspath(cache_dir or DEFAULT_CACHE_DIR)
+        self.max_entries = max_entries
+
+    def cache_key(self, path):
+        """根据源文件内容哈希和修改时间生成缓存键"""
+        stat = os.stat(path)
+        raw = f"{CACHE_VERSION}:{file_digest(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key):
+        """
+        加载缓存条目
+
+        Args:
+            key (str): cache_key() 生成的缓存键
+
+        Returns:
+            tuple: (SpatialIndex, 点位名称数组)，无缓存或缓存损坏时返回None
+        """
+        entry = self._entry_dir(key)
+        meta_file = os.path.join(entry, 'meta.json')
+        if not os.path.exists(meta_file):
+            return None
+
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != CACHE_VERSION:
+                return None
+
+            arrays = {name: np.load(os.path.join(entry, f'{name}.npy'), mmap_mode='r')
+                      for name in SpatialIndex.ARRAY_NAMES}
+            # 名称为对象数组，不能内存映射
+            names = np.load(os.path.join(entry, 'names.npy'), allow_pickle=True)
+            index = SpatialIndex.from_arrays(arrays, meta['leaf_size'])
+        except Exception as e:
+            print(f"基准点位索引缓存加载失败，将重新构建: {e}")
+            return None
+
+        # 更新访问时间，用于淘汰最久未使用的条目
+        os.utime(meta_file)
+        return index, names
+
+    def save(self, key, spatial_index, names, source=''):
+        """
+        保存缓存条目
+
+        Args:
+            key (str): cache_key() 生成的缓存键
+            spatial_index (SpatialIndex): 已构建的空间索引
+            names (array-like): 与索引中点位顺序一致的点位名称
+            source (str): 基准点位文件路径，仅记录在元数据中
+
+        Returns:
+            bool: 是否保存成功
+        """
+        entry = self._entry_dir(key)
+        tmp_entry = f"{entry}.tmp{os.getpid()}"
+        try:
+            os.makedirs(tmp_entry, exist_ok=True)
+            for name, array in spatial_index.to_arrays().items():
+                np.save(os.path.join(tmp_entry, f'{name}.npy'), np.ascontiguousarray(array))
+            # 名称按原始值保存为对象数组，缺失值和数字不会被转换为字符串
+            np.save(os.path.join(tmp_entry, 'names.npy'), np.asarray(names, dtype=object),
+                    allow_pickle=True)
+            with open(os.path.join(tmp_entry, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': CACHE_VERSION,
+                    'source': os.path.abspath(source) if source else '',
+                    'leaf_size': spatial_index.leaf_size,
+                    'points': len(spatial_index),
+                    'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                }, f, ensure_ascii=False, indent=2)
+
+            # 先写入临时目录再整体替换，避免留下不完整的缓存
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp_entry, entry)
+        except Exception as e:
+            print(f"基准点位索引缓存保存失败: {e}")
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            return False
+
+        self._prune()
+        return True
+
+    def _prune(self):
+        """删除超出数量上限的最久未使用条目"""
+        entries = []
+        for key in os.listdir(self.cache_dir):
+            meta_file = os.path.join(self.cache_dir, key, 'meta.json')
+            if os.path.exists(meta_file):
+                entries.append((os.path.getmtime(meta_file), key))
+        entries.sort(reverse=True)
+        for _, key in entries[self.max_entries:]:
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+
+    def clear(self):
+        """清空全部缓存"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
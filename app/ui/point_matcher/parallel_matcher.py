@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""并行点匹配模块
+
+将目标点位切分为多个分片，交给进程池并行查询。
+基准点位的空间索引只构建一次并放入共享内存，各工作进程直接映射使用，
+不会随每个任务重复序列化。
+"""
+
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from .spatial_index import SpatialIndex
+
+# 工作进程中挂载的共享索引（每个进程初始化一次）
+_worker_index = None
+_worker_shms = []
+
+
+def default_worker_count():
+    """默认工作进程数：CPU核心数"""
+    return os.cpu_count() or 1
+
+
+class SharedIndex:
+    """
+    放入共享内存的空间索引
+
+    作为上下文管理器使用，退出时释放共享内存。
+    """
+
+    def __init__(self, spatial_index):
+        self.leaf_size = spatial_index.leaf_size
+        self.layout = {}
+        self._shms = []
+        try:
+            for name, array in spatial_index.to_arrays().items():
+                array = np.ascontiguousarray(array)
+                shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self._shms.append(shm)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+                self.layout[name] = (shm.name, array.shape, array.dtype.str)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        """释放共享内存"""
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+        self._shms = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _init_worker(layout, leaf_size):
+    """工作进程初始化：挂载共享内存中的索引数组"""
+    global _worker_index
+    arrays = {}
+    for name, (shm_name, shape, dtype) in layout.items():
+        shm = shared_memory.SharedMemory(name=shm_name, track=False)
+        _worker_shms.append(shm)  # 保持引用，防止共享内存在进程存活期间被关闭
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    _worker_index = SpatialIndex.from_arrays(arrays, leaf_size)
+
+
+def query_index(spatial_index, lons, lats, mode='nearest', param=None, progress_callback=None):
+    """
+    按查询模式调用空间索引的对应查询方法
+
+    Args:
+        spatial_index (SpatialIndex): 基准点位的空间索引
+        lons (array-like): 目标点位经度
+        lats (array-like): 目标点位纬度
+        mode (str): 查询模式，'nearest'、'knn' 或 'radius'
+        param: knn模式下为k，radius模式下为半径（米）
+        progress_callback (callable): 进度回调，参数为(已处理数, 总数)
+
+    Returns:
+        与 SpatialIndex 对应查询方法相同格式的结果
+    """
+    if mode == 'knn':
+        return spatial_index.query_knn(lons, lats, param, progress_callback)
+    if mode == 'radius':
+        return spatial_index.query_radius(lons, lats, param, progress_callback)
+    return spatial_index.query_nearest(lons, lats, progress_callback)
+
+
+def _query_shard(start, lons, lats, mode, param):
+    """在工作进程中查询一个目标点位分片"""
+    result = query_index(_worker_index, lons, lats, mode, param)
+    if mode == 'radius':
+        # 半径查询返回的目标点位索引是分片内的局部索引，需要加上分片起点
+        targets, refs, distances = result
+        result = (targets + start, refs, distances)
+    return start, len(lons), result
+
+
+class ParallelMatcher:
+    """
+    持有进程池和共享索引的并行匹配器
+
+    作为上下文管理器使用，可对多个目标点位数据块重复查询，进程池只启动一次。
+    """
+
+    def __init__(self, spatial_index, workers=None, shard_size=50000):
+        """
+        Args:
+            spatial_index (SpatialIndex): 基准点位的空间索引
+            workers (int): 工作进程数，默认为CPU核心数
+            shard_size (int): 每个分片的目标点位数
+        """
+        self.spatial_index = spatial_index
+        self.workers = workers or default_worker_count()
+        self.shard_size = shard_size
+        self._shared = SharedIndex(spatial_index)
+        try:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(self._shared.layout, self._shared.leaf_size))
+        except Exception:
+            self._shared.close()
+            raise
+
+    def query(self, lons, lats, mode='nearest', param=None, progress_callback=None):
+        """
+        并行查询目标点位
+
+        Args:
+            lons (array-like): 目标点位经度
+            lats (array-like): 目标点位纬度
+            mode (str): 查询模式，'nearest'、'knn' 或 'radius'
+            param: knn模式下为k，radius模式下为半径（米）
+            progress_callback (callable): 进度回调，参数为(已处理数, 总数)
+
+        Returns:
+            与 SpatialIndex 对应查询方法相同格式的结果
+        """
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        n = len(lons)
+        if n == 0:
+            return query_index(self.spatial_index, lons, lats, mode, param, progress_callback)
+
+        # 分片数至少为工作进程数，保证每个进程都有任务
+        shard_size = max(1, min(self.shard_size, -(-n // self.workers)))
+
+        parts = {}
+        done = 0
+        futures = [self._executor.submit(_query_shard, start, lons[start:start + shard_size],
+                                         lats[start:start + shard_size], mode, param)
+                   for start in range(0, n, shard_size)]
+        for future in as_completed(futures):
+            start, count, result = future.result()
+            parts[start] = result
+            done += count
+            if progress_callback:
+                progress_callback(done, n)
+
+        ordered = [parts[start] for start in sorted(parts)]
+        return tuple(np.concatenate(column) for column in zip(*ordered))
+
+    def close(self):
+        """关闭进程池并释放共享内存"""
+        self._executor.shutdown(cancel_futures=True)
+        self._shared.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def parallel_query(spatial_index, lons, lats, mode='nearest', param=None,
+                   workers=None, shard_size=50000, progress_callback=None):
+    """
+    使用进程池并行查询目标点位
+
+    Args:
+        spatial_index (SpatialIndex): 基准点位的空间索引
+        lons (array-like): 目标点位经度
+        lats (array-like): 目标点位纬度
+        mode (str): 查询模式，'nearest'、'knn' 或 'radius'
+        param: knn模式下为k，radius模式下为半径（米）
+        workers (int): 工作进程数，默认为CPU核心数
+        shard_size (int): 每个分片的目标点位数
+        progress_callback (callable): 进度回调，参数为(已处理数, 总数)
+
+    Returns:
+        与 SpatialIndex 对应查询方法相同格式的结果
+    """
+    workers = workers or default_worker_count()
+    if len(lons) == 0 or workers <= 1:
+        return query_index(spatial_index, lons, lats, mode, param, progress_callback)
+
+    with ParallelMatcher(spatial_index, workers, shard_size) as matcher:
+        return matcher.query(lons, lats, mode, param, progress_callback)
@@ -6,9 +6,27 @@ from tkinter import filedialog, messagebox, ttk
 import pandas as pd
 import numpy as np
 import os
-from .distance_calculator import haversine_distance_vectorized
+import threading
+from .distance_calculator import haversine_nearest_chunked
+from .parallel_matcher import ParallelMatcher, default_worker_count, query_index
+from .index_cache import ReferenceIndexCache
+from .spatial_index import SpatialIndex
+from .table_io import (FILE_TYPES, TableWriter, check_table_format, iter_table_chunks, read_table,
+                       read_table_columns)
 from .template_generator import TemplateGenerator
 
+# 基准点位和目标点位文件必须包含的列
+REQUIRED_COLUMNS = ['点位名称', '经度', '纬度']
+
+# 最近点模式下，基准点数不超过 BRUTE_FORCE_MAX_REFERENCES，或目标点数（每块）× 基准点数
+# 不超过 BRUTE_FORCE_MAX_PAIRS 时使用分块矩阵计算，否则使用空间索引。
+# 实测10万个目标点位时，基准点在64个左右以内矩阵计算不慢于空间索引查询
+BRUTE_FORCE_MAX_REFERENCES = 64
+BRUTE_FORCE_MAX_PAIRS = 5_000_000
+
+# 目标点位不少于该数量时才启用多进程并行计算，避免进程启动开销超过计算本身
+PARALLEL_MIN_POINTS = 50_000
+
 class PointMatcherTab:
     """点匹配功能选项卡类"""
     
@@ -22,6 +40,12 @@ class PointMatcherTab:
         self.output_file_path = tk.StringVar()
         self.output_dir = tk.StringVar()
         self.status_var = tk.StringVar(value="就绪")
+        self.match_mode = tk.StringVar(value="nearest")
+        self.knn_k = tk.IntVar(value=5)
+        self.search_radius = tk.DoubleVar(value=500.0)
+        self.use_parallel = tk.BooleanVar(value=True)
+        self.worker_count = tk.IntVar(value=default_worker_count())
+        self.use_index_cache = tk.BooleanVar(value=True)
         
         # 创建模板生成器
         self.template_generator = TemplateGenerator(log_callback=self.log)
@@ -44,14 +68,15 @@ class PointMatcherTab:
         instruction_frame.pack(fill=tk.X, pady=5)
         
         instructions = (
-            "1. 准备两个Excel文件：\n"
+            "1. 准备两个Excel文件（也支持CSV和Parquet格式，大文件按块流式处理）：\n"
             "   - Data.xlsx：包含基准点位数据（点位名称、经度、纬度）\n"
             "   - Point.xlsx：包含需要匹配的目标点位数据（点位名称、经度、纬度）\n"
             "2. 可以下载模板文件作为参考\n"
             "3. 选择这两个文件\n"
             "4. 选择输出保存位置\n"
-            "5. 点击'开始计算'按钮\n"
-            "6. 结果将保存为Excel文件"
+            "5. 选择匹配模式：最近点位、最近K个点位或半径范围内的所有点位\n"
+            "6. 点击'开始计算'按钮\n"
+            "7. 结果将保存为Excel文件（输出文件名以.csv或.parquet结尾时保存为对应格式）"
         )
         instruction_label = tk.Label(instruction_frame, text=instructions, 
                                    justify=tk.LEFT, bg=self.theme.bg_color,
@@ -144,15 +169,52 @@ class PointMatcherTab:
         output_name_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         self.output_file_path.set("Point_with_closest_matches.xlsx")
         
+        # 匹配模式选择
+        mode_frame = tk.LabelFrame(main_frame, text="匹配模式", 
+                                 bg=self.theme.bg_color, font=("微软雅黑", 10, "bold"))
+        mode_frame.pack(fill=tk.X, pady=5)
+        
+        mode_inner = tk.Frame(mode_frame, bg=self.theme.bg_color)
+        mode_inner.pack(fill=tk.X, pady=2, padx=10)
+        
+        tk.Radiobutton(mode_inner, text="最近点位", variable=self.match_mode, value="nearest",
+                      bg=self.theme.bg_color, font=("微软雅黑", 9)).pack(side=tk.LEFT, padx=5)
+        tk.Radiobutton(mode_inner, text="最近K个点位", variable=self.match_mode, value="knn",
+                      bg=self.theme.bg_color, font=("微软雅黑", 9)).pack(side=tk.LEFT, padx=5)
+        tk.Label(mode_inner, text="K:", bg=self.theme.bg_color, 
+               font=("微软雅黑", 9)).pack(side=tk.LEFT)
+        tk.Entry(mode_inner, textvariable=self.knn_k, width=6, 
+               font=("微软雅黑", 9)).pack(side=tk.LEFT, padx=(0, 15))
+        tk.Radiobutton(mode_inner, text="半径范围内点位", variable=self.match_mode, value="radius",
+                      bg=self.theme.bg_color, font=("微软雅黑", 9)).pack(side=tk.LEFT, padx=5)
+        tk.Label(mode_inner, text="半径(米):", bg=self.theme.bg_color, 
+               font=("微软雅黑", 9)).pack(side=tk.LEFT)
+        tk.Entry(mode_inner, textvariable=self.search_radius, width=8, 
+               font=("微软雅黑", 9)).pack(side=tk.LEFT)
+        
+        parallel_inner = tk.Frame(mode_frame, bg=self.theme.bg_color)
+        parallel_inner.pack(fill=tk.X, pady=2, padx=10)
+        
+        tk.Checkbutton(parallel_inner, text=f"多进程并行计算（目标点位不少于{PARALLEL_MIN_POINTS}个时启用）",
+                      variable=self.use_parallel, bg=self.theme.bg_color,
+                      font=("微软雅黑", 9)).pack(side=tk.LEFT, padx=5)
+        tk.Label(parallel_inner, text="进程数:", bg=self.theme.bg_color, 
+               font=("微软雅黑", 9)).pack(side=tk.LEFT)
+        tk.Entry(parallel_inner, textvariable=self.worker_count, width=6, 
+               font=("微软雅黑", 9)).pack(side=tk.LEFT, padx=(0, 15))
+        tk.Checkbutton(parallel_inner, text="缓存基准点位索引（重复使用同一基准文件时跳过解析）",
+                      variable=self.use_index_cache, bg=self.theme.bg_color,
+                      font=("微软雅黑", 9)).pack(side=tk.LEFT, padx=5)
+        
         # 操作按钮
         button_frame = tk.Frame(main_frame, bg=self.theme.bg_color)
         button_frame.pack(pady=10)
         
-        calc_btn = tk.Button(button_frame, text="开始计算", 
-                           command=self.start_calculation,
-                           bg=button_style["bg"], fg=button_style["fg"],
-                           font=("微软雅黑", 10, "bold"), width=20)
-        calc_btn.pack(side=tk.LEFT, padx=10)
+        self.calc_btn = tk.Button(button_frame, text="开始计算", 
+                                command=self.start_calculation,
+                                bg=button_style["bg"], fg=button_style["fg"],
+                                font=("微软雅黑", 10, "bold"), width=20)
+        self.calc_btn.pack(side=tk.LEFT, padx=10)
         
         # 日志区域
         log_frame = tk.LabelFrame(main_frame, text="处理日志", 
@@ -175,7 +237,7 @@ class PointMatcherTab:
         """浏览基准点位文件"""
         filename = filedialog.askopenfilename(
             title="选择基准点位文件",
-            filetypes=[("Excel文件", "*.xlsx"), ("所有文件", "*.*")]
+            filetypes=FILE_TYPES
         )
         if filename:
             self.data_file_path.set(filename)
@@ -189,7 +251,7 @@ class PointMatcherTab:
         """浏览目标点位文件"""
         filename = filedialog.askopenfilename(
             title="选择目标点位文件",
-            filetypes=[("Excel文件", "*.xlsx"), ("所有文件", "*.*")]
+            filetypes=FILE_TYPES
         )
         if filename:
             self.point_file_path.set(filename)
@@ -205,11 +267,25 @@ class PointMatcherTab:
             self.log(f"已选择输出位置: {directory}")
     
     def log(self, message):
-        """记录日志"""
+        """记录日志（可在后台线程中调用）"""
+        if threading.current_thread() is not threading.main_thread():
+            self.parent_frame.after(0, lambda: self.log(message))
+            return
         self.log_text.insert(tk.END, message + "\n")
         self.log_text.see(tk.END)
         self.parent_frame.update_idletasks()
     
+    def _make_progress_logger(self, step_ratio=0.1):
+        """创建按比例输出当前数据块匹配进度的回调，避免频繁刷新界面"""
+        state = {'next': 0}
+        
+        def report(done, total):
+            if done >= state['next'] or done == total:
+                self.log(f"正在匹配当前数据块: {done}/{total}")
+                state['next'] = done + max(1, int(total * step_ratio))
+        
+        return report
+    
     def start_calculation(self):
         """开始计算最近点位匹配"""
         # 检查文件是否已选择
@@ -236,105 +312,222 @@ class PointMatcherTab:
             messagebox.showerror("错误", f"目标点位文件不存在: {self.point_file_path.get()}")
             return
         
+        # 检查文件格式及所需依赖（如Parquet需要pyarrow），避免在后台计算中途才报错
+        try:
+            for path in (self.data_file_path.get(), self.point_file_path.get(), self.output_file_path.get()):
+                check_table_format(path)
+        except (ValueError, ImportError) as e:
+            messagebox.showerror("错误", str(e))
+            return
+        
+        # 在主线程读取界面参数，计算在后台线程中进行
+        try:
+            params = {
+                'data_file': self.data_file_path.get(),
+                'point_file': self.point_file_path.get(),
+                'output_file': os.path.join(self.output_dir.get(), self.output_file_path.get()),
+                'mode': self.match_mode.get(),
+                'k': self.knn_k.get(),
+                'radius': self.search_radius.get(),
+                'workers': self.worker_count.get() if self.use_parallel.get() else 1,
+                'use_cache': self.use_index_cache.get(),
+            }
+        except tk.TclError:
+            messagebox.showerror("错误", "请输入有效的K值、查询半径和进程数！")
+            return
+        
+        self.calc_btn.config(state=tk.DISABLED)
+        if self.update_status:
+            self.update_status("正在计算...")
+        threading.Thread(target=self._calculation_thread, args=(params,), daemon=True).start()
+    
+    def _calculation_thread(self, params):
+        """后台计算线程：基准点位一次性读入，目标点位按块流式读取、匹配并写出"""
+        matcher = None
         try:
-            if self.update_status:
-                self.update_status("正在计算...")
             self.log("开始计算最近点位匹配...")
             
-            # 读取Excel文件
-            self.log("正在读取Excel文件...")
-            data_df = pd.read_excel(self.data_file_path.get())
-            point_df = pd.read_excel(self.point_file_path.get())
+            mode = params['mode']
+            if mode == 'knn':
+                param = params['k']
+                if param < 1:
+                    raise ValueError("K必须为正整数")
+                sheet_name = f'最近{param}个点位匹配结果'
+            elif mode == 'radius':
+                param = params['radius']
+                if param <= 0:
+                    raise ValueError("查询半径必须大于0")
+                sheet_name = '半径范围匹配结果'
+            else:
+                param = None
+                sheet_name = '最近点位匹配结果'
             
             # 检查必要的列是否存在
-            required_data_columns = ['点位名称', '经度', '纬度']
-            required_point_columns = ['点位名称', '经度', '纬度']
-            
-            missing_data_columns = [col for col in required_data_columns if col not in data_df.columns]
-            missing_point_columns = [col for col in required_point_columns if col not in point_df.columns]
-            
-            if missing_data_columns:
-                error_msg = f"基准点位文件缺少必要的列: {', '.join(missing_data_columns)}"
-                self.log(error_msg)
-                messagebox.showerror("错误", error_msg)
-                if self.update_status:
-                    self.update_status("就绪")
-                return
-            
+            missing_point_columns = [col for col in REQUIRED_COLUMNS
+                                     if col not in read_table_columns(params['point_file'])]
             if missing_point_columns:
-                error_msg = f"目标点位文件缺少必要的列: {', '.join(missing_point_columns)}"
-                self.log(error_msg)
-                messagebox.showerror("错误", error_msg)
-                if self.update_status:
-                    self.update_status("就绪")
-                return
+                raise ValueError(f"目标点位文件缺少必要的列: {', '.join(missing_point_columns)}")
             
-            # 创建结果DataFrame
-            result_df = point_df.copy()
-            result_df['最近点位名称'] = ''
-            result_df['最近距离(米)'] = 0.0
+            data_names, data_lons, data_lats, spatial_index = self._load_reference(
+                params['data_file'], params['use_cache'])
             
-            self.log(f"正在计算{len(point_df)}个点位的最近匹配...")
-            self.log("使用优化算法进行向量化计算，大幅提升计算速度...")
+            if mode == 'knn' and len(data_names) < param:
+                self.log(f"基准点位只有{len(data_names)}个，每个目标点位最多匹配{len(data_names)}个")
             
-            # 提取基准点位的经纬度数组
-            data_lats = data_df['纬度'].values
-            data_lons = data_df['经度'].values
-            data_names = data_df['点位名称'].values
-            
-            # 为Point表中的每个点找到Data表中最近的点（使用向量化计算）
-            for i, point_row in point_df.iterrows():
-                # 获取当前点的经纬度
-                point_lat = point_row['纬度']
-                point_lon = point_row['经度']
-                
-                # 使用向量化函数一次计算到所有基准点的距离
-                distances = haversine_distance_vectorized(point_lat, point_lon, data_lats, data_lons)
+            output_file = params['output_file']
+            self.log(f"正在按块读取目标点位并写出结果到 {output_file}...")
+            stats = {'points': 0, 'invalid': 0, 'unmatched': 0, 'records': 0}
+            with TableWriter(output_file, sheet_name) as writer:
+                for point_df in iter_table_chunks(params['point_file']):
+                    point_lons = pd.to_numeric(point_df['经度'], errors='coerce').values
+                    point_lats = pd.to_numeric(point_df['纬度'], errors='coerce').values
+                    
+                    if mode == 'nearest' and (len(data_lons) <= BRUTE_FORCE_MAX_REFERENCES
+                                              or len(point_df) * len(data_lons) <= BRUTE_FORCE_MAX_PAIRS):
+                        # 数据量较小时直接分块矩阵计算（即使已从缓存加载了索引），省去构建和遍历索引的开销
+                        result = haversine_nearest_chunked(point_lats, point_lons, data_lats, data_lons)
+                    else:
+                        if spatial_index is None:
+                            # 基于基准点位构建空间索引（仅构建一次）
+                            self.log(f"正在为{len(data_lons)}个基准点位构建空间索引...")
+                            spatial_index = SpatialIndex(data_lons, data_lats)
+                        if (matcher is None and params['workers'] > 1
+                                and len(point_df) >= PARALLEL_MIN_POINTS):
+                            self.log(f"使用{params['workers']}个进程并行计算...")
+                            matcher = ParallelMatcher(spatial_index, params['workers'])
+                        progress = self._make_progress_logger()
+                        if matcher is not None:
+                            result = matcher.query(point_lons, point_lats, mode, param,
+                                                   progress_callback=progress)
+                        else:
+                            result = query_index(spatial_index, point_lons, point_lats, mode, param,
+                                                 progress_callback=progress)
+                    
+                    if mode == 'knn':
+                        result_df = build_knn_result(point_df, data_names, *result, stats)
+                    elif mode == 'radius':
+                        result_df = build_radius_result(point_df, data_names, *result, stats)
+                    else:
+                        result_df = build_nearest_result(point_df, data_names, *result, stats)
+                    writer.write(result_df)
+                    
+                    stats['points'] += len(point_df)
+                    self.log(f"已处理 {stats['points']} 个点位")
                 
-                # 找到最小距离的索引
-                min_idx = np.argmin(distances)
-                min_distance = distances[min_idx]
-                closest_name = data_names[min_idx]
-                
-                # 将最近点的信息添加到结果中
-                result_df.at[i, '最近点位名称'] = closest_name
-                result_df.at[i, '最近距离(米)'] = min_distance
-                
-                # 更新进度（减少更新频率以提高性能）
-                if (i + 1) % 50 == 0 or i == len(point_df) - 1:
-                    self.log(f"已处理 {i + 1}/{len(point_df)} 个点位")
-                    self.parent_frame.update_idletasks()
-            
-            # 保存结果到新的Excel文件
-            output_file = os.path.join(self.output_dir.get(), self.output_file_path.get())
+                if stats['points'] == 0:
+                    raise ValueError("目标点位文件中没有数据")
             
-            # 将数值列转换为字符串，避免科学计数法显示
-            # 将距离值转换为字符串，保留两位小数
-            result_df['最近距离(米)'] = result_df['最近距离(米)'].apply(lambda x: f"{x:.2f}")
-            
-            # 使用ExcelWriter保存，并设置选项
-            self.log(f"正在保存结果到 {output_file}...")
-            with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-                result_df.to_excel(writer, index=False, sheet_name='最近点位匹配结果')
-                
-                # 获取工作表
-                worksheet = writer.sheets['最近点位匹配结果']
-                
-                # 调整列宽以适应内容
-                for idx, col in enumerate(result_df.columns):
-                    max_length = max(result_df[col].astype(str).map(len).max(), len(col)) + 2
-                    worksheet.column_dimensions[chr(65 + idx)].width = max_length
+            if stats['invalid']:
+                self.log(f"目标点位中有{stats['invalid']}行经纬度无效，未进行匹配")
+            if mode == 'radius':
+                if stats['unmatched']:
+                    self.log(f"有{stats['unmatched']}个目标点位在半径范围内没有基准点位")
+                self.log(f"共找到{stats['records']}条匹配记录")
             
             self.log(f"计算完成！结果已保存到 {output_file}")
             self.log("所有数值已转换为文本格式，避免科学计数法显示问题")
             
-            messagebox.showinfo("完成", f"计算完成！结果已保存到 {output_file}")
-            if self.update_status:
-                self.update_status("就绪")
+            self.parent_frame.after(0, lambda: messagebox.showinfo("完成", f"计算完成！结果已保存到 {output_file}"))
             
         except Exception as e:
             error_msg = f"发生错误: {str(e)}"
             self.log(error_msg)
-            messagebox.showerror("错误", error_msg)
-            if self.update_status:
-                self.update_status("就绪")
\ No newline at end of file
+            self.parent_frame.after(0, lambda: messagebox.showerror("错误", error_msg))
+        finally:
+            if matcher is not None:
+                matcher.close()
+            self.parent_frame.after(0, self._calculation_finished)
+    
+    def _load_reference(self, data_file, use_cache):
+        """
+        读取基准点位，返回(名称数组, 经度数组, 纬度数组, 空间索引)
+        
+        启用缓存时优先从磁盘缓存加载已构建的索引；未命中则解析文件、构建索引并写入缓存。
+        不使用缓存时空间索引为None，由调用方按需构建。
+        """
+        cache = ReferenceIndexCache() if use_cache else None
+        if cache is not None:
+            cache_key = cache.cache_key(data_file)
+            cached = cache.load(cache_key)
+            if cached is not None:
+                spatial_index, data_names = cached
+                self.log(f"已从缓存加载{len(spatial_index)}个基准点位的空间索引")
+                return data_names, spatial_index.lons, spatial_index.lats, spatial_index
+        
+        missing_data_columns = [col for col in REQUIRED_COLUMNS if col not in read_table_columns(data_file)]
+        if missing_data_columns:
+            raise ValueError(f"基准点位文件缺少必要的列: {', '.join(missing_data_columns)}")
+        
+        # 读取基准点位，只保留必要的列，跳过经纬度无效的行
+        self.log("正在读取基准点位文件...")
+        data_df = read_table(data_file, columns=REQUIRED_COLUMNS)
+        data_lons = pd.to_numeric(data_df['经度'], errors='coerce').values
+        data_lats = pd.to_numeric(data_df['纬度'], errors='coerce').values
+        valid_mask = np.isfinite(data_lons) & np.isfinite(data_lats)
+        if not valid_mask.all():
+            self.log(f"基准点位中有{int((~valid_mask).sum())}行经纬度无效，已跳过")
+        if not valid_mask.any():
+            raise ValueError("基准点位文件中没有有效的经纬度数据")
+        data_names = data_df['点位名称'].values[valid_mask]
+        data_lons, data_lats = data_lons[valid_mask], data_lats[valid_mask]
+        
+        spatial_index = None
+        if cache is not None:
+            self.log(f"正在为{len(data_lons)}个基准点位构建空间索引...")
+            spatial_index = SpatialIndex(data_lons, data_lats)
+            if cache.save(cache_key, spatial_index, data_names, source=data_file):
+                self.log("基准点位索引已写入缓存")
+        return data_names, data_lons, data_lats, spatial_index
+    
+    def _calculation_finished(self):
+        """计算结束后恢复界面状态"""
+        self.calc_btn.config(state=tk.NORMAL)
+        if self.update_status:
+            self.update_status("就绪")
+
+
+def build_nearest_result(point_df, data_names, indices, distances, stats):
+    """生成最近点位模式的结果表：在目标点位表后追加最近点位名称和距离"""
+    # 按列一次性写入匹配结果，经纬度无效的目标点位留空
+    matched = indices >= 0
+    closest_names = np.full(len(point_df), '', dtype=object)
+    closest_names[matched] = data_names[indices[matched]]
+    stats['invalid'] += int((~matched).sum())
+    
+    result_df = point_df.copy()
+    result_df['最近点位名称'] = closest_names
+    result_df['最近距离(米)'] = format_distances(distances)
+    return result_df
+
+
+def build_knn_result(point_df, data_names, indices, distances, stats):
+    """生成K近邻模式的长格式结果表：每个目标点位的每个匹配占一行"""
+    rows, cols = np.nonzero(indices >= 0)
+    stats['invalid'] += int((indices[:, 0] < 0).sum())
+    return build_long_result(point_df, rows, cols + 1, data_names[indices[rows, cols]], distances[rows, cols])
+
+
+def build_radius_result(point_df, data_names, targets, refs, distances, stats):
+    """生成半径查询模式的长格式结果表：每个目标点位的每个匹配占一行"""
+    # 目标点位已按距离排序，组内序号即为排名
+    starts = np.flatnonzero(np.r_[True, targets[1:] != targets[:-1]]) if len(targets) else targets
+    group_sizes = np.diff(np.r_[starts, len(targets)])
+    ranks = np.arange(len(targets)) - np.repeat(starts, group_sizes) + 1
+    
+    stats['unmatched'] += len(point_df) - len(starts)
+    stats['records'] += len(targets)
+    return build_long_result(point_df, targets, ranks, data_names[refs], distances)
+
+
+def build_long_result(point_df, targets, ranks, names, distances):
+    """按目标点位行号展开为长格式结果表"""
+    result_df = point_df.iloc[targets].reset_index(drop=True)
+    result_df['匹配排名'] = ranks
+    result_df['匹配点位名称'] = names
+    result_df['距离(米)'] = format_distances(distances)
+    return result_df
+
+
+def format_distances(distances):
+    """将距离值转换为保留两位小数的字符串，避免科学计数法显示，无效值为空字符串"""
+    return [f"{x:.2f}" if np.isfinite(x) else '' for x in distances]
@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""空间索引模块
+
+基于单位球面三维坐标的KD树，用于批量最近邻查询。
+三维空间中的弦长与球面大圆距离单调对应，因此按弦长找到的最近点即为球面上的最近点，
+最终距离再用Haversine公式精确计算。
+"""
+
+import numpy as np
+from .distance_calculator import haversine_distance_pairwise
+
+EARTH_RADIUS = 6371000  # 地球半径（米），与distance_calculator保持一致
+
+
+def lonlat_to_unit_xyz(lons, lats):
+    """
+    将经纬度转换为单位球面上的三维坐标
+
+    Args:
+        lons (numpy.ndarray): 经度数组
+        lats (numpy.ndarray): 纬度数组
+
+    Returns:
+        numpy.ndarray: 形状为 (N, 3) 的三维坐标数组
+    """
+    lon_rad = np.radians(np.asarray(lons, dtype=np.float64))
+    lat_rad = np.radians(np.asarray(lats, dtype=np.float64))
+    cos_lat = np.cos(lat_rad)
+    return np.column_stack((cos_lat * np.cos(lon_rad),
+                            cos_lat * np.sin(lon_rad),
+                            np.sin(lat_rad)))
+
+
+def _squared_chord(q, p):
+    """计算两组三维点之间的弦长平方矩阵，逐坐标展开以避免三维中间数组"""
+    d_sq = (q[:, 0:1] - p[:, 0]) ** 2
+    d_sq += (q[:, 1:2] - p[:, 1]) ** 2
+    d_sq += (q[:, 2:3] - p[:, 2]) ** 2
+    return d_sq
+
+
+class SpatialIndex:
+    """
+    球面最近邻空间索引
+
+    使用基准点位构建一次，之后可对大量目标点位进行批量查询。
+    树结构全部保存在NumPy数组中（隐式完全二叉树），便于序列化和共享。
+    """
+
+    def __init__(self, lons, lats, leaf_size=64):
+        """
+        构建空间索引
+
+        Args:
+            lons (array-like): 基准点位经度
+            lats (array-like): 基准点位纬度
+            leaf_size (int): 叶子节点的最大点数
+        """
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        if self.lons.shape != self.lats.shape or self.lons.ndim != 1:
+            raise ValueError("经度和纬度必须是长度相同的一维数组")
+        if len(self.lons) == 0:
+            raise ValueError("基准点位不能为空")
+        if not (np.all(np.isfinite(self.lons)) and np.all(np.isfinite(self.lats))):
+            raise ValueError("基准点位包含无效的经纬度")
+
+        self.leaf_size = max(int(leaf_size), 1)
+        self._build()
+
+    def __len__(self):
+        return len(self.lons)
+
+    # 重建索引所需的全部数组
+    ARRAY_NAMES = ('lons', 'lats', 'order', 'points', 'split_dim', 'split_val',
+                   'node_start', 'node_end', 'box_lo', 'box_hi')
+
+    def to_arrays(self):
+        """
+        导出索引的全部数组，便于序列化或放入共享内存
+
+        Returns:
+            dict: 数组名称到NumPy数组的映射
+        """
+        return {name: getattr(self, name) for name in self.ARRAY_NAMES}
+
+    @classmethod
+    def from_arrays(cls, arrays, leaf_size=64):
+        """
+        从已构建好的数组直接恢复索引，不重新构建树
+
+        Args:
+            arrays (dict): to_arrays() 导出的数组（可以是共享内存或内存映射的视图）
+            leaf_size (int): 构建时使用的叶子节点最大点数
+
+        Returns:
+            SpatialIndex: 恢复的索引
+        """
+        index = cls.__new__(cls)
+        for name in cls.ARRAY_NAMES:
+            setattr(index, name, arrays[name])
+        index.leaf_size = leaf_size
+        index.depth = len(index.split_val).bit_length()
+        n_internal = len(index.split_val)
+        index.leaf_start = index.node_start[n_internal:]
+        index.leaf_end = index.node_end[n_internal:]
+        return index
+
+    def _build(self):
+        """构建KD树"""
+        xyz = lonlat_to_unit_xyz(self.lons, self.lats)
+        n = len(xyz)
+
+        # 选择树深度，使每个叶子的点数不超过leaf_size
+        depth = 0
+        while (n >> depth) > self.leaf_size:
+            depth += 1
+        self.depth = depth
+
+        n_internal = (1 << depth) - 1
+        n_nodes = (1 << (depth + 1)) - 1
+        self.split_dim = np.zeros(n_internal, dtype=np.int8)
+        self.split_val = np.zeros(n_internal, dtype=np.float64)
+        node_start = np.zeros(n_nodes, dtype=np.int64)
+        node_end = np.zeros(n_nodes, dtype=np.int64)
+        node_end[0] = n
+
+        # 按中位数递归划分，perm记录点的重排顺序
+        perm = np.arange(n)
+        for node in range(n_internal):
+            start, end = node_start[node], node_end[node]
+            mid = (start + end) // 2
+            left, right = 2 * node + 1, 2 * node + 2
+            node_start[left], node_end[left] = start, mid
+            node_start[right], node_end[right] = mid, end
+            if end - start < 2:
+                continue
+
+            segment = perm[start:end]
+            coords = xyz[segment]
+            dim = int(np.argmax(coords.max(axis=0) - coords.min(axis=0)))
+            order = np.argpartition(coords[:, dim], mid - start)
+            perm[start:end] = segment[order]
+            self.split_dim[node] = dim
+            self.split_val[node] = xyz[perm[mid], dim]
+
+        self.order = perm
+        self.points = xyz[perm]
+        self.node_start = node_start
+        self.node_end = node_end
+        self.leaf_start = node_start[n_internal:]
+        self.leaf_end = node_end[n_internal:]
+
+        # 计算每个节点的包围盒（自底向上合并）
+        self.box_lo = np.full((n_nodes, 3), np.inf)
+        self.box_hi = np.full((n_nodes, 3), -np.inf)
+        for leaf, (start, end) in enumerate(zip(self.leaf_start, self.leaf_end)):
+            if end > start:
+                block = self.points[start:end]
+                self.box_lo[n_internal + leaf] = block.min(axis=0)
+                self.box_hi[n_internal + leaf] = block.max(axis=0)
+        for node in range(n_internal - 1, -1, -1):
+            self.box_lo[node] = np.minimum(self.box_lo[2 * node + 1], self.box_lo[2 * node + 2])
+            self.box_hi[node] = np.maximum(self.box_hi[2 * node + 1], self.box_hi[2 * node + 2])
+
+    def _locate_leaves(self, xyz):
+        """将查询点沿树向下定位到所属叶子"""
+        node = np.zeros(len(xyz), dtype=np.int64)
+        rows = np.arange(len(xyz))
+        for _ in range(self.depth):
+            dim = self.split_dim[node]
+            go_right = xyz[rows, dim] >= self.split_val[node]
+            node = 2 * node + 1 + go_right
+        return node - ((1 << self.depth) - 1)
+
+    def _leaves_within(self, lo, hi, radius_sq):
+        """
+        批量找出与各查询盒子距离不超过搜索半径的叶子
+
+        所有查询盒子同时自顶向下逐层遍历，返回(盒子编号, 叶子编号)对，按盒子编号排序。
+        """
+        n_internal = (1 << self.depth) - 1
+        owners = np.arange(len(lo))
+        nodes = np.zeros(len(lo), dtype=np.int64)
+        for _ in range(self.depth):
+            owners = np.repeat(owners, 2)
+            nodes = (2 * np.repeat(nodes, 2) + 1) + np.tile([0, 1], len(nodes))
+            gap = np.maximum(self.box_lo[nodes] - hi[owners], lo[owners] - self.box_hi[nodes])
+            np.maximum(gap, 0.0, out=gap)
+            keep = np.einsum('ij,ij->i', gap, gap) <= radius_sq[owners]
+            owners, nodes = owners[keep], nodes[keep]
+        return owners, nodes - n_internal
+
+    def _gather_candidates(self, leaves):
+        """收集若干叶子中的所有点位（在重排数组中的位置）"""
+        starts = self.leaf_start[leaves]
+        ends = self.leaf_end[leaves]
+        sizes = ends - starts
+        total = int(sizes.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.int64)
+        offsets = np.repeat(starts - np.cumsum(sizes) + sizes, sizes)
+        return np.arange(total) + offsets
+
+    def query_nearest(self, lons, lats, progress_callback=None):
+        """
+        批量查询最近的基准点位
+
+        Args:
+            lons (array-like): 目标点位经度
+            lats (array-like): 目标点位纬度
+            progress_callback (callable): 进度回调，参数为(已处理数, 总数)
+
+        Returns:
+            tuple: (最近基准点位的原始索引数组, 距离数组（米）)，
+                   经纬度无效的目标点位索引为-1、距离为NaN
+        """
+        indices, distances = self.query_knn(lons, lats, 1, progress_callback)
+        return indices[:, 0], distances[:, 0]
+
+    def query_knn(self, lons, lats, k, progress_callback=None):
+        """
+        批量查询最近的k个基准点位
+
+        Args:
+            lons (array-like): 目标点位经度
+            lats (array-like): 目标点位纬度
+            k (int): 每个目标点位返回的最近点位数
+            progress_callback (callable): 进度回调，参数为(已处理数, 总数)
+
+        Returns:
+            tuple: (索引矩阵, 距离矩阵（米）)，形状均为 (目标点数, k)，每行按距离升序排列；
+                   基准点位不足k个或目标点位经纬度无效时，对应位置索引为-1、距离为NaN
+        """
+        k = int(k)
+        if k < 1:
+            raise ValueError("k必须为正整数")
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        k_eff = min(k, len(self))
+        indices = np.full((len(lons), k), -1, dtype=np.int64)
+        distances = np.full((len(lons), k), np.nan)
+
+        valid = np.flatnonzero(np.isfinite(lons) & np.isfinite(lats))
+        if len(valid) == 0:
+            return indices, distances
+
+        xyz = lonlat_to_unit_xyz(lons[valid], lats[valid])
+        positions = np.empty((len(valid), k_eff), dtype=np.int64)
+        for query_ids, candidates in self._candidate_groups(xyz, k=k_eff, progress_callback=progress_callback):
+            positions[query_ids] = candidates[self._knn_in_block(xyz[query_ids], self.points[candidates], k_eff)]
+
+        matched = self.order[positions]
+        indices[valid, :k_eff] = matched
+        distances[valid, :k_eff] = haversine_distance_pairwise(
+            lats[valid, None], lons[valid, None], self.lats[matched], self.lons[matched])
+        return indices, distances
+
+    def query_radius(self, lons, lats, radius, progress_callback=None):
+        """
+        批量查询给定半径内的所有基准点位
+
+        Args:
+            lons (array-like): 目标点位经度
+            lats (array-like): 目标点位纬度
+            radius (float): 查询半径（米）
+            progress_callback (callable): 进度回调，参数为(已处理数, 总数)
+
+        Returns:
+            tuple: (目标点位索引数组, 基准点位原始索引数组, 距离数组（米）)，
+                   长格式结果，按目标点位索引、距离升序排列
+        """
+        if radius < 0:
+            raise ValueError("查询半径不能为负数")
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        valid = np.flatnonzero(np.isfinite(lons) & np.isfinite(lats))
+
+        # 球面距离换算为弦长，留出少量余量，最终以Haversine距离精确过滤
+        angle = min(radius / EARTH_RADIUS, np.pi)
+        chord_sq = (2 * np.sin(angle / 2)) ** 2 * (1 + 1e-9) + 1e-18
+
+        target_parts, ref_parts = [], []
+        if len(valid):
+            xyz = lonlat_to_unit_xyz(lons[valid], lats[valid])
+            for query_ids, candidates in self._candidate_groups(xyz, radius_sq=chord_sq,
+                                                                progress_callback=progress_callback):
+                rows, cols = self._within_in_block(xyz[query_ids], self.points[candidates], chord_sq)
+                target_parts.append(query_ids[rows])
+                ref_parts.append(candidates[cols])
+
+        if not target_parts:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty.copy(), np.zeros(0, dtype=np.float64)
+
+        targets = valid[np.concatenate(target_parts)]
+        refs = self.order[np.concatenate(ref_parts)]
+        distances = haversine_distance_pairwise(lats[targets], lons[targets], self.lats[refs], self.lons[refs])
+
+        keep = distances <= radius
+        targets, refs, distances = targets[keep], refs[keep], distances[keep]
+        order = np.lexsort((distances, targets))
+        return targets[order], refs[order], distances[order]
+
+    def _candidate_groups(self, xyz, k=None, radius_sq=None, progress_callback=None):
+        """
+        将查询点按所属叶子分组，逐组生成(查询点编号数组, 候选点位置数组)
+
+        指定k时，以组内每个点在本叶子（不足k个点时取足够大的祖先节点）中第k近的距离作为搜索半径；
+        指定radius_sq时直接使用该弦长平方作为搜索半径。
+        """
+        n = len(xyz)
+        leaves = self._locate_leaves(xyz)
+
+        # 将查询点按所属叶子分组，同组点位共享候选集合
+        order = np.argsort(leaves, kind='stable')
+        sorted_leaves = leaves[order]
+        boundaries = np.flatnonzero(np.diff(sorted_leaves)) + 1
+        group_starts = np.concatenate(([0], boundaries))
+        group_ends = np.concatenate((boundaries, [n]))
+
+        # 第一步：确定各组的搜索半径和包围盒
+        n_groups = len(group_starts)
+        n_internal = (1 << self.depth) - 1
+        group_lo = np.empty((n_groups, 3))
+        group_hi = np.empty((n_groups, 3))
+        group_radius_sq = np.full(n_groups, radius_sq if radius_sq is not None else 0.0)
+        for g, (g_start, g_end) in enumerate(zip(group_starts, group_ends)):
+            q = xyz[order[g_start:g_end]]
+            group_lo[g] = q.min(axis=0)
+            group_hi[g] = q.max(axis=0)
+            if radius_sq is None:
+                node = n_internal + sorted_leaves[g_start]
+                while node > 0 and self.node_end[node] - self.node_start[node] < k:
+                    node = (node - 1) // 2
+                own = self.points[self.node_start[node]:self.node_end[node]]
+                d_sq = _squared_chord(q, own)
+                if k == 1:
+                    kth_sq = d_sq.min(axis=1).max()
+                else:
+                    kth_sq = np.partition(d_sq, k - 1, axis=1)[:, k - 1].max()
+                # 与query_radius相同留出少量余量：包围盒间隙与点间距离的舍入误差不同，
+                # 不留余量时本叶子可能被剪掉，导致结果错误甚至候选集合为空
+                group_radius_sq[g] = kth_sq * (1 + 1e-9) + 1e-18
+
+        # 第二步：收集所有可能包含结果点位的叶子
+        owners, leaves_hit = self._leaves_within(group_lo, group_hi, group_radius_sq)
+        hit_bounds = np.searchsorted(owners, np.arange(n_groups + 1))
+        processed = 0
+        for g, (g_start, g_end) in enumerate(zip(group_starts, group_ends)):
+            query_ids = order[g_start:g_end]
+            yield query_ids, self._gather_candidates(leaves_hit[hit_bounds[g]:hit_bounds[g + 1]])
+
+            processed += len(query_ids)
+            if progress_callback:
+                progress_callback(processed, n)
+
+    @staticmethod
+    def _block_rows(n_candidates, max_elements=4_000_000):
+        """按候选点数计算每块查询点的行数，以限制距离矩阵的内存占用"""
+        return max(1, max_elements // max(n_candidates, 1))
+
+    @classmethod
+    def _knn_in_block(cls, q, candidates, k):
+        """在候选点集中找到每个查询点最近的k个点的位置，按距离升序排列"""
+        step = cls._block_rows(len(candidates))
+        result = np.empty((len(q), k), dtype=np.int64)
+        for i in range(0, len(q), step):
+            d_sq = _squared_chord(q[i:i + step], candidates)
+            if k == 1:
+                result[i:i + step, 0] = np.argmin(d_sq, axis=1)
+                continue
+            if k < d_sq.shape[1]:
+                nearest = np.argpartition(d_sq, k - 1, axis=1)[:, :k]
+            else:
+                nearest = np.broadcast_to(np.arange(d_sq.shape[1]), d_sq.shape)
+            nearest_d = np.take_along_axis(d_sq, nearest, axis=1)
+            result[i:i + step] = np.take_along_axis(nearest, np.argsort(nearest_d, axis=1), axis=1)
+        return result
+
+    @classmethod
+    def _within_in_block(cls, q, candidates, radius_sq):
+        """在候选点集中找出与每个查询点弦长平方不超过radius_sq的点，返回(行号, 列号)"""
+        step = cls._block_rows(len(candidates))
+        rows, cols = [], []
+        for i in range(0, len(q), step):
+            block_rows, block_cols = np.nonzero(_squared_chord(q[i:i + step], candidates) <= radius_sq)
+            rows.append(block_rows + i)
+            cols.append(block_cols)
+        return np.concatenate(rows), np.concatenate(cols)
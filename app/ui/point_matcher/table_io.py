@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""表格读写模块
+
+按块流式读写点位表格，支持Excel（.xlsx）、CSV（.csv）和Parquet（.parquet）格式。
+大文件不会一次性载入内存，结果也按块写出。
+"""
+
+import os
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils import get_column_letter
+
+# 默认每块读取的行数
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Excel工作表的最大行数（含表头）
+EXCEL_MAX_ROWS = 1048576
+
+# 自动调整Excel列宽时最多采样的行数
+WIDTH_SAMPLE_ROWS = 1000
+
+SUPPORTED_EXTENSIONS = ('.xlsx', '.csv', '.parquet')
+
+# 文件对话框使用的文件类型列表
+FILE_TYPES = [("Excel文件", "*.xlsx"), ("CSV文件", "*.csv"),
+              ("Parquet文件", "*.parquet"), ("所有文件", "*.*")]
+
+
+def _file_format(path):
+    """根据扩展名判断文件格式"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"不支持的文件格式: {ext}，仅支持 {', '.join(SUPPORTED_EXTENSIONS)}")
+    return ext
+
+
+def _import_parquet():
+    """导入Parquet依赖，未安装时给出提示"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("读写Parquet文件需要安装pyarrow库：pip install pyarrow")
+    return pyarrow, pyarrow.parquet
+
+
+def check_table_format(path):
+    """
+    检查文件格式是否受支持且所需的依赖已安装，用于在开始处理前尽早报错
+
+    Args:
+        path (str): 文件路径
+
+    Raises:
+        ValueError: 不支持的文件格式
+        ImportError: Parquet文件所需的pyarrow库未安装
+    """
+    if _file_format(path) == '.parquet':
+        _import_parquet()
+
+
+def iter_table_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, columns=None):
+    """
+    按块读取表格文件
+
+    Args:
+        path (str): 文件路径
+        chunk_size (int): 每块的行数
+        columns (list): 只读取指定的列，None表示读取全部列
+
+    Yields:
+        pandas.DataFrame: 数据块，行索引从0开始连续编号
+    """
+    ext = _file_format(path)
+    if ext == '.csv':
+        # 自动识别带BOM的UTF-8（本工具导出的CSV即为此编码）
+        reader = pd.read_csv(path, chunksize=chunk_size, usecols=columns, encoding='utf-8-sig')
+        for chunk in reader:
+            yield chunk.reset_index(drop=True)
+    elif ext == '.parquet':
+        _, pq = _import_parquet()
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from _iter_excel_chunks(path, chunk_size, columns)
+
+
+def _iter_excel_chunks(path, chunk_size, columns):
+    """以只读模式逐行读取Excel第一个工作表"""
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(h) if h is not None else f"Unnamed: {i}" for i, h in enumerate(header)]
+
+        buffer = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            buffer.append(row)
+            if len(buffer) >= chunk_size:
+                yield _excel_rows_to_frame(buffer, header, columns)
+                buffer = []
+        if buffer:
+            yield _excel_rows_to_frame(buffer, header, columns)
+    finally:
+        workbook.close()
+
+
+def _excel_rows_to_frame(rows, header, columns):
+    """将Excel行数据转换为DataFrame"""
+    width = len(header)
+    df = pd.DataFrame([tuple(row[:width]) + (None,) * (width - len(row)) for row in rows], columns=header)
+    return df[columns] if columns is not None else df
+
+
+def read_table(path, columns=None):
+    """
+    读取整个表格文件
+
+    Args:
+        path (str): 文件路径
+        columns (list): 只读取指定的列，None表示读取全部列
+
+    Returns:
+        pandas.DataFrame: 表格数据
+    """
+    chunks = list(iter_table_chunks(path, columns=columns))
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_table_columns(path):
+    """
+    只读取表格的列名
+
+    Args:
+        path (str): 文件路径
+
+    Returns:
+        list: 列名列表
+    """
+    ext = _file_format(path)
+    if ext == '.csv':
+        return list(pd.read_csv(path, nrows=0, encoding='utf-8-sig').columns)
+    if ext == '.parquet':
+        _, pq = _import_parquet()
+        return list(pq.ParquetFile(path).schema_arrow.names)
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        header = next(workbook.worksheets[0].iter_rows(values_only=True, max_row=1), ())
+        return [str(h) for h in header if h is not None]
+    finally:
+        workbook.close()
+
+
+class TableWriter:
+    """
+    按块写出表格文件的写入器
+
+    作为上下文管理器使用，根据扩展名选择格式：
+    - CSV：逐块追加写入
+    - Parquet：逐块写入行组
+    - Excel：使用openpyxl只写模式逐行写入，列宽根据首块数据采样设置
+    """
+
+    def __init__(self, path, sheet_name='Sheet1'):
+        self.path = path
+        self.sheet_name = sheet_name
+        self.format = _file_format(path)
+        check_table_format(path)
+        self.rows_written = 0
+        self._parquet_writer = None
+        self._workbook = None
+        self._worksheet = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close(save=exc_type is None)
+
+    def write(self, df):
+        """写入一个数据块"""
+        if self.format == '.csv':
+            df.to_csv(self.path, mode='w' if self.rows_written == 0 else 'a',
+                      header=self.rows_written == 0, index=False, encoding='utf-8-sig')
+        elif self.format == '.parquet':
+            self._write_parquet(df)
+        else:
+            self._write_excel(df)
+        self.rows_written += len(df)
+
+    def _write_parquet(self, df):
+        pa, pq = _import_parquet()
+        if self._parquet_writer is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = pa.Table.from_pandas(df, schema=self._parquet_writer.schema, preserve_index=False)
+        self._parquet_writer.write_table(table)
+
+    def _write_excel(self, df):
+        if self.rows_written + len(df) >= EXCEL_MAX_ROWS:
+            raise ValueError(f"结果超过{EXCEL_MAX_ROWS - 1}行，超出Excel的行数上限，"
+                             f"请将输出文件名改为.csv或.parquet后重试")
+
+        if self._workbook is None:
+            self._workbook = Workbook(write_only=True)
+            self._worksheet = self._workbook.create_sheet(self.sheet_name)
+            # 只写模式下列宽必须在写入数据之前设置，按首块的采样数据估算
+            sample = df.head(WIDTH_SAMPLE_ROWS)
+            for idx, col in enumerate(df.columns):
+                max_length = max(sample[col].map(str).map(len).max() if len(sample) else 0, len(str(col))) + 2
+                self._worksheet.column_dimensions[get_column_letter(idx + 1)].width = max_length
+            self._worksheet.append([str(col) for col in df.columns])
+
+        for row in df.astype(object).where(df.notna(), None).itertuples(index=False, name=None):
+            self._worksheet.append(row)
+
+    def close(self, save=True):
+        """
+        完成写入并关闭文件
+
+        Args:
+            save (bool): 是否保存Excel工作簿，出错中断时不保存不完整的Excel文件
+        """
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        if not save:
+            self._workbook = None
+            return
+        if self.format == '.xlsx' and self._workbook is None:
+            # 没有任何数据块时也生成带空工作表的文件
+            self._workbook = Workbook(write_only=True)
+            self._workbook.create_sheet(self.sheet_name)
+        if self._workbook is not None:
+            self._workbook.save(self.path)
+            self._workbook = None
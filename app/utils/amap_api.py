@@ -7,8 +7,32 @@
 import requests
 import json
 import time
-from typing import Dict, Any, Optional, Tuple
+import hashlib
+from typing import Dict, Any, List, Optional, Tuple
 from config import config
+from .http_session import get_session
+from .api_cache import get_api_cache
+from .request_coalescer import RequestCoalescer
+from .retry_policy import (AmapAPIError, RetryPolicy, RequestGate, classify_infocode,
+                           ERROR_QPS, ERROR_QUOTA, ERROR_KEY, ERROR_TRANSIENT, ERROR_UNKNOWN)
+
+# 地理编码/逆地理编码批量接口每次请求最多包含的条数
+AMAP_BATCH_SIZE = 10
+
+# 结果可以缓存的接口（路径规划、天气等结果随时间变化，不缓存）
+CACHEABLE_ENDPOINTS = ('geocode/geo', 'geocode/regeo', 'place/text', 'place/around', 'config/district')
+
+# QPS超限时全局暂停所有请求的时长（秒）
+QPS_PAUSE_SECONDS = 1.0
+
+# 连接测试只请求一次，使用较短的超时时间，离线时也能很快得出结果
+HEALTH_CHECK_TIMEOUT = 5
+
+# 连接测试失败的结果只在内存中短暂复用（秒），网络恢复或重启程序后会重新测试
+HEALTH_FAILURE_TTL = 60
+
+# 所有AmapAPI实例共用的请求闸门，同一个Key的限额是共享的
+amap_request_gate = RequestGate()
 
 class AmapAPI:
     """高德地图API调用类"""
@@ -17,50 +41,89 @@ class AmapAPI:
         self.base_url = "https://restapi.amap.com/v3"
         self.api_key = config.get_amap_api_key()
         self.timeout = 10
-        self.retry_times = 3
-        self.retry_delay = 1
+        self.retry_policy = RetryPolicy()
+        self.gate = amap_request_gate
+        # 共享的连接池会话，批量请求时复用长连接
+        self.session = get_session()
+        # 磁盘结果缓存，按配置中的 cache_settings 启用
+        self.cache = get_api_cache()
+        # 合并同时进行的相同请求
+        self.coalescer = RequestCoalescer()
+        # 最近一次连接测试的结果 (是否可用, 说明, 测试时间)
+        self._health = None
     
     def set_api_key(self, api_key: str):
         """设置API密钥"""
         self.api_key = api_key
         config.set_amap_api_key(api_key)
+        # 更换Key后解除因Key无效而停止的请求
+        self.gate.resume()
     
-    def _make_request(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """发起API请求"""
+    def _make_request(self, endpoint: str, params: Dict[str, Any], use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """发起API请求，可缓存的接口先查询缓存"""
         if not self.api_key:
             raise ValueError("请先设置高德地图API密钥")
         
+        use_cache = use_cache and endpoint in CACHEABLE_ENDPOINTS
+        if use_cache:
+            cached = self.cache.get(endpoint, params)
+            if cached is not None:
+                return cached
+        
+        # 相同的请求正在进行时等待并共享其结果，而不是重复请求
+        request_key = (self.api_key, self.cache.make_key(endpoint, params))
+        return self.coalescer.run(request_key, lambda: self._fetch(endpoint, params, use_cache))
+    
+    def _fetch(self, endpoint: str, params: Dict[str, Any], use_cache: bool) -> Dict[str, Any]:
+        """发起请求，临时性错误按重试策略重试"""
         # 添加API密钥到参数
-        params['key'] = self.api_key
+        params = dict(params, key=self.api_key)
         
         url = f"{self.base_url}/{endpoint}"
         
-        for attempt in range(self.retry_times):
+        attempt = 0
+        while True:
             try:
-                response = requests.get(url, params=params, timeout=self.timeout)
-                response.raise_for_status()
-                
-                data = response.json()
-                
-                # 检查API响应状态
-                if data.get('status') == '1':
-                    return data
-                else:
-                    error_msg = data.get('info', '未知错误')
-                    if attempt == self.retry_times - 1:
-                        raise Exception(f"API调用失败: {error_msg}")
-                    else:
-                        time.sleep(self.retry_delay)
-                        continue
-                        
-            except requests.exceptions.RequestException as e:
-                if attempt == self.retry_times - 1:
-                    raise Exception(f"网络请求失败: {str(e)}")
-                else:
-                    time.sleep(self.retry_delay)
-                    continue
+                self.gate.wait()
+                return self._request_once(url, endpoint, params, use_cache)
+            except AmapAPIError as e:
+                if e.category == ERROR_QPS:
+                    # QPS超限：所有请求一起暂停，而不是各自继续请求
+                    self.gate.pause(QPS_PAUSE_SECONDS)
+                elif e.category in (ERROR_QUOTA, ERROR_KEY):
+                    # 配额用尽或Key无效：后续请求直接失败，不再消耗时间和配额
+                    self.gate.halt(e)
+                if not self.retry_policy.should_retry(e, attempt):
+                    raise
+            time.sleep(self.retry_policy.delay(attempt))
+            attempt += 1
+    
+    def _request_once(self, url: str, endpoint: str, params: Dict[str, Any], use_cache: bool,
+                      timeout: Optional[float] = None) -> Dict[str, Any]:
+        """发起一次请求，失败时抛出带错误类别的 AmapAPIError"""
+        try:
+            response = self.session.get(url, params=params, timeout=timeout or self.timeout)
+            response.raise_for_status()
+            data = response.json()
+        except requests.exceptions.HTTPError as e:
+            # 5xx和429为服务端临时故障，其他HTTP错误不重试
+            status_code = e.response.status_code if e.response is not None else 0
+            category = ERROR_TRANSIENT if status_code >= 500 or status_code == 429 else ERROR_UNKNOWN
+            raise AmapAPIError(f"网络请求失败: {str(e)}", category)
+        except requests.exceptions.RequestException as e:
+            raise AmapAPIError(f"网络请求失败: {str(e)}", ERROR_TRANSIENT)
+        except ValueError as e:
+            raise AmapAPIError(f"解析API响应失败: {str(e)}", ERROR_TRANSIENT)
         
-        return None
+        # 检查API响应状态
+        if data.get('status') == '1':
+            if use_cache:
+                self.cache.set(endpoint, params, data)
+            return data
+        
+        infocode = str(data.get('infocode', ''))
+        error_msg = data.get('info', '未知错误')
+        raise AmapAPIError(f"API调用失败: {error_msg}", classify_infocode(infocode), infocode)
     
     def regeocode(self, lng: float, lat: float) -> Dict[str, Any]:
         """逆地理编码 - 坐标转地址"""
@@ -73,31 +136,100 @@ class AmapAPI:
             'roadlevel': 0
         }
         
+        # 容差半径内已查询过的坐标直接复用结果
+        cached = self.cache.get_nearby('geocode/regeo#all', lng, lat)
+        if cached is not None:
+            return cached
+        
         try:
-            data = self._make_request('geocode/regeo', params)
+            data = self._make_request('geocode/regeo', params, use_cache=False)
             if data and 'regeocode' in data:
-                regeocode = data['regeocode']
-                formatted_address = regeocode.get('formatted_address', '')
-                addressComponent = regeocode.get('addressComponent', {})
-                
-                return {
-                    'status': 'success',
-                    'formatted_address': formatted_address,
-                    'province': addressComponent.get('province', ''),
-                    'city': addressComponent.get('city', ''),
-                    'district': addressComponent.get('district', ''),
-                    'township': addressComponent.get('township', ''),
-                    'street': addressComponent.get('streetNumber', {}).get('street', ''),
-                    'number': addressComponent.get('streetNumber', {}).get('number', ''),
-                    'adcode': addressComponent.get('adcode', ''),
-                    'pois': regeocode.get('pois', [])[:5]  # 只取前5个POI
-                }
+                result = self._parse_regeocode(data['regeocode'])
+                self.cache.set_point('geocode/regeo#all', lng, lat, result)
+                return result
             else:
                 return {'status': 'error', 'message': '逆地理编码失败'}
                 
         except Exception as e:
             return {'status': 'error', 'message': str(e)}
     
+    def regeocode_batch(self, locations: List[Tuple[float, float]], extensions: str = 'base') -> List[Dict[str, Any]]:
+        """批量逆地理编码 - 每次请求最多包含 AMAP_BATCH_SIZE 个坐标
+        
+        Args:
+            locations (list): (经度, 纬度) 列表，GCJ-02坐标
+            extensions (str): 'base' 只返回地址信息，'all' 同时返回周边POI等信息
+            
+        Returns:
+            list: 与输入顺序一致的结果列表，格式与 regeocode 相同
+        """
+        results = [None] * len(locations)
+        
+        # 逐条查询坐标缓存（容差半径内的邻近坐标可复用），只请求未命中的坐标；
+        # 相同坐标只请求一次，结果填入所有重复的位置
+        duplicates = {}
+        for i, (lng, lat) in enumerate(locations):
+            if (lng, lat) in duplicates:
+                duplicates[(lng, lat)].append(i)
+                continue
+            cached = self.cache.get_nearby(f'geocode/regeo#{extensions}', lng, lat)
+            if cached is not None:
+                results[i] = cached
+            else:
+                duplicates[(lng, lat)] = [i]
+        misses = [rows[0] for rows in duplicates.values()]
+        
+        for start in range(0, len(misses), AMAP_BATCH_SIZE):
+            chunk = misses[start:start + AMAP_BATCH_SIZE]
+            params = {
+                'location': '|'.join(f"{locations[i][0]},{locations[i][1]}" for i in chunk),
+                'radius': 1000,
+                'extensions': extensions,
+                'batch': 'true',
+                'roadlevel': 0
+            }
+            try:
+                data = self._make_request('geocode/regeo', params, use_cache=False)
+                regeocodes = (data or {}).get('regeocodes') or []
+                for j, i in enumerate(chunk):
+                    if j < len(regeocodes) and regeocodes[j]:
+                        results[i] = self._parse_regeocode(regeocodes[j])
+                        self.cache.set_point(f'geocode/regeo#{extensions}', *locations[i], results[i])
+                    else:
+                        results[i] = {'status': 'error', 'message': '逆地理编码失败'}
+            except Exception as e:
+                for i in chunk:
+                    results[i] = {'status': 'error', 'message': str(e)}
+        for rows in duplicates.values():
+            for i in rows[1:]:
+                results[i] = results[rows[0]]
+        return results
+    
+    def _parse_regeocode(self, regeocode: Dict[str, Any]) -> Dict[str, Any]:
+        """解析单个逆地理编码结果"""
+        formatted_address = regeocode.get('formatted_address', '')
+        addressComponent = regeocode.get('addressComponent', {})
+        # 批量接口中缺失的字段返回为空列表
+        streetNumber = addressComponent.get('streetNumber') or {}
+        
+        return {
+            'status': 'success',
+            'formatted_address': self._text(formatted_address),
+            'province': self._text(addressComponent.get('province', '')),
+            'city': self._text(addressComponent.get('city', '')),
+            'district': self._text(addressComponent.get('district', '')),
+            'township': self._text(addressComponent.get('township', '')),
+            'street': self._text(streetNumber.get('street', '')),
+            'number': self._text(streetNumber.get('number', '')),
+            'adcode': self._text(addressComponent.get('adcode', '')),
+            'pois': regeocode.get('pois', [])[:5]  # 只取前5个POI
+        }
+    
+    @staticmethod
+    def _text(value: Any) -> str:
+        """高德API对空字段返回 []，统一转换为空字符串"""
+        return value if isinstance(value, str) else ''
+    
     def geocode(self, address: str, city: str = '') -> Dict[str, Any]:
         """地理编码 - 地址转坐标"""
         params = {
@@ -108,26 +240,81 @@ class AmapAPI:
         try:
             data = self._make_request('geocode/geo', params)
             if data and 'geocodes' in data and data['geocodes']:
-                geocode = data['geocodes'][0]
-                location = geocode.get('location', '').split(',')
-                
-                if len(location) == 2:
-                    return {
-                        'status': 'success',
-                        'lng': float(location[0]),
-                        'lat': float(location[1]),
-                        'formatted_address': geocode.get('formatted_address', ''),
-                        'province': geocode.get('province', ''),
-                        'city': geocode.get('city', ''),
-                        'district': geocode.get('district', ''),
-                        'level': geocode.get('level', '')
-                    }
+                result = self._parse_geocode(data['geocodes'][0])
+                if result:
+                    return result
             
             return {'status': 'error', 'message': '地理编码失败'}
             
         except Exception as e:
             return {'status': 'error', 'message': str(e)}
     
+    def geocode_batch(self, addresses: List[str], city: str = '') -> List[Dict[str, Any]]:
+        """批量地理编码 - 每次请求最多包含 AMAP_BATCH_SIZE 个地址
+        
+        Args:
+            addresses (list): 地址列表
+            city (str): 查询城市，对本批所有地址生效
+            
+        Returns:
+            list: 与输入顺序一致的结果列表，格式与 geocode 相同（坐标为GCJ-02）
+        """
+        results = [None] * len(addresses)
+        
+        # 逐条查询缓存，只请求未命中的地址；相同地址只请求一次，结果填入所有重复的位置
+        duplicates = {}
+        for i, address in enumerate(addresses):
+            if address in duplicates:
+                duplicates[address].append(i)
+                continue
+            cached = self.cache.get('geocode/geo#item', {'address': address, 'city': city})
+            if cached is not None:
+                results[i] = cached
+            else:
+                duplicates[address] = [i]
+        misses = [rows[0] for rows in duplicates.values()]
+        
+        for start in range(0, len(misses), AMAP_BATCH_SIZE):
+            chunk = misses[start:start + AMAP_BATCH_SIZE]
+            params = {
+                # '|' 是批量请求的分隔符，不能出现在地址中
+                'address': '|'.join(addresses[i].replace('|', ' ') for i in chunk),
+                'city': city,
+                'batch': 'true'
+            }
+            try:
+                data = self._make_request('geocode/geo', params, use_cache=False)
+                geocodes = (data or {}).get('geocodes') or []
+                for j, i in enumerate(chunk):
+                    result = self._parse_geocode(geocodes[j]) if j < len(geocodes) and geocodes[j] else None
+                    if result:
+                        self.cache.set('geocode/geo#item', {'address': addresses[i], 'city': city}, result)
+                    results[i] = result or {'status': 'error', 'message': '地理编码失败'}
+            except Exception as e:
+                for i in chunk:
+                    results[i] = {'status': 'error', 'message': str(e)}
+        for rows in duplicates.values():
+            for i in rows[1:]:
+                results[i] = results[rows[0]]
+        return results
+    
+    def _parse_geocode(self, geocode: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """解析单个地理编码结果，没有坐标时返回None"""
+        location = self._text(geocode.get('location', '')).split(',')
+        
+        if len(location) == 2:
+            return {
+                'status': 'success',
+                'lng': float(location[0]),
+                'lat': float(location[1]),
+                'formatted_address': self._text(geocode.get('formatted_address', '')),
+                'province': self._text(geocode.get('province', '')),
+                'city': self._text(geocode.get('city', '')),
+                'district': self._text(geocode.get('district', '')),
+                'level': self._text(geocode.get('level', ''))
+            }
+        return None
+    
     def direction_driving(self, origin: str, destination: str, waypoints: str = '') -> Dict[str, Any]:
         """驾车路径规划"""
         params = {
@@ -279,6 +466,38 @@ class AmapAPI:
         except Exception as e:
             return {'status': 'error', 'message': str(e)}
     
+    def search_around(self, location: str, keywords: str = '', radius: int = 1000, types: str = '',
+                      page: int = 1, offset: int = 25) -> Dict[str, Any]:
+        """
+        周边搜索的一页结果
+        
+        与其他查询方法不同，失败时不返回错误结果而是抛出 AmapAPIError，
+        便于翻页时根据错误类别（如配额用尽、Key无效）停止后续请求。
+        
+        Args:
+            location (str): 中心点GCJ-02坐标，"经度,纬度"
+            keywords (str): 查询关键字
+            radius (int): 查询半径（米）
+            types (str): POI类型
+            page (int): 页码，从1开始
+            offset (int): 每页条数，上限为25
+            
+        Returns:
+            dict: 高德API原始响应
+        """
+        params = {
+            'location': location,
+            'keywords': keywords,
+            'radius': str(radius),
+            'offset': str(offset),
+            'page': str(page),
+        }
+        if types:
+            params['types'] = types
+        if not self.api_key:
+            raise ValueError("请先设置高德地图API密钥")
+        return self._make_request('place/around', params)
+    
     def _format_driving_steps(self, steps: list) -> list:
         """格式化驾车路径步骤"""
         formatted_steps = []
@@ -323,16 +542,53 @@ class AmapAPI:
         return formatted_segments
     
     def test_connection(self) -> Tuple[bool, str]:
-        """测试API连接"""
+        """测试API连接（不使用缓存，不重试）"""
+        if not self.api_key:
+            return False, "未配置API密钥"
+        # 使用一个简单的逆地理编码请求测试连接
+        params = {'location': '116.397428,39.90923', 'key': self.api_key}
         try:
-            # 使用一个简单的逆地理编码请求测试连接
-            result = self.regeocode(116.397428, 39.90923)
-            if result['status'] == 'success':
-                return True, "API连接正常"
-            else:
-                return False, f"API调用失败: {result['message']}"
+            self._request_once(f"{self.base_url}/geocode/regeo", 'geocode/regeo', params,
+                               use_cache=False, timeout=HEALTH_CHECK_TIMEOUT)
+            return True, "API连接正常"
+        except AmapAPIError as e:
+            return False, str(e)
         except Exception as e:
             return False, f"连接测试失败: {str(e)}"
+    
+    def check_health(self, force: bool = False) -> Tuple[bool, str, float]:
+        """
+        检查API是否可用，结果在配置的时间间隔内复用
+        
+        成功的测试结果按Key保存在API缓存中，间隔内再次启动程序时不必重新请求；
+        失败的结果不保存，只在内存中复用很短的时间。
+        
+        Args:
+            force (bool): 忽略已有结果，重新测试（如更换Key后）
+            
+        Returns:
+            tuple: (是否可用, 说明, 测试时间戳)
+        """
+        interval = float(config.get('api_settings.health_check_interval_minutes', 30)) * 60
+        key_hash = hashlib.sha1(self.api_key.encode('utf-8')).hexdigest()
+        cache_params = {'api_key_hash': key_hash}
+        
+        if not force and interval > 0:
+            health = self._health
+            if health is None or health[3] != key_hash:
+                cached = self.cache.get('health', cache_params)
+                health = tuple(cached) + (key_hash,) if cached and cached[0] else None
+            ttl = interval if health is not None and health[0] else min(interval, HEALTH_FAILURE_TTL)
+            if health is not None and time.time() - health[2] < ttl:
+                self._health = health
+                return health[:3]
+        
+        ok, message = self.test_connection()
+        checked_at = time.time()
+        self._health = (ok, message, checked_at, key_hash)
+        if ok and self.api_key:
+            self.cache.set('health', cache_params, [ok, message, checked_at])
+        return ok, message, checked_at
 
 # 全局API实例
 amap_api = AmapAPI()
\ No newline at end of file
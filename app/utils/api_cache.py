@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+API结果缓存模块
+基于SQLite的磁盘缓存，以规范化后的请求（接口+参数）作为键，
+按配置中的 cache_settings 控制是否启用、过期时间和缓存大小上限。
+逆地理编码结果另按坐标的geohash网格索引，容差半径内的邻近坐标可直接复用
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import math
+import threading
+from typing import Any, Dict, Optional
+from config import config
+from .coordinate_converter import calculate_distance
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'cache', 'api_cache.sqlite3')
+
+# 不参与缓存键计算的参数（API密钥不影响结果）
+IGNORED_PARAMS = ('key',)
+
+# 超出大小上限时，淘汰到上限的该比例以下，避免每次写入都触发淘汰
+EVICT_TARGET_RATIO = 0.9
+
+GEOHASH_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# 坐标缓存中保存的geohash长度（约3.7厘米），查询时按配置的精度取前缀
+GEOHASH_STORE_PRECISION = 12
+
+def geohash_encode(lng: float, lat: float, precision: int = 8) -> str:
+    """计算坐标的geohash编码
+    
+    Args:
+        lng (float): 经度
+        lat (float): 纬度
+        precision (int): 编码长度，8位约为38米×19米的网格
+        
+    Returns:
+        str: geohash字符串
+    """
+    lng_range = [-180.0, 180.0]
+    lat_range = [-90.0, 90.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # geohash从经度开始交替编码
+    while len(chars) < precision:
+        value, value_range = (lng, lng_range) if even else (lat, lat_range)
+        mid = (value_range[0] + value_range[1]) / 2
+        if value >= mid:
+            bits = bits * 2 + 1
+            value_range[0] = mid
+        else:
+            bits = bits * 2
+            value_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+def geohash_cell_size(precision: int):
+    """geohash网格的大小
+    
+    Returns:
+        tuple: (经度跨度, 纬度跨度)，单位为度
+    """
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 360.0 / (1 << lng_bits), 180.0 / (1 << lat_bits)
+
+class ApiCache:
+    """API结果的磁盘缓存（线程安全）"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Args:
+            db_path (str): SQLite数据库文件路径，默认为项目根目录下的 cache/api_cache.sqlite3
+        """
+        self.db_path = os.path.abspath(db_path or DEFAULT_CACHE_FILE)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._total_size = 0
+
+    @property
+    def enabled(self) -> bool:
+        """是否启用缓存"""
+        return bool(config.get('cache_settings.enable_cache', True))
+
+    @property
+    def ttl_seconds(self) -> float:
+        """缓存有效期（秒）"""
+        return float(config.get('cache_settings.cache_duration_hours', 24)) * 3600
+
+    @property
+    def max_size_bytes(self) -> int:
+        """缓存大小上限（字节）"""
+        return int(float(config.get('cache_settings.max_cache_size_mb', 50)) * 1024 * 1024)
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开数据库（首次使用时创建），调用方需持有锁"""
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('''CREATE TABLE IF NOT EXISTS cache (
+                                key TEXT PRIMARY KEY,
+                                endpoint TEXT NOT NULL,
+                                value TEXT NOT NULL,
+                                created REAL NOT NULL,
+                                accessed REAL NOT NULL,
+                                size INTEGER NOT NULL)''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed)')
+            # 坐标缓存列：geohash网格和原始坐标（旧版本数据库没有这些列时补上）
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(cache)')}
+            for column, column_type in (('cell', 'TEXT'), ('lng', 'REAL'), ('lat', 'REAL')):
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE cache ADD COLUMN {column} {column_type}')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_cell ON cache(endpoint, cell)')
+            conn.execute('DELETE FROM cache WHERE created < ?', (time.time() - self.ttl_seconds,))
+            conn.commit()
+            self._conn = conn
+            self._total_size = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+        return self._conn
+
+    @staticmethod
+    def make_key(endpoint: str, params: Dict[str, Any]) -> str:
+        """根据接口和参数生成缓存键
+
+        参数按名称排序，值统一转为去除首尾空白的字符串，空参数忽略，
+        因此参数顺序、数值类型不同的等价请求得到相同的键。
+        """
+        normalized = {k: str(v).strip() for k, v in params.items()
+                      if k not in IGNORED_PARAMS and v is not None and str(v).strip() != ''}
+        raw = json.dumps([endpoint.strip('/'), sorted(normalized.items())], ensure_ascii=False)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, endpoint: str, params: Dict[str, Any]) -> Optional[Any]:
+        """
+        查询缓存
+
+        Args:
+            endpoint (str): 接口路径，如 'geocode/regeo'
+            params (dict): 请求参数
+
+        Returns:
+            缓存的结果，未命中、已过期或未启用缓存时返回None
+        """
+        if not self.enabled:
+            return None
+        key = self.make_key(endpoint, params)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute('SELECT value, created, size FROM cache WHERE key = ?', (key,)).fetchone()
+                if row is None:
+                    return None
+                value, created, size = row
+                if now - created > self.ttl_seconds:
+                    conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+                    conn.commit()
+                    self._total_size -= size
+                    return None
+                conn.execute('UPDATE cache SET accessed = ? WHERE key = ?', (now, key))
+                conn.commit()
+            return json.loads(value)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"读取API缓存失败: {e}")
+            return None
+
+    @property
+    def regeocode_precision(self) -> int:
+        """逆地理编码坐标缓存的geohash网格精度"""
+        return int(config.get('cache_settings.regeocode_geohash_precision', 8))
+
+    @property
+    def regeocode_tolerance_meters(self) -> float:
+        """逆地理编码坐标缓存的容差半径（米），为0时只复用完全相同坐标的结果"""
+        return float(config.get('cache_settings.regeocode_tolerance_meters', 15))
+
+    def get_nearby(self, endpoint: str, lng: float, lat: float,
+                   tolerance_meters: Optional[float] = None) -> Optional[Any]:
+        """
+        查询坐标附近的缓存结果
+
+        在查询点所在及相邻的geohash网格中查找容差半径内最近的已缓存坐标。
+
+        Args:
+            endpoint (str): 缓存命名空间，如 'geocode/regeo#base'
+            lng (float): 经度
+            lat (float): 纬度
+            tolerance_meters (float): 容差半径（米），默认读取配置
+
+        Returns:
+            最近坐标的缓存结果，容差范围内没有缓存时返回None
+        """
+        if not self.enabled:
+            return None
+        tolerance = self.regeocode_tolerance_meters if tolerance_meters is None else tolerance_meters
+        if tolerance <= 0:
+            return self.get(endpoint, {'location': f"{lng},{lat}"})
+
+        # 容差半径可能跨越多个网格，按网格大小计算需要检查的范围
+        precision = self.regeocode_precision
+        cell_lng, cell_lat = geohash_cell_size(precision)
+        tolerance_lat = tolerance / 111320.0
+        tolerance_lng = tolerance_lat / max(math.cos(math.radians(lat)), 1e-6)
+        steps_lng = math.ceil(tolerance_lng / cell_lng)
+        steps_lat = math.ceil(tolerance_lat / cell_lat)
+        prefixes = {geohash_encode(lng + i * cell_lng, lat + j * cell_lat, precision)
+                    for i in range(-steps_lng, steps_lng + 1) for j in range(-steps_lat, steps_lat + 1)}
+
+        now = time.time()
+        best = None
+        try:
+            with self._lock:
+                conn = self._connect()
+                for prefix in prefixes:
+                    # geohash前缀匹配转换为范围查询，可使用索引
+                    rows = conn.execute('SELECT key, value, lng, lat FROM cache '
+                                        'WHERE endpoint = ? AND cell >= ? AND cell < ? AND created >= ?',
+                                        (endpoint, prefix, prefix + '~', now - self.ttl_seconds))
+                    for key, value, cached_lng, cached_lat in rows:
+                        distance = calculate_distance(lng, lat, cached_lng, cached_lat)
+                        if distance <= tolerance and (best is None or distance < best[0]):
+                            best = (distance, key, value)
+                if best is None:
+                    return None
+                conn.execute('UPDATE cache SET accessed = ? WHERE key = ?', (now, best[1]))
+                conn.commit()
+            return json.loads(best[2])
+        except (sqlite3.Error, ValueError) as e:
+            print(f"读取API缓存失败: {e}")
+            return None
+
+    def set_point(self, endpoint: str, lng: float, lat: float, value: Any) -> bool:
+        """
+        按坐标写入缓存，供 get_nearby 查询
+
+        Args:
+            endpoint (str): 缓存命名空间
+            lng (float): 经度
+            lat (float): 纬度
+            value: 可JSON序列化的结果
+
+        Returns:
+            bool: 是否写入成功
+        """
+        return self.set(endpoint, {'location': f"{lng},{lat}"}, value,
+                        point=(geohash_encode(lng, lat, GEOHASH_STORE_PRECISION), lng, lat))
+
+    def set(self, endpoint: str, params: Dict[str, Any], value: Any, point=None) -> bool:
+        """
+        写入缓存
+
+        Args:
+            endpoint (str): 接口路径
+            params (dict): 请求参数
+            value: 可JSON序列化的结果
+            point (tuple): (geohash, 经度, 纬度)，按坐标缓存时使用
+
+        Returns:
+            bool: 是否写入成功
+        """
+        if not self.enabled:
+            return False
+        cell, lng, lat = point or (None, None, None)
+        key = self.make_key(endpoint, params)
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode('utf-8'))
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                old = conn.execute('SELECT size FROM cache WHERE key = ?', (key,)).fetchone()
+                conn.execute('INSERT OR REPLACE INTO cache (key, endpoint, value, created, accessed, size, cell, lng, lat) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', (key, endpoint, data, now, now, size, cell, lng, lat))
+                self._total_size += size - (old[0] if old else 0)
+                if self._total_size > self.max_size_bytes:
+                    self._evict(conn)
+                conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"写入API缓存失败: {e}")
+            return False
+
+    def _evict(self, conn: sqlite3.Connection):
+        """删除过期条目，仍超出大小上限时按最久未访问的顺序淘汰，调用方需持有锁"""
+        conn.execute('DELETE FROM cache WHERE created < ?', (time.time() - self.ttl_seconds,))
+        self._total_size = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+        target = self.max_size_bytes * EVICT_TARGET_RATIO
+        if self._total_size <= target:
+            return
+
+        excess = self._total_size - target
+        freed = 0
+        keys = []
+        for key, size in conn.execute('SELECT key, size FROM cache ORDER BY accessed'):
+            keys.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany('DELETE FROM cache WHERE key = ?', keys)
+        self._total_size -= freed
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计信息：条目数和占用大小（MB）"""
+        with self._lock:
+            conn = self._connect()
+            count = conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+            return {'entries': count, 'size_mb': round(self._total_size / 1024 / 1024, 2)}
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute('DELETE FROM cache')
+            conn.commit()
+            conn.execute('VACUUM')
+            self._total_size = 0
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+_api_cache = None
+_api_cache_lock = threading.Lock()
+
+def get_api_cache() -> ApiCache:
+    """获取全局共享的API缓存"""
+    global _api_cache
+    with _api_cache_lock:
+        if _api_cache is None:
+            _api_cache = ApiCache()
+        return _api_cache
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+异步高德地图API模块
+在一个常驻的事件循环线程上提供与 AmapAPI 相同的接口（协程版本），
+多个相互独立的请求可以并发执行，总耗时取决于最慢的一次请求。
+
+这是把阻塞调用转移到线程池的适配器，而不是异步HTTP客户端：项目没有依赖aiohttp，
+每个协程都在事件循环专用的线程池中执行同步的 AmapAPI 方法（仍使用共享连接池会话），
+因此同时进行的请求数不超过线程池大小 ASYNC_WORKERS，多出的调用在线程池中排队
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from .amap_api import amap_api, AmapAPI
+from .http_session import POOL_MAXSIZE
+
+# 执行阻塞请求的线程数，与每个主机的连接池大小一致，线程再多也只会等待连接
+ASYNC_WORKERS = POOL_MAXSIZE
+
+class EventLoopThread:
+    """在后台守护线程中运行的asyncio事件循环"""
+
+    def __init__(self, max_workers: int = ASYNC_WORKERS):
+        """
+        Args:
+            max_workers (int): 执行阻塞请求的线程数，即同时进行的请求数上限
+        """
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='amap-async')
+        self.loop.set_default_executor(self.executor)
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='amap-event-loop', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._ready.set)
+        self.loop.run_forever()
+
+    def submit(self, coro: Awaitable) -> Future:
+        """
+        在事件循环中运行协程（可从任意线程调用）
+
+        Returns:
+            concurrent.futures.Future: 协程的结果
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run_in_tk(self, widget, coro: Awaitable, callback: Optional[Callable[[Any], None]] = None,
+                  errback: Optional[Callable[[Exception], None]] = None) -> Future:
+        """
+        在事件循环中运行协程，完成后通过 widget.after 在Tk主线程中回调
+
+        Args:
+            widget: 任意Tk控件，用于调度主线程回调
+            coro: 要运行的协程
+            callback (callable): 成功时的回调，参数为协程的返回值
+            errback (callable): 失败时的回调，参数为异常
+        """
+        future = self.submit(coro)
+
+        def on_done(done_future):
+            error = done_future.exception()
+            if error is not None:
+                if errback:
+                    widget.after(0, errback, error)
+            elif callback:
+                widget.after(0, callback, done_future.result())
+
+        future.add_done_callback(on_done)
+        return future
+
+_loop_thread = None
+_loop_thread_lock = threading.Lock()
+
+def get_event_loop_thread() -> EventLoopThread:
+    """获取全局共享的事件循环线程（首次调用时启动）"""
+    global _loop_thread
+    with _loop_thread_lock:
+        if _loop_thread is None:
+            _loop_thread = EventLoopThread()
+        return _loop_thread
+
+class AsyncAmapAPI:
+    """
+    高德地图API的协程接口，与 AmapAPI 一致
+
+    各方法在当前事件循环的默认线程池中执行对应的同步方法，并发数受线程池大小限制
+    （在 get_event_loop_thread() 的事件循环中为 ASYNC_WORKERS）。
+    """
+
+    def __init__(self, api: AmapAPI = amap_api):
+        """
+        Args:
+            api (AmapAPI): 实际发出请求的同步API实例，共享其Key、缓存、重试策略和请求闸门
+        """
+        self.api = api
+
+    async def _call(self, func: Callable, *args, **kwargs):
+        """在事件循环的默认线程池中执行同步API调用"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    async def regeocode(self, lng: float, lat: float) -> Dict[str, Any]:
+        """逆地理编码 - 坐标转地址"""
+        return await self._call(self.api.regeocode, lng, lat)
+
+    async def regeocode_batch(self, locations: List[Tuple[float, float]], extensions: str = 'base') -> List[Dict[str, Any]]:
+        """批量逆地理编码"""
+        return await self._call(self.api.regeocode_batch, locations, extensions)
+
+    async def geocode(self, address: str, city: str = '') -> Dict[str, Any]:
+        """地理编码 - 地址转坐标"""
+        return await self._call(self.api.geocode, address, city)
+
+    async def geocode_batch(self, addresses: List[str], city: str = '') -> List[Dict[str, Any]]:
+        """批量地理编码"""
+        return await self._call(self.api.geocode_batch, addresses, city)
+
+    async def direction_driving(self, origin: str, destination: str, waypoints: str = '') -> Dict[str, Any]:
+        """驾车路径规划"""
+        return await self._call(self.api.direction_driving, origin, destination, waypoints)
+
+    async def direction_walking(self, origin: str, destination: str) -> Dict[str, Any]:
+        """步行路径规划"""
+        return await self._call(self.api.direction_walking, origin, destination)
+
+    async def direction_transit(self, origin: str, destination: str, city: str, cityd: str = '') -> Dict[str, Any]:
+        """公交路径规划"""
+        return await self._call(self.api.direction_transit, origin, destination, city, cityd)
+
+    async def distance(self, origins: str, destination: str, distance_type: int = 1) -> Dict[str, Any]:
+        """距离测量"""
+        return await self._call(self.api.distance, origins, destination, distance_type)
+
+    async def weather(self, city: str) -> Dict[str, Any]:
+        """天气查询"""
+        return await self._call(self.api.weather, city)
+
+    async def test_connection(self) -> Tuple[bool, str]:
+        """测试API连接"""
+        return await self._call(self.api.test_connection)
+
+    async def check_health(self, force: bool = False) -> Tuple[bool, str, float]:
+        """检查API是否可用，结果在配置的时间间隔内复用"""
+        return await self._call(self.api.check_health, force)
+
+# 全局异步API实例
+async_amap_api = AsyncAmapAPI()
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+批量地理编码模块
+使用线程池并发调用高德API，并通过令牌桶限制QPS和每日调用量，
+结果按输入顺序返回
+"""
+
+import json
+import time
+import datetime
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from config import config
+from .batch_journal import BatchJournal
+
+class QuotaExceededError(Exception):
+    """超出每日调用配额"""
+
+class BatchCancelledError(Exception):
+    """批量任务已停止，请求未发出"""
+
+class RateLimiter:
+    """令牌桶限流器（线程安全）
+    
+    令牌以 qps 的速率补充，桶容量为 burst；每日调用量超过 daily_quota 时抛出 QuotaExceededError。
+    每日调用量仅在本进程内统计，按本地日期重置。
+    """
+    
+    def __init__(self, qps: float, burst: Optional[int] = None, daily_quota: int = 0):
+        """
+        Args:
+            qps (float): 每秒允许的请求数
+            burst (int): 令牌桶容量，即允许的瞬时突发请求数，默认等于qps
+            daily_quota (int): 每日调用上限，0表示不限制
+        """
+        if qps <= 0:
+            raise ValueError("QPS必须大于0")
+        self.qps = qps
+        self.capacity = burst or max(1, int(qps))
+        self.daily_quota = daily_quota
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._day = datetime.date.today()
+        self._used_today = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def used_today(self) -> int:
+        """今日已使用的调用次数"""
+        return self._used_today
+    
+    def acquire(self, tokens: int = 1):
+        """获取令牌，令牌不足时阻塞等待
+        
+        Args:
+            tokens (int): 需要的令牌数（一次请求计为1）
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.qps)
+                self._updated = now
+                
+                today = datetime.date.today()
+                if today != self._day:
+                    self._day = today
+                    self._used_today = 0
+                if self.daily_quota and self._used_today + tokens > self.daily_quota:
+                    raise QuotaExceededError(f"已达到每日调用配额（{self.daily_quota}次）")
+                
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self._used_today += tokens
+                    return
+                wait = (tokens - self._tokens) / self.qps
+            time.sleep(wait)
+
+_amap_limiter = None
+_amap_limiter_lock = threading.Lock()
+
+def get_amap_rate_limiter() -> RateLimiter:
+    """获取高德API全局共享的限流器，各批量任务共用同一个Key的限额"""
+    global _amap_limiter
+    with _amap_limiter_lock:
+        if _amap_limiter is None:
+            _amap_limiter = RateLimiter(config.get('api_settings.amap_qps', 20),
+                                        daily_quota=config.get('api_settings.amap_daily_quota', 0))
+        return _amap_limiter
+
+# 所有批量任务共用的停止标志，程序退出时设置，尚未发出的请求不再发出
+_stop_all = threading.Event()
+
+def cancel_all_batches():
+    """停止所有进行中的批量任务，如关闭主窗口后，避免退出时继续发出付费请求"""
+    _stop_all.set()
+
+def _default_error_result(error: Exception) -> Dict[str, Any]:
+    return {'status': 'error', 'message': str(error)}
+
+def _dedupe_key(item: Any) -> Any:
+    """输入项去重用的键，不可哈希的输入项（如列表、字典）按其JSON表示比较"""
+    try:
+        hash(item)
+        return item
+    except TypeError:
+        return json.dumps(item, ensure_ascii=False, sort_keys=True, default=str)
+
+class BatchGeocoder:
+    """并发批量地理编码器"""
+    
+    def __init__(self, workers: Optional[int] = None, limiter: Optional[RateLimiter] = None):
+        """
+        Args:
+            workers (int): 并发线程数，默认读取配置 api_settings.batch_workers
+            limiter (RateLimiter): 限流器，默认使用高德API全局限流器
+        """
+        self.workers = workers or config.get('api_settings.batch_workers', 8)
+        self.limiter = limiter or get_amap_rate_limiter()
+        self._stop = threading.Event()
+    
+    def stop(self):
+        """停止当前任务：已发出的请求照常完成，其余输入项不再请求"""
+        self._stop.set()
+    
+    @property
+    def stopped(self) -> bool:
+        """任务是否已被停止"""
+        return self._stop.is_set() or _stop_all.is_set()
+    
+    def run(self, items: Iterable[Any], func: Callable[[Any], Any],
+            progress_callback: Optional[Callable[[int, int], None]] = None,
+            on_error: Callable[[Exception], Any] = _default_error_result,
+            on_result: Optional[Callable[[int, Any], None]] = None) -> List[Any]:
+        """并发处理所有输入项
+        
+        同时排队的输入项不超过并发线程数的2倍，任务被停止或回调抛出异常时，
+        排队中的输入项立即取消，不会在后台继续发出请求。
+        
+        Args:
+            items (iterable): 输入项，如地址或坐标
+            func (callable): 处理单个输入项的函数，每次调用前获取一个令牌
+            progress_callback (callable): 进度回调，参数为(已完成数, 总数)，在调用 run 的线程中执行
+            on_error (callable): func 抛出异常（含超出配额、任务已停止）时，用于生成该项结果的函数
+            on_result (callable): 每项完成（含任务停止后未处理）时的回调，参数为(输入项位置, 结果)，
+                在调用 run 的线程中执行
+            
+        Returns:
+            list: 与输入顺序一致的结果列表；任务被停止时，未处理的输入项为 on_error 生成的结果
+        """
+        items = list(items)
+        total = len(items)
+        results = [None] * total
+        if total == 0:
+            return results
+        
+        def task(item):
+            if self.stopped:
+                raise BatchCancelledError("批量任务已停止")
+            self.limiter.acquire()
+            if self.stopped:
+                # 等待令牌期间任务被停止
+                raise BatchCancelledError("批量任务已停止")
+            return func(item)
+        
+        workers = min(self.workers, total)
+        pending = {}
+        next_index = 0
+        done = 0
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            while pending or (next_index < total and not self.stopped):
+                # 按窗口提交，队列中只保留少量待处理的输入项
+                while next_index < total and len(pending) < 2 * workers and not self.stopped:
+                    pending[executor.submit(task, items[next_index])] = next_index
+                    next_index += 1
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = pending.pop(future)
+                    try:
+                        results[i] = future.result()
+                    except Exception as e:
+                        results[i] = on_error(e)
+                    done += 1
+                    if on_result:
+                        on_result(i, results[i])
+                    if progress_callback:
+                        progress_callback(done, total)
+            for i in range(next_index, total):
+                results[i] = on_error(BatchCancelledError("批量任务已停止"))
+                if on_result:
+                    on_result(i, results[i])
+        except BaseException:
+            self._stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            executor.shutdown(wait=True)
+        return results
+    
+    def run_batched(self, items: Iterable[Any], batch_func: Callable[[List[Any]], List[Any]],
+                    batch_size: int = 10, group_key: Optional[Callable[[Any], Any]] = None,
+                    progress_callback: Optional[Callable[[int, int], None]] = None,
+                    on_error: Callable[[Exception], Any] = _default_error_result,
+                    journal: Optional[BatchJournal] = None,
+                    on_result: Optional[Callable[[int, Any], None]] = None) -> List[Any]:
+        """将输入项按批打包后并发处理，适用于一次请求可包含多条数据的批量接口
+        
+        相同的输入项只处理一次，结果分发给所有重复的位置。
+        
+        Args:
+            items (iterable): 输入项
+            batch_func (callable): 处理一批输入项的函数，返回与该批顺序一致的结果列表；每批获取一个令牌
+            batch_size (int): 每批的最大条数
+            group_key (callable): 分组函数，只有分组键相同的输入项才会打包到同一批（如地理编码的城市参数）
+            progress_callback (callable): 进度回调，参数为(已完成条数, 总条数)，在调用 run_batched 的线程中执行
+            on_error (callable): 某批处理失败时，用于生成该批每一项结果的函数
+            journal (BatchJournal): 断点续传日志，日志中已有结果的输入项不再处理，
+                每批完成后立即把结果写入日志
+            on_result (callable): 每项得到结果时的回调，参数为(输入项位置, 结果)，在调用 run_batched 的线程中执行；
+                从日志恢复的结果在开始请求前回调
+            
+        Returns:
+            list: 与输入顺序一致的结果列表
+        """
+        items = list(items)
+        total = len(items)
+        results = [None] * total
+        
+        restored = journal.restore(items) if journal else {}
+        for i, result in restored.items():
+            results[i] = result
+            if on_result:
+                on_result(i, result)
+        
+        # 先对输入去重：每个不同的输入项记录其所有位置
+        duplicates = {}
+        for i, item in enumerate(items):
+            if i in restored:
+                continue
+            duplicates.setdefault(_dedupe_key(item), []).append(i)
+        
+        groups = {}
+        for rows in duplicates.values():
+            groups.setdefault(group_key(items[rows[0]]) if group_key else None, []).append(rows)
+        batches = [row_lists[start:start + batch_size]
+                   for row_lists in groups.values() for start in range(0, len(row_lists), batch_size)]
+        
+        done_items = len(restored)
+        if progress_callback and restored:
+            progress_callback(done_items, total)
+        
+        def run_batch(b):
+            batch_result = batch_func([items[rows[0]] for rows in batches[b]])
+            if journal:
+                # 在工作线程中立即写入日志，即使调用方已停止处理结果，已付费的结果也不会丢失
+                for j, rows in enumerate(batches[b]):
+                    for i in rows:
+                        journal.record(i, items[i], batch_result[j])
+            return batch_result
+        
+        def batch_done(b, batch_result):
+            nonlocal done_items
+            for j, rows in enumerate(batches[b]):
+                result = on_error(batch_result) if isinstance(batch_result, Exception) else batch_result[j]
+                for i in rows:
+                    results[i] = result
+                    if on_result:
+                        on_result(i, result)
+                done_items += len(rows)
+            if progress_callback:
+                progress_callback(done_items, total)
+        
+        try:
+            self.run(range(len(batches)), run_batch, on_error=lambda e: e, on_result=batch_done)
+        finally:
+            if journal:
+                journal.close()
+        return results
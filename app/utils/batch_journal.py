@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+批量任务断点续传模块
+批量地理编码时，每完成一批就把结果追加写入源文件旁的日志文件（每行一个JSON）。
+任务中途出错或程序被关闭后重新运行同一文件，已完成的行直接从日志读取，
+只对剩余的行调用API，不会为同一批查询重复付费。任务完成并保存结果后删除日志。
+"""
+
+import os
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# 日志格式版本，格式变化时递增以忽略旧日志
+JOURNAL_VERSION = 1
+
+def journal_path(source_path: str, job: str) -> str:
+    """
+    源文件对应的日志文件路径
+
+    Args:
+        source_path (str): 批量任务的输入文件
+        job (str): 任务类型，同一文件的不同任务使用不同的日志
+
+    Returns:
+        str: 日志文件路径，如 地址.xlsx.geocode.journal
+    """
+    return f"{source_path}.{job}.journal"
+
+def _item_key(item: Any) -> str:
+    """输入项的标识，恢复时用于确认日志中的行与当前输入一致"""
+    return json.dumps(item, ensure_ascii=False, sort_keys=True, default=str)
+
+def _is_success(result: Any) -> bool:
+    return isinstance(result, dict) and result.get('status') == 'success'
+
+class BatchJournal:
+    """
+    批量任务日志（线程安全）
+
+    按输入项在列表中的位置记录结果，并同时记录输入项本身，
+    源文件被修改导致行内容变化时，对应的旧记录不会被采用。
+    """
+
+    def __init__(self, path: str, should_record: Callable[[Any], bool] = _is_success):
+        """
+        Args:
+            path (str): 日志文件路径，通常由 journal_path() 生成
+            should_record (callable): 判断结果是否写入日志，默认只记录成功的结果，
+                失败的行（如网络异常、配额用尽）在恢复时重新查询
+        """
+        self.path = path
+        self.should_record = should_record
+        self._entries = {}
+        self._file = None
+        self._lock = threading.Lock()
+        self._load()
+
+    @classmethod
+    def for_source(cls, source_path: str, job: str, **kwargs) -> 'BatchJournal':
+        """为输入文件创建（或恢复）指定任务的日志"""
+        return cls(journal_path(source_path, job), **kwargs)
+
+    def _load(self):
+        """读取已有日志，忽略版本不符和末尾未写完整的行"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                header = f.readline()
+                if not header or json.loads(header).get('version') != JOURNAL_VERSION:
+                    return
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self._entries[entry['i']] = (entry['key'], entry['result'])
+                    except (ValueError, KeyError):
+                        # 程序中断时最后一行可能只写了一半
+                        continue
+        except (OSError, ValueError) as e:
+            print(f"读取批量任务日志失败，将重新开始: {e}")
+            self._entries = {}
+
+    def restore(self, items: List[Any]) -> Dict[int, Any]:
+        """
+        取出与当前输入一致的已完成结果
+
+        Args:
+            items (list): 当前任务的全部输入项
+
+        Returns:
+            dict: {输入项位置: 结果}
+        """
+        restored = {}
+        for i, (key, result) in self._entries.items():
+            if 0 <= i < len(items) and key == _item_key(items[i]):
+                restored[i] = result
+        return restored
+
+    @property
+    def completed(self) -> int:
+        """日志中已记录的条数"""
+        return len(self._entries)
+
+    def _open(self):
+        if self._file is not None:
+            return
+        exists = os.path.exists(self.path) and self._entries
+        # 旧日志无法使用时重写，否则在末尾追加
+        self._file = open(self.path, 'a' if exists else 'w', encoding='utf-8')
+        if not exists:
+            self._file.write(json.dumps({'version': JOURNAL_VERSION}) + '\n')
+        elif not self._ends_with_newline():
+            # 上次中断时最后一行只写了一半，先换行，避免与新记录连成一行
+            self._file.write('\n')
+
+    def _ends_with_newline(self) -> bool:
+        """已有日志文件是否以换行结尾"""
+        with open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def record(self, index: int, item: Any, result: Any):
+        """
+        记录一个输入项的结果（should_record 返回False的结果不记录）
+
+        Args:
+            index (int): 输入项在输入列表中的位置
+            item: 输入项
+            result: 处理结果，需可序列化为JSON
+        """
+        if not self.should_record(result):
+            return
+        key = _item_key(item)
+        line = json.dumps({'i': index, 'key': key, 'result': result}, ensure_ascii=False, default=str)
+        with self._lock:
+            try:
+                self._open()
+                self._file.write(line + '\n')
+                self._file.flush()
+                self._entries[index] = (key, result)
+            except OSError as e:
+                print(f"写入批量任务日志失败: {e}")
+
+    def close(self):
+        """关闭日志文件，保留日志以便之后恢复"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def finish(self):
+        """任务完成并已保存结果后调用，删除日志"""
+        self.close()
+        self._entries = {}
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"删除批量任务日志失败: {e}")
@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 """
 坐标转换工具模块
-支持WGS-84和GCJ-02坐标系之间的转换
+支持WGS-84、GCJ-02和BD-09坐标系之间的相互转换，
+提供单点（标量）和批量（NumPy数组/pandas Series）两套接口
 """
 
 import math
+import numpy as np
 
 # 坐标转换相关常数
 x_pi = 3.14159265358979324 * 3000.0 / 180.0
@@ -12,6 +14,10 @@ pi = 3.1415926535897932384626  # π
 a = 6378245.0  # 长半轴
 ee = 0.00669342162296594323  # 扁率
 
+# GCJ02逆转换迭代参数：收敛容差（度，1e-10度约为0.01毫米）和最大迭代次数
+GCJ02_INVERSE_TOLERANCE = 1e-10
+GCJ02_INVERSE_MAX_ITERATIONS = 10
+
 def _transform_lat(lng, lat):
     """纬度转换辅助函数"""
     ret = -100.0 + 2.0 * lng + 3.0 * lat + 0.2 * lat * lat + \
@@ -36,6 +42,18 @@ def _transform_lng(lng, lat):
             math.sin(lng / 30.0 * pi)) * 2.0 / 3.0
     return ret
 
+def _gcj02_offset(lng, lat):
+    """计算WGS84到GCJ02的偏移量（不做范围判断）"""
+    dlat = _transform_lat(lng - 105.0, lat - 35.0)
+    dlng = _transform_lng(lng - 105.0, lat - 35.0)
+    radlat = lat / 180.0 * pi
+    magic = math.sin(radlat)
+    magic = 1 - ee * magic * magic
+    sqrtmagic = math.sqrt(magic)
+    dlat = (dlat * 180.0) / ((a * (1 - ee)) / (magic * sqrtmagic) * pi)
+    dlng = (dlng * 180.0) / (a / sqrtmagic * math.cos(radlat) * pi)
+    return dlng, dlat
+
 def wgs84_to_gcj02(lng_wgs, lat_wgs):
     """WGS84坐标系转GCJ02坐标系（高德、谷歌中国等）
     
@@ -50,24 +68,23 @@ def wgs84_to_gcj02(lng_wgs, lat_wgs):
         # 坐标超出中国范围，不进行转换
         return lng_wgs, lat_wgs
         
-    dlat = _transform_lat(lng_wgs - 105.0, lat_wgs - 35.0)
-    dlng = _transform_lng(lng_wgs - 105.0, lat_wgs - 35.0)
-    radlat = lat_wgs / 180.0 * pi
-    magic = math.sin(radlat)
-    magic = 1 - ee * magic * magic
-    sqrtmagic = math.sqrt(magic)
-    dlat = (dlat * 180.0) / ((a * (1 - ee)) / (magic * sqrtmagic) * pi)
-    dlng = (dlng * 180.0) / (a / sqrtmagic * math.cos(radlat) * pi)
+    dlng, dlat = _gcj02_offset(lng_wgs, lat_wgs)
     mglat = lat_wgs + dlat
     mglng = lng_wgs + dlng
     return mglng, mglat
 
-def gcj02_to_wgs84(lng_gcj, lat_gcj):
+def gcj02_to_wgs84(lng_gcj, lat_gcj, tolerance=GCJ02_INVERSE_TOLERANCE,
+                   max_iterations=GCJ02_INVERSE_MAX_ITERATIONS):
     """GCJ02坐标系转WGS84坐标系
     
+    以 2*gcj - f(gcj) 作为初值，反复用正向转换的残差修正，
+    直到残差小于容差或达到最大迭代次数。
+    
     Args:
         lng_gcj (float): GCJ02经度
         lat_gcj (float): GCJ02纬度
+        tolerance (float): 收敛容差（度）
+        max_iterations (int): 最大迭代次数（正向转换的调用次数），为1时即单步近似
         
     Returns:
         tuple: (WGS84经度, WGS84纬度)
@@ -76,12 +93,151 @@ def gcj02_to_wgs84(lng_gcj, lat_gcj):
         # 坐标超出中国范围，不进行转换
         return lng_gcj, lat_gcj
         
-    # 使用迭代方法进行更精确的转换
-    mglng, mglat = wgs84_to_gcj02(lng_gcj, lat_gcj)
-    lng_wgs = lng_gcj * 2 - mglng
-    lat_wgs = lat_gcj * 2 - mglat
+    dlng, dlat = _gcj02_offset(lng_gcj, lat_gcj)
+    lng_wgs = lng_gcj - dlng
+    lat_wgs = lat_gcj - dlat
+    for _ in range(max_iterations - 1):
+        dlng, dlat = _gcj02_offset(lng_wgs, lat_wgs)
+        err_lng = lng_wgs + dlng - lng_gcj
+        err_lat = lat_wgs + dlat - lat_gcj
+        lng_wgs -= err_lng
+        lat_wgs -= err_lat
+        if abs(err_lng) < tolerance and abs(err_lat) < tolerance:
+            break
     return lng_wgs, lat_wgs
 
+def _transform_lat_array(lng, lat):
+    """纬度转换辅助函数（数组版本）"""
+    ret = -100.0 + 2.0 * lng + 3.0 * lat + 0.2 * lat * lat + \
+          0.1 * lng * lat + 0.2 * np.sqrt(np.abs(lng))
+    ret += (20.0 * np.sin(6.0 * lng * pi) + 20.0 *
+            np.sin(2.0 * lng * pi)) * 2.0 / 3.0
+    ret += (20.0 * np.sin(lat * pi) + 40.0 *
+            np.sin(lat / 3.0 * pi)) * 2.0 / 3.0
+    ret += (160.0 * np.sin(lat / 12.0 * pi) + 320 *
+            np.sin(lat * pi / 30.0)) * 2.0 / 3.0
+    return ret
+
+def _transform_lng_array(lng, lat):
+    """经度转换辅助函数（数组版本）"""
+    ret = 300.0 + lng + 2.0 * lat + 0.1 * lng * lng + \
+          0.1 * lng * lat + 0.1 * np.sqrt(np.abs(lng))
+    ret += (20.0 * np.sin(6.0 * lng * pi) + 20.0 *
+            np.sin(2.0 * lng * pi)) * 2.0 / 3.0
+    ret += (20.0 * np.sin(lng * pi) + 40.0 *
+            np.sin(lng / 3.0 * pi)) * 2.0 / 3.0
+    ret += (150.0 * np.sin(lng / 12.0 * pi) + 300.0 *
+            np.sin(lng / 30.0 * pi)) * 2.0 / 3.0
+    return ret
+
+def _as_float_array(values):
+    """转换为float64数组，pandas Series同时返回其索引以便还原"""
+    index = getattr(values, 'index', None)
+    if callable(index):
+        # 列表、元组的 index 是方法而不是索引
+        index = None
+    return np.asarray(values, dtype=np.float64), index
+
+def _restore_like(array, index, name):
+    """输入为pandas Series时，将结果还原为带原索引的Series"""
+    if index is None:
+        return array
+    import pandas as pd
+    return pd.Series(array, index=index, name=name)
+
+def in_china_mask(lng, lat):
+    """判断坐标是否在中国境内（数组版本）
+    
+    Args:
+        lng (array-like): 经度数组
+        lat (array-like): 纬度数组
+        
+    Returns:
+        numpy.ndarray: 布尔掩码，NaN坐标视为境外
+    """
+    lng = np.asarray(lng, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    return (lng > 73.66) & (lng < 135.05) & (lat > 3.86) & (lat < 53.55)
+
+def _gcj02_offset_array(lng, lat):
+    """计算WGS84到GCJ02的偏移量（数组版本，不做范围判断）"""
+    dlat = _transform_lat_array(lng - 105.0, lat - 35.0)
+    dlng = _transform_lng_array(lng - 105.0, lat - 35.0)
+    radlat = lat / 180.0 * pi
+    magic = np.sin(radlat)
+    magic = 1 - ee * magic * magic
+    sqrtmagic = np.sqrt(magic)
+    dlat = (dlat * 180.0) / ((a * (1 - ee)) / (magic * sqrtmagic) * pi)
+    dlng = (dlng * 180.0) / (a / sqrtmagic * np.cos(radlat) * pi)
+    return dlng, dlat
+
+def wgs84_to_gcj02_array(lng_wgs, lat_wgs):
+    """WGS84坐标系转GCJ02坐标系（数组版本）
+    
+    对整个数组一次性计算，中国境外及无效（NaN）坐标保持原值。
+    
+    Args:
+        lng_wgs (array-like): WGS84经度，可以是NumPy数组或pandas Series
+        lat_wgs (array-like): WGS84纬度，可以是NumPy数组或pandas Series
+        
+    Returns:
+        tuple: (GCJ02经度, GCJ02纬度)，输入为Series时返回同索引的Series，否则返回NumPy数组
+    """
+    lng, lng_index = _as_float_array(lng_wgs)
+    lat, lat_index = _as_float_array(lat_wgs)
+    mask = in_china_mask(lng, lat)
+
+    mglng = lng.copy()
+    mglat = lat.copy()
+    if mask.any():
+        dlng, dlat = _gcj02_offset_array(lng[mask], lat[mask])
+        mglng[mask] += dlng
+        mglat[mask] += dlat
+    return (_restore_like(mglng, lng_index, getattr(lng_wgs, 'name', None)),
+            _restore_like(mglat, lat_index, getattr(lat_wgs, 'name', None)))
+
+def gcj02_to_wgs84_array(lng_gcj, lat_gcj, tolerance=GCJ02_INVERSE_TOLERANCE,
+                         max_iterations=GCJ02_INVERSE_MAX_ITERATIONS):
+    """GCJ02坐标系转WGS84坐标系（数组版本）
+    
+    对整个数组一次性迭代求解，每次迭代只计算尚未收敛的元素，
+    中国境外及无效（NaN）坐标保持原值。
+    
+    Args:
+        lng_gcj (array-like): GCJ02经度，可以是NumPy数组或pandas Series
+        lat_gcj (array-like): GCJ02纬度，可以是NumPy数组或pandas Series
+        tolerance (float): 收敛容差（度）
+        max_iterations (int): 最大迭代次数（正向转换的调用次数），为1时即单步近似
+        
+    Returns:
+        tuple: (WGS84经度, WGS84纬度)，输入为Series时返回同索引的Series，否则返回NumPy数组
+    """
+    lng, lng_index = _as_float_array(lng_gcj)
+    lat, lat_index = _as_float_array(lat_gcj)
+    mask = in_china_mask(lng, lat)
+
+    lng_wgs = lng.copy()
+    lat_wgs = lat.copy()
+    if mask.any():
+        active = np.flatnonzero(mask)
+        dlng, dlat = _gcj02_offset_array(lng[active], lat[active])
+        lng_wgs[active] -= dlng
+        lat_wgs[active] -= dlat
+        for _ in range(max_iterations - 1):
+            cur_lng = lng_wgs[active]
+            cur_lat = lat_wgs[active]
+            dlng, dlat = _gcj02_offset_array(cur_lng, cur_lat)
+            err_lng = cur_lng + dlng - lng[active]
+            err_lat = cur_lat + dlat - lat[active]
+            lng_wgs[active] = cur_lng - err_lng
+            lat_wgs[active] = cur_lat - err_lat
+            # 已收敛的元素不再参与后续迭代
+            active = active[(np.abs(err_lng) >= tolerance) | (np.abs(err_lat) >= tolerance)]
+            if len(active) == 0:
+                break
+    return (_restore_like(lng_wgs, lng_index, getattr(lng_gcj, 'name', None)),
+            _restore_like(lat_wgs, lat_index, getattr(lat_gcj, 'name', None)))
+
 def is_in_china(lng, lat):
     """判断坐标是否在中国境内
     
@@ -94,43 +250,233 @@ def is_in_china(lng, lat):
     """
     return 73.66 < lng < 135.05 and 3.86 < lat < 53.55
 
+def gcj02_to_bd09(lng_gcj, lat_gcj):
+    """GCJ02坐标系转BD09坐标系（百度地图）
+    
+    Args:
+        lng_gcj (float): GCJ02经度
+        lat_gcj (float): GCJ02纬度
+        
+    Returns:
+        tuple: (BD09经度, BD09纬度)
+    """
+    z = math.sqrt(lng_gcj * lng_gcj + lat_gcj * lat_gcj) + 0.00002 * math.sin(lat_gcj * x_pi)
+    theta = math.atan2(lat_gcj, lng_gcj) + 0.000003 * math.cos(lng_gcj * x_pi)
+    return z * math.cos(theta) + 0.0065, z * math.sin(theta) + 0.006
+
+def bd09_to_gcj02(lng_bd, lat_bd):
+    """BD09坐标系转GCJ02坐标系
+    
+    Args:
+        lng_bd (float): BD09经度
+        lat_bd (float): BD09纬度
+        
+    Returns:
+        tuple: (GCJ02经度, GCJ02纬度)
+    """
+    x = lng_bd - 0.0065
+    y = lat_bd - 0.006
+    z = math.sqrt(x * x + y * y) - 0.00002 * math.sin(y * x_pi)
+    theta = math.atan2(y, x) - 0.000003 * math.cos(x * x_pi)
+    return z * math.cos(theta), z * math.sin(theta)
+
+def gcj02_to_bd09_array(lng_gcj, lat_gcj):
+    """GCJ02坐标系转BD09坐标系（数组版本）
+    
+    Args:
+        lng_gcj (array-like): GCJ02经度，可以是NumPy数组或pandas Series
+        lat_gcj (array-like): GCJ02纬度，可以是NumPy数组或pandas Series
+        
+    Returns:
+        tuple: (BD09经度, BD09纬度)，输入为Series时返回同索引的Series，否则返回NumPy数组
+    """
+    lng, lng_index = _as_float_array(lng_gcj)
+    lat, lat_index = _as_float_array(lat_gcj)
+    z = np.sqrt(lng * lng + lat * lat) + 0.00002 * np.sin(lat * x_pi)
+    theta = np.arctan2(lat, lng) + 0.000003 * np.cos(lng * x_pi)
+    return (_restore_like(z * np.cos(theta) + 0.0065, lng_index, getattr(lng_gcj, 'name', None)),
+            _restore_like(z * np.sin(theta) + 0.006, lat_index, getattr(lat_gcj, 'name', None)))
+
+def bd09_to_gcj02_array(lng_bd, lat_bd):
+    """BD09坐标系转GCJ02坐标系（数组版本）
+    
+    Args:
+        lng_bd (array-like): BD09经度，可以是NumPy数组或pandas Series
+        lat_bd (array-like): BD09纬度，可以是NumPy数组或pandas Series
+        
+    Returns:
+        tuple: (GCJ02经度, GCJ02纬度)，输入为Series时返回同索引的Series，否则返回NumPy数组
+    """
+    lng, lng_index = _as_float_array(lng_bd)
+    lat, lat_index = _as_float_array(lat_bd)
+    x = lng - 0.0065
+    y = lat - 0.006
+    z = np.sqrt(x * x + y * y) - 0.00002 * np.sin(y * x_pi)
+    theta = np.arctan2(y, x) - 0.000003 * np.cos(x * x_pi)
+    return (_restore_like(z * np.cos(theta), lng_index, getattr(lng_bd, 'name', None)),
+            _restore_like(z * np.sin(theta), lat_index, getattr(lat_bd, 'name', None)))
+
+# 支持的坐标系
+COORDINATE_SYSTEMS = ('WGS84', 'GCJ02', 'BD09')
+
+# 坐标系名称的常见写法
+_SYSTEM_ALIASES = {
+    'WGS84': 'WGS84', 'WGS-84': 'WGS84', 'GPS': 'WGS84',
+    'GCJ02': 'GCJ02', 'GCJ-02': 'GCJ02', 'AMAP': 'GCJ02', 'GAODE': 'GCJ02',
+    'BD09': 'BD09', 'BD-09': 'BD09', 'BAIDU': 'BD09',
+}
+
+# 直接转换：(源坐标系, 目标坐标系) -> (标量函数, 数组函数)
+_DIRECT_TRANSFORMS = {
+    ('WGS84', 'GCJ02'): (wgs84_to_gcj02, wgs84_to_gcj02_array),
+    ('GCJ02', 'WGS84'): (gcj02_to_wgs84, gcj02_to_wgs84_array),
+    ('GCJ02', 'BD09'): (gcj02_to_bd09, gcj02_to_bd09_array),
+    ('BD09', 'GCJ02'): (bd09_to_gcj02, bd09_to_gcj02_array),
+}
+
+def normalize_coordinate_system(system):
+    """规范化坐标系名称
+    
+    Args:
+        system (str): 坐标系名称，如 'WGS84'、'gcj-02'、'BD09'
+        
+    Returns:
+        str: COORDINATE_SYSTEMS 中的规范名称
+    """
+    name = _SYSTEM_ALIASES.get(str(system).strip().upper())
+    if name is None:
+        raise ValueError(f"不支持的坐标系: {system}，仅支持 {', '.join(COORDINATE_SYSTEMS)}")
+    return name
+
+def _transform_path(from_system, to_system):
+    """在直接转换构成的图上查找最短转换路径（广度优先搜索）"""
+    paths = {from_system: [from_system]}
+    queue = [from_system]
+    while queue:
+        current = queue.pop(0)
+        for (src, dst) in _DIRECT_TRANSFORMS:
+            if src == current and dst not in paths:
+                paths[dst] = paths[current] + [dst]
+                queue.append(dst)
+    return paths.get(to_system)
+
+def _identity(lng, lat):
+    return lng, lat
+
+def _chain(steps):
+    """将多个转换函数串联为一个函数"""
+    if len(steps) == 1:
+        return steps[0]
+
+    def chained(lng, lat):
+        for step in steps:
+            lng, lat = step(lng, lat)
+        return lng, lat
+    return chained
+
+def _build_transform_table():
+    """预先为每一对坐标系生成转换函数，(源, 目标) -> (标量函数, 数组函数)"""
+    table = {}
+    for from_system in COORDINATE_SYSTEMS:
+        for to_system in COORDINATE_SYSTEMS:
+            if from_system == to_system:
+                table[(from_system, to_system)] = (_identity, _identity)
+                continue
+            path = _transform_path(from_system, to_system)
+            if path is None:
+                continue
+            pairs = list(zip(path[:-1], path[1:]))
+            table[(from_system, to_system)] = (
+                _chain([_DIRECT_TRANSFORMS[pair][0] for pair in pairs]),
+                _chain([_DIRECT_TRANSFORMS[pair][1] for pair in pairs]),
+            )
+    return table
+
+_TRANSFORM_TABLE = _build_transform_table()
+
+def get_transform(from_system, to_system, vectorized=False):
+    """获取两个坐标系之间的转换函数
+    
+    转换函数在模块加载时已按最短路径预先串联好，批量转换时应先获取函数再调用，
+    避免每次调用都查找转换路径。
+    
+    Args:
+        from_system (str): 源坐标系 ('WGS84'、'GCJ02' 或 'BD09')
+        to_system (str): 目标坐标系 ('WGS84'、'GCJ02' 或 'BD09')
+        vectorized (bool): 是否返回数组版本的转换函数
+        
+    Returns:
+        callable: 参数为(经度, 纬度)、返回(转换后经度, 转换后纬度)的函数
+    """
+    key = (normalize_coordinate_system(from_system), normalize_coordinate_system(to_system))
+    if key not in _TRANSFORM_TABLE:
+        raise ValueError(f"不支持的坐标系转换: {from_system} -> {to_system}")
+    return _TRANSFORM_TABLE[key][1 if vectorized else 0]
+
+def wgs84_to_bd09(lng_wgs, lat_wgs):
+    """WGS84坐标系转BD09坐标系（经GCJ02中转）"""
+    return _TRANSFORM_TABLE[('WGS84', 'BD09')][0](lng_wgs, lat_wgs)
+
+def bd09_to_wgs84(lng_bd, lat_bd):
+    """BD09坐标系转WGS84坐标系（经GCJ02中转）"""
+    return _TRANSFORM_TABLE[('BD09', 'WGS84')][0](lng_bd, lat_bd)
+
 def convert_coordinates(lng, lat, from_system='WGS84', to_system='GCJ02'):
     """通用坐标转换函数
     
     Args:
         lng (float): 经度
         lat (float): 纬度
-        from_system (str): 源坐标系 ('WGS84' 或 'GCJ02')
-        to_system (str): 目标坐标系 ('WGS84' 或 'GCJ02')
+        from_system (str): 源坐标系 ('WGS84'、'GCJ02' 或 'BD09')
+        to_system (str): 目标坐标系 ('WGS84'、'GCJ02' 或 'BD09')
         
     Returns:
         tuple: (转换后经度, 转换后纬度)
     """
-    if from_system == to_system:
-        return lng, lat
+    return get_transform(from_system, to_system)(lng, lat)
+
+def convert_coordinates_array(lng, lat, from_system='WGS84', to_system='GCJ02'):
+    """通用坐标转换函数（数组版本）
+    
+    Args:
+        lng (array-like): 经度，可以是NumPy数组或pandas Series
+        lat (array-like): 纬度，可以是NumPy数组或pandas Series
+        from_system (str): 源坐标系 ('WGS84'、'GCJ02' 或 'BD09')
+        to_system (str): 目标坐标系 ('WGS84'、'GCJ02' 或 'BD09')
         
-    if from_system == 'WGS84' and to_system == 'GCJ02':
-        return wgs84_to_gcj02(lng, lat)
-    elif from_system == 'GCJ02' and to_system == 'WGS84':
-        return gcj02_to_wgs84(lng, lat)
-    else:
-        raise ValueError(f"不支持的坐标系转换: {from_system} -> {to_system}")
+    Returns:
+        tuple: (转换后经度, 转换后纬度)，相同坐标系时原样返回输入
+    """
+    return get_transform(from_system, to_system, vectorized=True)(lng, lat)
+
+# 距离计算相关常数
+EARTH_RADIUS = 6371000  # 地球平均半径（米），用于球面距离
+WGS84_SEMI_MAJOR = 6378137.0  # WGS84椭球长半轴（米）
+WGS84_FLATTENING = 1 / 298.257223563  # WGS84椭球扁率
+WGS84_SEMI_MINOR = WGS84_SEMI_MAJOR * (1 - WGS84_FLATTENING)  # WGS84椭球短半轴（米）
 
-def calculate_distance(lng1, lat1, lng2, lat2):
-    """计算两个经纬度点之间的直线距离（球面距离）
-    使用Haversine公式计算地球表面两点间的最短距离
+# 支持的距离计算方法
+DISTANCE_METHODS = ('haversine', 'vincenty')
+
+def calculate_distance(lng1, lat1, lng2, lat2, method='haversine'):
+    """计算两个经纬度点之间的直线距离
+    默认使用Haversine公式计算球面距离，method='vincenty' 时使用WGS84椭球上的Vincenty公式
     
     Args:
         lng1 (float): 起点经度
         lat1 (float): 起点纬度
         lng2 (float): 终点经度
         lat2 (float): 终点纬度
+        method (str): 距离计算方法，'haversine' 或 'vincenty'
         
     Returns:
         float: 距离（单位：米）
     """
+    if method != 'haversine':
+        return float(distance_pairwise(lng1, lat1, lng2, lat2, method=method))
+
     # 地球半径（米）
-    R = 6371000
+    R = EARTH_RADIUS
     
     # 将角度转换为弧度
     lat1_rad = math.radians(lat1)
@@ -146,4 +492,192 @@ def calculate_distance(lng1, lat1, lng2, lat2):
     
     # 计算距离
     distance = R * c
-    return distance
\ No newline at end of file
+    return distance
+
+def _haversine_array(lng1, lat1, lng2, lat2, dtype):
+    """Haversine球面距离（数组版本，参数可相互广播）"""
+    lng1, lat1, lng2, lat2 = (np.radians(np.asarray(v, dtype=dtype)) for v in (lng1, lat1, lng2, lat2))
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    h = np.minimum(h, 1)
+    return (2 * EARTH_RADIUS) * np.arctan2(np.sqrt(h), np.sqrt(1 - h))
+
+def _vincenty_array(lng1, lat1, lng2, lat2, tolerance=1e-12, max_iterations=200):
+    """Vincenty椭球距离（数组版本，参数可相互广播，始终以float64计算）
+    
+    每次迭代只更新尚未收敛的元素；近对跖点等不收敛的情况退回Haversine距离。
+    """
+    lng1, lat1, lng2, lat2 = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64)
+                                                  for v in (lng1, lat1, lng2, lat2)))
+    shape = lng1.shape
+    lng1, lat1, lng2, lat2 = (v.ravel() for v in (lng1, lat1, lng2, lat2))
+    f = WGS84_FLATTENING
+
+    L = np.radians(lng2 - lng1)
+    U1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+    U2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+    sin_u1, cos_u1 = np.sin(U1), np.cos(U1)
+    sin_u2, cos_u2 = np.sin(U2), np.cos(U2)
+
+    def evaluate(lam, idx):
+        """在给定λ下计算迭代所需的中间量"""
+        sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+        sin_sigma = np.hypot(cos_u2[idx] * sin_lam,
+                             cos_u1[idx] * sin_u2[idx] - sin_u1[idx] * cos_u2[idx] * cos_lam)
+        cos_sigma = sin_u1[idx] * sin_u2[idx] + cos_u1[idx] * cos_u2[idx] * cos_lam
+        sigma = np.arctan2(sin_sigma, cos_sigma)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # 重合点 sin_sigma 为0，赤道上的线 cos2_alpha 为0，两种情况对应项均取0
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cos_u1[idx] * cos_u2[idx] * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha * sin_alpha
+            cos_2sigma_m = np.where(cos2_alpha == 0, 0.0,
+                                    cos_sigma - 2 * sin_u1[idx] * sin_u2[idx] / cos2_alpha)
+        return sin_sigma, cos_sigma, sigma, sin_alpha, cos2_alpha, cos_2sigma_m
+
+    lam = L.copy()
+    active = np.flatnonzero(np.isfinite(L) & np.isfinite(U1) & np.isfinite(U2))
+    converged = np.zeros(len(L), dtype=bool)
+    for _ in range(max_iterations):
+        if len(active) == 0:
+            break
+        _, cos_sigma, sigma, sin_alpha, cos2_alpha, cos_2sigma_m = evaluate(lam[active], active)
+        sin_sigma = np.sin(sigma)
+        C = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+        new_lam = L[active] + (1 - C) * f * sin_alpha * (
+            sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+        done = np.abs(new_lam - lam[active]) < tolerance
+        lam[active] = new_lam
+        converged[active[done]] = True
+        active = active[~done]
+
+    everything = np.arange(len(L))
+    sin_sigma, cos_sigma, sigma, _, cos2_alpha, cos_2sigma_m = evaluate(lam, everything)
+    u2 = cos2_alpha * (WGS84_SEMI_MAJOR ** 2 - WGS84_SEMI_MINOR ** 2) / WGS84_SEMI_MINOR ** 2
+    A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+    delta_sigma = B * sin_sigma * (cos_2sigma_m + B / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sigma_m ** 2) -
+        B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+    distances = WGS84_SEMI_MINOR * A * (sigma - delta_sigma)
+
+    fallback = ~converged & np.isfinite(L) & np.isfinite(U1) & np.isfinite(U2)
+    if fallback.any():
+        distances[fallback] = _haversine_array(lng1[fallback], lat1[fallback],
+                                               lng2[fallback], lat2[fallback], np.float64)
+    distances[~np.isfinite(L + U1 + U2)] = np.nan
+    return distances.reshape(shape)
+
+def distance_pairwise(lng1, lat1, lng2, lat2, method='haversine', dtype=np.float64):
+    """逐对计算两组点之间的距离
+    
+    参数按NumPy规则广播，因此也可以传入单个点与一组点。
+    
+    Args:
+        lng1 (array-like): 第一组点的经度
+        lat1 (array-like): 第一组点的纬度
+        lng2 (array-like): 第二组点的经度
+        lat2 (array-like): 第二组点的纬度
+        method (str): 'haversine'（球面距离）或 'vincenty'（WGS84椭球距离，精度更高、速度较慢）
+        dtype: 计算和返回的浮点类型，np.float32 可减少大批量计算的内存占用；
+               vincenty 始终以float64迭代，仅结果转换为该类型
+        
+    Returns:
+        numpy.ndarray: 对应点对之间的距离（米），坐标无效时为NaN
+    """
+    if method == 'haversine':
+        return _haversine_array(lng1, lat1, lng2, lat2, dtype)
+    if method == 'vincenty':
+        return _vincenty_array(lng1, lat1, lng2, lat2).astype(dtype, copy=False)
+    raise ValueError(f"不支持的距离计算方法: {method}，仅支持 {', '.join(DISTANCE_METHODS)}")
+
+def distance_one_to_many(lng, lat, lngs, lats, method='haversine', dtype=np.float64):
+    """计算一个点到多个点的距离
+    
+    Args:
+        lng (float): 起点经度
+        lat (float): 起点纬度
+        lngs (array-like): 终点经度数组
+        lats (array-like): 终点纬度数组
+        method (str): 'haversine' 或 'vincenty'
+        dtype: 计算和返回的浮点类型
+        
+    Returns:
+        numpy.ndarray: 起点到各终点的距离（米）
+    """
+    return distance_pairwise(lng, lat, lngs, lats, method=method, dtype=dtype)
+
+def distance_matrix(lngs1, lats1, lngs2, lats2, method='haversine', dtype=np.float64):
+    """计算两组点之间的距离矩阵
+    
+    Args:
+        lngs1 (array-like): 第一组点的经度数组（n个）
+        lats1 (array-like): 第一组点的纬度数组（n个）
+        lngs2 (array-like): 第二组点的经度数组（m个）
+        lats2 (array-like): 第二组点的纬度数组（m个）
+        method (str): 'haversine' 或 'vincenty'
+        dtype: 计算和返回的浮点类型，np.float32 可将矩阵内存减半
+        
+    Returns:
+        numpy.ndarray: 形状为(n, m)的距离矩阵（米）
+    """
+    lngs1 = np.asarray(lngs1, dtype=dtype)[:, None]
+    lats1 = np.asarray(lats1, dtype=dtype)[:, None]
+    return distance_pairwise(lngs1, lats1, np.asarray(lngs2, dtype=dtype), np.asarray(lats2, dtype=dtype),
+                             method=method, dtype=dtype)
+
+def destination_array(lng, lat, azimuth, distance, tolerance=1e-12, max_iterations=20):
+    """从起点沿给定方位角前进一定距离后的终点（Vincenty正解，WGS84椭球，数组版本）
+    
+    参数按NumPy规则广播，例如以一组起点的列向量 (n, 1) 与方位角数组 (k,) 可一次得到 (n, k) 个终点。
+    
+    Args:
+        lng (array-like): 起点经度
+        lat (array-like): 起点纬度
+        azimuth (array-like): 方位角（度，正北为0，顺时针）
+        distance (array-like): 距离（米）
+        tolerance (float): σ的收敛容差（弧度）
+        max_iterations (int): 最大迭代次数，正解通常3次以内收敛
+        
+    Returns:
+        tuple: (终点经度, 终点纬度)，NumPy数组，经度归一化到[-180, 180)
+    """
+    lng, lat, azimuth, distance = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64)
+                                                        for v in (lng, lat, azimuth, distance)))
+    f = WGS84_FLATTENING
+    alpha1 = np.radians(azimuth)
+    sin_alpha1, cos_alpha1 = np.sin(alpha1), np.cos(alpha1)
+
+    tan_u1 = (1 - f) * np.tan(np.radians(lat))
+    cos_u1 = 1 / np.sqrt(1 + tan_u1 * tan_u1)
+    sin_u1 = tan_u1 * cos_u1
+    sigma1 = np.arctan2(tan_u1, cos_alpha1)
+    sin_alpha = cos_u1 * sin_alpha1
+    cos2_alpha = 1 - sin_alpha * sin_alpha
+    u2 = cos2_alpha * (WGS84_SEMI_MAJOR ** 2 - WGS84_SEMI_MINOR ** 2) / WGS84_SEMI_MINOR ** 2
+    A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+
+    sigma_0 = distance / (WGS84_SEMI_MINOR * A)
+    sigma = sigma_0
+    for _ in range(max_iterations):
+        cos_2sigma_m = np.cos(2 * sigma1 + sigma)
+        sin_sigma, cos_sigma = np.sin(sigma), np.cos(sigma)
+        delta_sigma = B * sin_sigma * (cos_2sigma_m + B / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sigma_m ** 2) -
+            B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+        new_sigma = sigma_0 + delta_sigma
+        done = np.nanmax(np.abs(new_sigma - sigma), initial=0) < tolerance
+        sigma = new_sigma
+        if done:
+            break
+
+    cos_2sigma_m = np.cos(2 * sigma1 + sigma)
+    sin_sigma, cos_sigma = np.sin(sigma), np.cos(sigma)
+    x = sin_u1 * sin_sigma - cos_u1 * cos_sigma * cos_alpha1
+    lat2 = np.arctan2(sin_u1 * cos_sigma + cos_u1 * sin_sigma * cos_alpha1,
+                      (1 - f) * np.hypot(sin_alpha, x))
+    lam = np.arctan2(sin_sigma * sin_alpha1, cos_u1 * cos_sigma - sin_u1 * sin_sigma * cos_alpha1)
+    C = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+    L = lam - (1 - C) * f * sin_alpha * (
+        sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+    lng2 = (lng + np.degrees(L) + 180) % 360 - 180
+    return lng2, np.degrees(lat2)
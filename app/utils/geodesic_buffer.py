@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""
+测地线圆形与缓冲区模块
+用NumPy一次性生成所有中心点的圆周顶点：顶点由WGS84椭球上的Vincenty正解得到，
+顶点数按半径和允许误差自动选择；大量相互重叠的圆可以合并为覆盖范围多边形（含内部空洞）
+"""
+
+import math
+import numpy as np
+from .coordinate_converter import (destination_array, WGS84_SEMI_MAJOR, WGS84_FLATTENING,
+                                   EARTH_RADIUS)
+
+# 圆周多边形与真实圆之间允许的最大偏差（米）
+CIRCLE_TOLERANCE = 1.0
+# 每个圆的顶点数范围
+MIN_CIRCLE_VERTICES = 8
+MAX_CIRCLE_VERTICES = 720
+
+# 合并时每次比较的候选点对数，限制大规模密集点集的内存占用
+_MERGE_CHUNK = 2_000_000
+# 重叠深度小于此值（米）的两个圆视为相切，不合并
+_MIN_OVERLAP = 0.001
+
+_E2 = WGS84_FLATTENING * (2 - WGS84_FLATTENING)  # 第一偏心率的平方
+
+def circle_vertex_count(radius_meters, tolerance=CIRCLE_TOLERANCE):
+    """
+    满足误差要求的圆周顶点数
+
+    正n边形的边与外接圆之间的最大偏差为 r·(1 - cos(π/n))，取使其不超过 tolerance 的最小n。
+
+    Args:
+        radius_meters (float): 圆的半径（米）
+        tolerance (float): 允许的最大偏差（米）
+
+    Returns:
+        int: 顶点数（不含闭合点），限制在 MIN_CIRCLE_VERTICES 与 MAX_CIRCLE_VERTICES 之间
+    """
+    if tolerance <= 0:
+        return MAX_CIRCLE_VERTICES
+    if tolerance >= radius_meters:
+        return MIN_CIRCLE_VERTICES
+    n = math.ceil(math.pi / math.acos(1 - tolerance / radius_meters))
+    return max(MIN_CIRCLE_VERTICES, min(MAX_CIRCLE_VERTICES, n))
+
+def geodesic_circles(lngs, lats, radius_meters, tolerance=CIRCLE_TOLERANCE, num_points=None):
+    """
+    以各中心点生成测地线圆形多边形的顶点
+
+    Args:
+        lngs (array-like): 中心点经度
+        lats (array-like): 中心点纬度
+        radius_meters (float): 半径（米）
+        tolerance (float): 允许的最大偏差（米），用于自动选择顶点数
+        num_points (int): 指定每个圆的顶点数，为None时按 tolerance 自动选择
+
+    Returns:
+        numpy.ndarray: (M, num_points + 1, 2)，每个圆从正北开始逆时针排列并首尾闭合
+    """
+    if num_points is None:
+        num_points = circle_vertex_count(radius_meters, tolerance)
+    azimuths = (360.0 - 360.0 * np.arange(num_points + 1) / num_points) % 360.0
+    lngs = np.asarray(lngs, dtype=np.float64).reshape(-1, 1)
+    lats = np.asarray(lats, dtype=np.float64).reshape(-1, 1)
+    ring_lngs, ring_lats = destination_array(lngs, lats, azimuths, radius_meters)
+    rings = np.stack([ring_lngs, ring_lats], axis=-1)
+    rings[:, -1] = rings[:, 0]
+    return rings
+
+def segment_rings(coords, radius_meters):
+    """
+    线段两侧各扩展 radius_meters 的四边形，(K, 5, 2)，与端点处的圆一起构成线的缓冲区
+
+    Args:
+        coords (numpy.ndarray): 线的顶点，(N, 2)，经度、纬度
+        radius_meters (float): 缓冲半径（米）
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    start, end = coords[:-1], coords[1:]
+    dx, dy = _local_offsets(start[:, 0], start[:, 1], end[:, 0], end[:, 1])
+    keep = (dx != 0) | (dy != 0)
+    start, end = start[keep], end[keep]
+    # 线段方位角（正北为0，顺时针），两侧偏移方向与之垂直
+    azimuth = np.degrees(np.arctan2(dx[keep], dy[keep]))
+    corners = [destination_array(point[:, 0], point[:, 1], azimuth + side, radius_meters)
+               for point, side in ((start, -90), (end, -90), (end, 90), (start, 90))]
+    rings = np.stack([np.stack(corner, axis=-1) for corner in corners + corners[:1]], axis=1)
+    return rings
+
+def _local_offsets(lng1, lat1, lng2, lat2):
+    """
+    第二个点相对第一个点的东向、北向偏移（米）
+
+    在两点中间纬度处按椭球的子午圈和卯酉圈曲率半径换算，
+    适用于圆的半径量级（数十公里以内）的距离。
+    """
+    mid_lat = np.radians((lat1 + lat2) / 2)
+    sin2 = np.sin(mid_lat) ** 2
+    prime_vertical = WGS84_SEMI_MAJOR / np.sqrt(1 - _E2 * sin2)
+    meridian = prime_vertical * (1 - _E2) / (1 - _E2 * sin2)
+    dlng = (np.asarray(lng2) - lng1 + 180.0) % 360.0 - 180.0
+    return (np.radians(dlng) * prime_vertical * np.cos(mid_lat),
+            np.radians(np.asarray(lat2) - lat1) * meridian)
+
+class _PointGrid:
+    """
+    按空间网格索引点，用于查找一定距离内的邻近点
+
+    点投影到以地心为原点的三维坐标后按 cell_size 划分网格，
+    查找时只比较所在网格及相邻的26个网格中的点。
+    """
+
+    # 相邻网格（含自身）的偏移
+    OFFSETS = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+
+    def __init__(self, lngs, lats, cell_size):
+        lng_rad, lat_rad = np.radians(lngs), np.radians(lats)
+        self.xyz = EARTH_RADIUS * np.stack([np.cos(lat_rad) * np.cos(lng_rad),
+                                            np.cos(lat_rad) * np.sin(lng_rad),
+                                            np.sin(lat_rad)], axis=1)
+        origin = self.xyz.min(axis=0)
+        # 网格数过多时放大网格，保证网格编号能用int64表示
+        cell_size = max(cell_size, float((self.xyz.max(axis=0) - origin).max()) / 2 ** 20)
+        cells = np.floor((self.xyz - origin) / cell_size).astype(np.int64)
+        # 每个维度多留一格，使相邻网格的编号不会与其他网格重合
+        dims = cells.max(axis=0) + 2
+        self.keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+        self.key_offsets = [(dx * dims[1] + dy) * dims[2] + dz for dx, dy, dz in self.OFFSETS]
+        # 按网格排序，相邻的点在数组中也相邻
+        self.order = np.argsort(self.keys, kind='stable')
+        self.unique_keys, self.starts, self.counts = np.unique(
+            self.keys[self.order], return_index=True, return_counts=True)
+
+    def _lookup(self, keys):
+        """各网格编号在 unique_keys 中的位置，网格中没有点时为-1"""
+        pos = np.minimum(np.searchsorted(self.unique_keys, keys), len(self.unique_keys) - 1)
+        return np.where(self.unique_keys[pos] == keys, pos, -1)
+
+    def candidate_counts(self):
+        """每个点需要比较的候选点数"""
+        total = np.zeros(len(self.keys), dtype=np.int64)
+        for offset in self.key_offsets:
+            pos = self._lookup(self.keys + offset)
+            total += np.where(pos >= 0, self.counts[pos], 0)
+        return total
+
+    def candidates(self, points):
+        """
+        points 中各点与其候选点组成的点对 (i, j)，不含 i == j
+        """
+        pairs_i, pairs_j = [], []
+        for offset in self.key_offsets:
+            pos = self._lookup(self.keys[points] + offset)
+            found = pos >= 0
+            src, pos = points[found], pos[found]
+            cnt = self.counts[pos]
+            within = np.arange(cnt.sum()) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+            pairs_i.append(np.repeat(src, cnt))
+            pairs_j.append(self.order[np.repeat(self.starts[pos], cnt) + within])
+        i, j = np.concatenate(pairs_i), np.concatenate(pairs_j)
+        keep = i != j
+        return i[keep], j[keep]
+
+    def blocks(self, max_candidates):
+        """把点按网格顺序分块，每块的候选点对总数不超过 max_candidates（单个点超过时单独成块）"""
+        cumulative = np.cumsum(self.candidate_counts()[self.order])
+        lo = 0
+        while lo < len(self.order):
+            base = cumulative[lo - 1] if lo else 0
+            hi = max(lo + 1, int(np.searchsorted(cumulative, base + max_candidates, side='right')))
+            yield self.order[lo:hi]
+            lo = hi
+
+def _free_arcs(circle, start, end, owner):
+    """
+    求各圆未被其他圆覆盖的圆弧
+
+    Args:
+        circle, start, end, owner (numpy.ndarray): 每个被覆盖区间所在的圆、起止角度（弧度，
+            逆时针，start在[0, 2π)内）和覆盖它的圆，已按 circle 排序
+
+    Returns:
+        tuple: (圆, 弧起点角度, 弧终点角度, 起点处离开的圆, 终点处进入的圆)
+    """
+    two_pi = 2 * np.pi
+    # 每个区间复制到相邻的三圈，中间一圈的空隙即考虑了跨越0角度的区间
+    circle3 = np.concatenate([circle] * 3)
+    start3 = np.concatenate([start, start + two_pi, start + 2 * two_pi])
+    end3 = np.concatenate([end, end + two_pi, end + 2 * two_pi])
+    order = np.lexsort((start3, circle3))
+    circle3, start3, end3 = circle3[order], start3[order], end3[order]
+    owner3 = np.concatenate([owner] * 3)[order]
+
+    # 同一个圆内已扫过区间的最远终点；加上按圆编号递增的偏移，使累计最大值不跨圆传递
+    shifted = end3 + circle3 * (4 * two_pi)
+    reach = np.maximum.accumulate(shifted)
+    index = np.arange(len(shifted))
+    reach_index = np.maximum.accumulate(np.where(shifted >= reach, index, 0))
+    group_start = np.ones(len(circle3), dtype=bool)
+    group_start[1:] = circle3[1:] != circle3[:-1]
+    first = np.maximum.accumulate(np.where(group_start, index, 0))
+
+    k = np.flatnonzero((circle3[1:] == circle3[:-1]) &
+                       (start3[1:] + circle3[1:] * (4 * two_pi) > reach[:-1]))
+    arc_start = end3[reach_index[k]]
+    middle = (arc_start >= start3[first[k]] + two_pi) & (arc_start < start3[first[k]] + 2 * two_pi)
+    k = k[middle]
+    arc_start = arc_start[middle]
+    offset = np.floor(arc_start / two_pi) * two_pi
+    return (circle3[k], arc_start - offset, start3[k + 1] - offset,
+            owner3[reach_index[k]], owner3[k + 1])
+
+def _chain_arcs(circle, from_circle, to_circle):
+    """把圆弧首尾相接成环，返回每个环包含的圆弧序号列表"""
+    by_start = {(c, f): n for n, (c, f) in enumerate(zip(circle.tolist(), from_circle.tolist()))}
+    visited = np.zeros(len(circle), dtype=bool)
+    chains = []
+    for first in range(len(circle)):
+        if visited[first]:
+            continue
+        chain = []
+        n = first
+        while n is not None and not visited[n]:
+            visited[n] = True
+            chain.append(n)
+            # 在下一个圆上，从离开当前圆的位置继续
+            n = by_start.get((int(to_circle[n]), int(circle[n])))
+        chains.append(chain)
+    return chains
+
+def _signed_area(ring):
+    """环的有向面积（经纬度平面），逆时针为正"""
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))
+
+def _point_in_ring(point, ring):
+    """射线法判断点是否在环内"""
+    x, y = point
+    x1, y1 = ring[:-1, 0], ring[:-1, 1]
+    x2, y2 = ring[1:, 0], ring[1:, 1]
+    crosses = (y1 > y) != (y2 > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    return bool(np.count_nonzero(crosses & (x < x_cross)) % 2)
+
+def merge_circles(lngs, lats, radius_meters, tolerance=CIRCLE_TOLERANCE, num_points=None):
+    """
+    生成各点的圆形并合并相互重叠的圆，得到覆盖范围多边形
+
+    覆盖范围的边界由各圆未被其他圆覆盖的圆弧组成：先在圆心附近的局部平面上计算
+    每对重叠圆的交点角度，求出每个圆露在外面的圆弧，再把圆弧首尾相接成环，
+    圆弧上的顶点仍按测地线从各自圆心生成。被四周的圆完全包围的空白区域成为多边形的内环。
+
+    Args:
+        lngs (array-like): 中心点经度
+        lats (array-like): 中心点纬度
+        radius_meters (float): 半径（米）
+        tolerance (float): 允许的最大偏差（米），用于自动选择顶点数，相距小于该值的圆心视为同一点
+        num_points (int): 指定整圆的顶点数，为None时按 tolerance 自动选择
+
+    Returns:
+        list: 多边形列表，每个多边形为 [外环, 内环...]，环为 (K, 2) 的闭合顶点数组
+    """
+    if num_points is None:
+        num_points = circle_vertex_count(radius_meters, tolerance)
+    points = np.column_stack([np.asarray(lngs, dtype=np.float64), np.asarray(lats, dtype=np.float64)])
+    points = points[np.isfinite(points).all(axis=1)]
+    if len(points) == 0:
+        return []
+    # 三维坐标按球面计算，网格和距离初筛都留出余量，保证不会漏掉椭球上的重叠点对
+    reach = 2 * radius_meters * 1.01
+    grid = _PointGrid(points[:, 0], points[:, 1], reach)
+    # 相距小于 tolerance 的圆心只保留一个，覆盖范围的边界随之内缩不超过 tolerance
+    snap = max(tolerance, 1e-6) / math.sqrt(3)
+    _, keep = np.unique(np.floor(grid.xyz / snap).astype(np.int64), axis=0, return_index=True)
+    if len(keep) < len(points):
+        points = points[np.sort(keep)]
+        grid = _PointGrid(points[:, 0], points[:, 1], reach)
+    lngs, lats = points[:, 0], points[:, 1]
+    # 每个圆在12个30°扇区内是否有距离不超过√3倍半径的圆，有则该扇区的圆周被其覆盖
+    sectors = np.zeros(len(points), dtype=np.int16)
+    isolated, arcs = [], []
+    for block in grid.blocks(_MERGE_CHUNK):
+        i, j = grid.candidates(block)
+        chord = grid.xyz[i] - grid.xyz[j]
+        near = np.einsum('ij,ij->i', chord, chord) < reach ** 2
+        i, j = i[near], j[near]
+        # 两个方向按同一顺序计算，保证 i→j 与 j→i 的重叠判断一致
+        a, b = np.minimum(i, j), np.maximum(i, j)
+        dx, dy = _local_offsets(lngs[a], lats[a], lngs[b], lats[b])
+        distance = np.hypot(dx, dy)
+        flip = np.where(i < j, 1.0, -1.0)
+        dx, dy = dx * flip, dy * flip
+        # 重叠深度不足 _MIN_OVERLAP 的圆视为相切，不合并
+        overlap = distance < 2 * radius_meters - _MIN_OVERLAP
+        i, j, dx, dy, distance = i[overlap], j[overlap], dx[overlap], dy[overlap], distance[overlap]
+        has_neighbor = np.zeros(len(points), dtype=bool)
+        has_neighbor[i] = True
+        isolated.append(block[~has_neighbor[block]])
+        if len(i) == 0:
+            continue
+
+        # 圆i上被圆j覆盖的区间以 i→j 方向为中心（逆时针角度，0为正东）
+        base = np.arctan2(dy, dx)
+        close = distance <= math.sqrt(3) * radius_meters
+        sector = np.floor(base[close] / (np.pi / 6)).astype(np.int64) % 12
+        np.bitwise_or.at(sectors, i[close], (1 << sector).astype(np.int16))
+        # 圆周完全被覆盖的圆不会出现在边界上，不必计算
+        exposed = sectors[i] != 0xFFF
+        i, j, base, distance = i[exposed], j[exposed], base[exposed], distance[exposed]
+        half = np.arccos(distance / (2 * radius_meters))
+        start = (base - half) % (2 * np.pi)
+        arcs.append(_free_arcs(i, start, start + 2 * half, j))
+
+    isolated = np.concatenate(isolated)
+    polygons = [[ring] for ring in geodesic_circles(lngs[isolated], lats[isolated],
+                                                    radius_meters, num_points=num_points)]
+    arc_circle, arc_start, arc_end, arc_from, arc_to = (np.concatenate(column) for column in zip(*arcs)) \
+        if arcs else [np.empty(0)] * 5
+    if len(arc_circle) == 0:
+        return polygons
+    arc_circle, arc_from, arc_to = (column.astype(np.int64) for column in (arc_circle, arc_from, arc_to))
+
+    # 每段圆弧按整圆的角度步长取点（不含终点，终点是下一段圆弧的起点）
+    step = 2 * np.pi / num_points
+    vertex_counts = np.maximum(1, np.ceil((arc_end - arc_start) / step - 1e-9)).astype(np.int64)
+    arc_offsets = np.concatenate([[0], np.cumsum(vertex_counts)])
+    arc_index = np.repeat(np.arange(len(arc_circle)), vertex_counts)
+    t = (np.arange(arc_offsets[-1]) - arc_offsets[arc_index]) / vertex_counts[arc_index]
+    angles = arc_start[arc_index] + (arc_end - arc_start)[arc_index] * t
+    centers = arc_circle[arc_index]
+    vertex_lngs, vertex_lats = destination_array(lngs[centers], lats[centers],
+                                                 90.0 - np.degrees(angles), radius_meters)
+    vertices = np.column_stack([vertex_lngs, vertex_lats])
+
+    outers, holes = [], []
+    for chain in _chain_arcs(arc_circle, arc_from, arc_to):
+        ring = np.concatenate([vertices[arc_offsets[n]:arc_offsets[n + 1]] for n in chain])
+        if len(ring) < 3:
+            continue
+        ring = np.vstack([ring, ring[:1]])
+        area = _signed_area(ring)
+        (outers if area > 0 else holes).append((ring, abs(area)))
+
+    outer_rings = [[ring] for ring, _ in outers]
+    boxes = np.array([[ring[:, 0].min(), ring[:, 1].min(), ring[:, 0].max(), ring[:, 1].max()]
+                      for ring, _ in outers]).reshape(-1, 4)
+    for hole, _ in holes:
+        x, y = hole[0]
+        candidates = np.flatnonzero((boxes[:, 0] <= x) & (x <= boxes[:, 2]) &
+                                    (boxes[:, 1] <= y) & (y <= boxes[:, 3]))
+        # 嵌套时归入面积最小的外环
+        containing = [n for n in sorted(candidates, key=lambda n: outers[n][1])
+                      if _point_in_ring((x, y), outers[n][0])]
+        if containing:
+            outer_rings[containing[0]].append(hole)
+    return polygons + outer_rings
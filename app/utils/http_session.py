@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP会话模块
+高德API的所有请求共用一个带连接池的requests会话，
+保持长连接，避免每次请求都重新建立TCP和TLS连接
+"""
+
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# 连接池缓存的主机数（高德API只涉及少数几个域名）
+POOL_CONNECTIONS = 4
+
+# 每个主机最多保持的连接数，同时也是并发请求时每个主机的连接上限
+POOL_MAXSIZE = 16
+
+_session = None
+_session_lock = threading.Lock()
+
+def create_session(pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE,
+                   pool_block: bool = True) -> requests.Session:
+    """创建带连接池的会话
+    
+    Args:
+        pool_connections (int): 缓存连接池的主机数
+        pool_maxsize (int): 每个主机的连接池大小
+        pool_block (bool): 连接数达到上限时是否等待空闲连接，为True时可保证每个主机的连接数不超过上限
+        
+    Returns:
+        requests.Session: 会话对象
+    """
+    session = requests.Session()
+    # 重试由调用方自行处理，适配器本身不重试
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          pool_block=pool_block, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
+
+def get_session() -> requests.Session:
+    """获取全局共享的会话（首次调用时创建）"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+def close_session():
+    """关闭全局会话并释放连接"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+请求合并模块
+多个线程同时发起相同的请求时，只有第一个线程真正发出请求，
+其余线程等待并共享同一个结果（或异常），避免重复调用API
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+class RequestCoalescer:
+    """合并进行中的相同请求（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+
+    def run(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        执行请求，相同key的请求正在进行时等待其结果
+
+        Args:
+            key: 请求标识，相同的请求应得到相同的key
+            func (callable): 实际发出请求的函数
+
+        Returns:
+            func 的返回值；func 抛出的异常会传递给所有等待的调用方
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            # 请求完成后移除，之后的相同请求由缓存或新的请求处理
+            with self._lock:
+                del self._inflight[key]
+        return future.result()
+
+    @property
+    def inflight(self) -> int:
+        """正在进行的不同请求数"""
+        return len(self._inflight)
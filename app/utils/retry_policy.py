@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+API重试策略模块
+按高德API的infocode对错误分类：只对QPS超限、服务繁忙、网络异常等临时性错误
+以带随机抖动的指数退避重试；Key无效、参数错误等错误立即失败。
+QPS超限时全局暂停所有请求，每日配额用尽或Key无效时停止后续请求
+"""
+
+import time
+import random
+import datetime
+import threading
+from typing import Optional
+
+# 错误类别
+ERROR_QPS = 'qps'            # 请求过于频繁，稍后重试
+ERROR_QUOTA = 'quota'        # 每日配额用尽，当天不再请求
+ERROR_KEY = 'key'            # Key无效、被封禁等，需要更换Key
+ERROR_PERMISSION = 'permission'  # Key无权使用某个服务，只影响该服务的请求
+ERROR_PARAMS = 'params'      # 请求参数错误，重试无意义
+ERROR_TRANSIENT = 'transient'  # 服务端临时故障或网络异常，可以重试
+ERROR_UNKNOWN = 'unknown'    # 其他错误，不重试
+
+# 高德API infocode分类
+QPS_INFOCODES = {'10004', '10010', '10014', '10019', '10020', '10021'}
+QUOTA_INFOCODES = {'10003', '10029', '10044', '10045'}
+KEY_INFOCODES = {'10001', '10005', '10006', '10007', '10008', '10009',
+                 '10011', '10013', '10026'}
+PERMISSION_INFOCODES = {'10002', '10012', '10041'}
+# 20011 为查询坐标或规划点在海外/超出范围，只是该次请求的问题
+PARAMS_INFOCODES = {'20000', '20001', '20002', '20011', '20012', '20800', '20801', '20802', '20803'}
+TRANSIENT_INFOCODES = {'10015', '10016', '10017', '20003'}
+
+RETRYABLE_CATEGORIES = (ERROR_QPS, ERROR_TRANSIENT)
+
+def classify_infocode(infocode) -> str:
+    """
+    根据高德API返回的infocode判断错误类别
+
+    Args:
+        infocode (str): 高德API返回的infocode
+
+    Returns:
+        str: 错误类别，ERROR_QPS、ERROR_QUOTA、ERROR_KEY、ERROR_PERMISSION、ERROR_PARAMS、
+             ERROR_TRANSIENT 或 ERROR_UNKNOWN
+    """
+    code = str(infocode or '')
+    if code in QPS_INFOCODES:
+        return ERROR_QPS
+    if code in QUOTA_INFOCODES:
+        return ERROR_QUOTA
+    if code in KEY_INFOCODES:
+        return ERROR_KEY
+    if code in PERMISSION_INFOCODES:
+        return ERROR_PERMISSION
+    if code in PARAMS_INFOCODES:
+        return ERROR_PARAMS
+    if code in TRANSIENT_INFOCODES or code.startswith('3'):
+        # 3xxxx 为服务端引擎错误
+        return ERROR_TRANSIENT
+    return ERROR_UNKNOWN
+
+class AmapAPIError(Exception):
+    """高德API调用错误"""
+
+    def __init__(self, message: str, category: str = ERROR_UNKNOWN, infocode: str = ''):
+        super().__init__(message)
+        self.category = category
+        self.infocode = infocode
+
+    @property
+    def retryable(self) -> bool:
+        """是否为可重试的临时性错误"""
+        return self.category in RETRYABLE_CATEGORIES
+
+class RetryPolicy:
+    """带随机抖动的指数退避重试策略"""
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5, max_delay: float = 16.0):
+        """
+        Args:
+            max_attempts (int): 最多尝试次数（含首次请求）
+            base_delay (float): 首次重试的基准等待时间（秒）
+            max_delay (float): 单次等待时间上限（秒）
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """
+        第 attempt 次失败后的等待时间（attempt从0开始）
+
+        在 [0, base_delay * 2^attempt] 内随机取值（full jitter），
+        避免并发请求在同一时刻集中重试。
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def should_retry(self, error: Exception, attempt: int) -> bool:
+        """判断第 attempt 次失败后是否继续重试"""
+        if attempt >= self.max_attempts - 1:
+            return False
+        return not isinstance(error, AmapAPIError) or error.retryable
+
+class RequestGate:
+    """
+    全局请求闸门（线程安全）
+
+    QPS超限时暂停所有请求一段时间；每日配额用尽或Key无效时停止后续请求，
+    直到次日或更换Key，避免批量任务继续消耗时间和配额。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._halt_error = None
+        self._halt_day = None
+
+    def wait(self):
+        """请求前调用：处于暂停期时等待，已停止时抛出停止原因"""
+        while True:
+            with self._lock:
+                if self._halt_error is not None:
+                    if self._halt_day is not None and datetime.date.today() != self._halt_day:
+                        # 每日配额在次日恢复
+                        self._halt_error = None
+                        self._halt_day = None
+                    else:
+                        raise self._halt_error
+                remaining = self._paused_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def pause(self, seconds: float):
+        """暂停所有请求 seconds 秒（与已有的暂停取较晚的结束时间）"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def halt(self, error: AmapAPIError):
+        """停止后续请求；配额错误在次日自动恢复，Key错误需调用 resume"""
+        with self._lock:
+            self._halt_error = error
+            self._halt_day = datetime.date.today() if error.category == ERROR_QUOTA else None
+
+    def resume(self):
+        """解除停止和暂停状态，如更换Key后"""
+        with self._lock:
+            self._halt_error = None
+            self._halt_day = None
+            self._paused_until = 0.0
+
+    @property
+    def halted(self) -> Optional[AmapAPIError]:
+        """当前的停止原因，未停止时为None"""
+        return self._halt_error
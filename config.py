@@ -38,11 +38,23 @@ class Config:
                 'show_coordinate_conversion': True
             },
             
+            # API调用设置（QPS和每日配额以所用Key的实际限额为准，每日配额为0表示不限制）
+            'api_settings': {
+                'amap_qps': 20,
+                'amap_daily_quota': 0,
+                'batch_workers': 8,
+                # 启动时API连接测试结果的有效期（分钟），期间再次启动不重新测试
+                'health_check_interval_minutes': 30
+            },
+            
             # 缓存设置
             'cache_settings': {
                 'enable_cache': True,
                 'cache_duration_hours': 24,
-                'max_cache_size_mb': 50
+                'max_cache_size_mb': 50,
+                # 逆地理编码按坐标网格缓存：geohash精度和复用结果的容差半径（米）
+                'regeocode_geohash_precision': 8,
+                'regeocode_tolerance_meters': 15
             },
             
             # 历史记录设置
@@ -1,23 +1,16 @@
+import multiprocessing
 import tkinter as tk
-from tkinter import messagebox
 from app.integrated_tool import IntegratedTool
-from app.utils.amap_api import amap_api
-
-def check_api_availability():
-    """检查高德API是否可用"""
-    is_available, message = amap_api.test_connection()
-    return is_available, message
+from app.utils.batch_geocoder import cancel_all_batches
 
 if __name__ == "__main__":
-    # 检查高德API可用性
-    api_available, api_message = check_api_availability()
-    
-    if not api_available:
-        print(f"警告：高德地图API不可用 - {api_message}")
-        print("程序将继续启动，但地理空间相关功能可能受限。")
+    # 打包为可执行文件后，点匹配的多进程并行计算需要此调用
+    multiprocessing.freeze_support()
     
-    # 无论API是否可用都启动程序
+    # 高德API可用性在窗口显示后于后台检测，结果显示在地理空间工具集的状态栏
     root = tk.Tk()
     app = IntegratedTool(root)
     root.mainloop()
-    
\ No newline at end of file
+    
+    # 窗口关闭后停止后台批量查询，退出时不再发出尚未开始的API请求
+    cancel_all_batches()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""批量地理编码/逆地理编码接口的拆分与解析测试"""
+
+import importlib
+
+from app.utils.batch_geocoder import BatchGeocoder
+from app.utils.request_coalescer import RequestCoalescer
+from app.utils.retry_policy import RequestGate
+
+amap_module = importlib.import_module('app.utils.amap_api')
+
+
+class _NoCache:
+    """不缓存任何结果的API缓存"""
+
+    def get(self, endpoint, params):
+        return None
+
+    def set(self, endpoint, params, value):
+        pass
+
+    def get_nearby(self, endpoint, lng, lat):
+        return None
+
+    def set_point(self, endpoint, lng, lat, value):
+        pass
+
+    def make_key(self, endpoint, params):
+        return endpoint + repr(sorted(params.items()))
+
+
+def _api(respond):
+    """创建使用假请求函数的AmapAPI，respond 参数为请求参数，返回响应数据"""
+    api = amap_module.AmapAPI()
+    api.api_key = 'test-key'
+    api.gate = RequestGate()
+    api.cache = _NoCache()
+    api.coalescer = RequestCoalescer()
+    requests = []
+
+    def request_once(url, endpoint, params, use_cache, timeout=None):
+        requests.append(params)
+        return respond(params)
+
+    api._request_once = request_once
+    return api, requests
+
+
+def test_geocode_batch_splits_requests_and_keeps_order():
+    def respond(params):
+        addresses = params['address'].split('|')
+        # 最后一个地址查无结果，高德返回空列表字段
+        return {'status': '1', 'geocodes': [
+            {'location': f'{116 + i},{39 + i}', 'formatted_address': address,
+             'province': '北京市', 'city': [], 'district': [], 'level': '门址'}
+            if address != '查无此地' else {'location': [], 'formatted_address': []}
+            for i, address in enumerate(addresses)]}
+
+    api, requests = _api(respond)
+    addresses = [f'地址{i}' for i in range(12)] + ['查无此地', '地址0']
+
+    results = api.geocode_batch(addresses, city='北京')
+
+    assert len(requests) == 2
+    assert [len(params['address'].split('|')) for params in requests] == [10, 3]
+    assert all(params['batch'] == 'true' and params['city'] == '北京' for params in requests)
+    assert [r['formatted_address'] for r in results[:12]] == addresses[:12]
+    assert results[0]['lng'] == 116.0 and results[11]['lat'] == 40.0
+    assert results[0]['city'] == ''
+    assert results[12]['status'] == 'error'
+    # 重复的地址只请求一次
+    assert results[13] == results[0]
+
+
+def test_regeocode_batch_parses_empty_fields():
+    def respond(params):
+        return {'status': '1', 'regeocodes': [
+            {'formatted_address': '北京市东城区', 'addressComponent': {
+                'province': '北京市', 'city': [], 'district': '东城区', 'adcode': '110101',
+                'township': [], 'streetNumber': []}},
+        ]}
+
+    api, requests = _api(respond)
+
+    results = api.regeocode_batch([(116.4, 39.9), (121.5, 31.2)])
+
+    assert requests[0]['location'] == '116.4,39.9|121.5,31.2'
+    assert results[0]['status'] == 'success'
+    assert results[0]['city'] == '' and results[0]['street'] == ''
+    assert results[0]['adcode'] == '110101'
+    # 响应条数不足时缺失的坐标标记为失败
+    assert results[1]['status'] == 'error'
+
+
+def test_run_batched_groups_by_key():
+    batches = []
+
+    def batch_func(batch):
+        batches.append(batch)
+        return [item['address'] for item in batch]
+
+    items = [{'address': f'地址{i}', 'city': city} for i, city in enumerate(['北京', '上海', '北京', '上海', '北京'])]
+
+    results = BatchGeocoder(workers=2).run_batched(items, batch_func, batch_size=2,
+                                                   group_key=lambda item: item['city'])
+
+    assert results == [item['address'] for item in items]
+    assert sorted(len(batch) for batch in batches) == [1, 2, 2]
+    assert all(len({item['city'] for item in batch}) == 1 for batch in batches)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""API磁盘缓存的过期、淘汰和坐标邻近查询测试"""
+
+import types
+
+import pytest
+
+from app.utils import api_cache as api_cache_module
+from app.utils.api_cache import ApiCache
+
+
+class _Clock:
+    """可手动拨动的时钟"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(api_cache_module, 'time', types.SimpleNamespace(time=clock.time))
+    return clock
+
+
+def _cache(monkeypatch, tmp_path, **settings):
+    """创建使用临时数据库和指定 cache_settings 的缓存"""
+    values = {'cache_settings.enable_cache': True, 'cache_settings.cache_duration_hours': 1,
+              'cache_settings.max_cache_size_mb': 50}
+    values.update({f'cache_settings.{name}': value for name, value in settings.items()})
+    monkeypatch.setattr(api_cache_module.config, 'get', lambda key, default=None: values.get(key, default))
+    return ApiCache(str(tmp_path / 'cache.sqlite3'))
+
+
+def test_make_key_normalizes_params():
+    key = ApiCache.make_key('geocode/geo', {'address': ' 北京 ', 'city': '', 'key': 'a'})
+
+    assert key == ApiCache.make_key('/geocode/geo/', {'address': '北京', 'key': 'b'})
+    assert key != ApiCache.make_key('geocode/geo', {'address': '上海'})
+
+
+def test_entries_expire_after_ttl(monkeypatch, tmp_path, clock):
+    cache = _cache(monkeypatch, tmp_path)
+    cache.set('geocode/geo', {'address': '北京'}, {'lng': 116.4})
+
+    clock.now += 3599
+    assert cache.get('geocode/geo', {'address': '北京'}) == {'lng': 116.4}
+
+    clock.now += 2
+    assert cache.get('geocode/geo', {'address': '北京'}) is None
+    assert cache.stats()['entries'] == 0
+    cache.close()
+
+
+def test_eviction_keeps_recently_used_entries(monkeypatch, tmp_path, clock):
+    # 上限约4KB，每条约1KB
+    cache = _cache(monkeypatch, tmp_path, max_cache_size_mb=4 / 1024)
+    value = 'x' * 1000
+    for name in 'abc':
+        clock.now += 1
+        cache.set('place/text', {'keywords': name}, value)
+    clock.now += 1
+    assert cache.get('place/text', {'keywords': 'a'}) == value
+
+    for name in 'de':
+        clock.now += 1
+        cache.set('place/text', {'keywords': name}, value)
+
+    assert cache.get('place/text', {'keywords': 'a'}) == value
+    assert cache.get('place/text', {'keywords': 'b'}) is None
+    assert cache.get('place/text', {'keywords': 'e'}) == value
+    assert cache.stats()['entries'] == 3
+    cache.close()
+
+
+def test_disabled_cache_stores_nothing(monkeypatch, tmp_path):
+    cache = _cache(monkeypatch, tmp_path, enable_cache=False)
+
+    assert not cache.set('geocode/geo', {'address': '北京'}, {'lng': 116.4})
+    assert cache.get('geocode/geo', {'address': '北京'}) is None
+
+
+def test_geohash_encode():
+    # geohash的标准算例
+    assert api_cache_module.geohash_encode(-5.6, 42.6, 5) == 'ezs42'
+    assert api_cache_module.geohash_encode(116.4, 39.9, 12).startswith(
+        api_cache_module.geohash_encode(116.4, 39.9, 8))
+
+
+def test_get_nearby_within_tolerance(monkeypatch, tmp_path):
+    cache = _cache(monkeypatch, tmp_path, regeocode_tolerance_meters=15, regeocode_geohash_precision=8)
+    cache.set_point('geocode/regeo#base', 116.4, 39.9, {'formatted_address': '甲'})
+    cache.set_point('geocode/regeo#base', 116.4002, 39.9, {'formatted_address': '乙'})
+
+    # 约8.5米，两个缓存坐标都在容差内，取最近的
+    assert cache.get_nearby('geocode/regeo#base', 116.4001, 39.9)['formatted_address'] == '甲'
+    # 约25米，超出容差
+    assert cache.get_nearby('geocode/regeo#base', 116.4, 39.90023) is None
+    # 其他命名空间不命中
+    assert cache.get_nearby('geocode/regeo#all', 116.4, 39.9) is None
+    cache.close()
+
+
+def test_get_nearby_across_cell_boundary(monkeypatch, tmp_path):
+    cache = _cache(monkeypatch, tmp_path, regeocode_tolerance_meters=15, regeocode_geohash_precision=8)
+    cell_lng, _ = api_cache_module.geohash_cell_size(8)
+    # 经度0度是geohash网格的边界，两侧坐标的编码完全不同
+    cache.set_point('geocode/regeo#base', -cell_lng / 10, 10.0, {'formatted_address': '西'})
+
+    assert cache.get_nearby('geocode/regeo#base', cell_lng / 10, 10.0)['formatted_address'] == '西'
+    cache.close()
+
+
+def test_get_nearby_zero_tolerance_requires_exact_match(monkeypatch, tmp_path):
+    cache = _cache(monkeypatch, tmp_path, regeocode_tolerance_meters=0)
+    cache.set_point('geocode/regeo#base', 116.4, 39.9, {'formatted_address': '甲'})
+
+    assert cache.get_nearby('geocode/regeo#base', 116.4, 39.9) == {'formatted_address': '甲'}
+    assert cache.get_nearby('geocode/regeo#base', 116.40001, 39.9) is None
+    cache.close()
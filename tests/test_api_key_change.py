@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""更换API Key后解除停止状态、连接测试使用新Key的测试"""
+
+import importlib
+
+from app.utils.retry_policy import AmapAPIError, RequestGate, ERROR_KEY
+
+amap_module = importlib.import_module('app.utils.amap_api')
+
+
+class _MemoryCache:
+    """只保存在内存中的API缓存"""
+
+    def __init__(self):
+        self._data = {}
+
+    def get(self, endpoint, params):
+        return self._data.get((endpoint, str(params)))
+
+    def set(self, endpoint, params, value):
+        self._data[(endpoint, str(params))] = value
+
+
+def _api(monkeypatch):
+    monkeypatch.setattr(amap_module.config, 'set_amap_api_key', lambda api_key: True)
+    api = amap_module.AmapAPI()
+    api.api_key = 'old-key'
+    api.gate = RequestGate()
+    api.cache = _MemoryCache()
+    return api
+
+
+def test_key_change_clears_halt(monkeypatch):
+    api = _api(monkeypatch)
+    api.gate.halt(AmapAPIError('Key无效', ERROR_KEY, '10001'))
+
+    api.set_api_key('new-key')
+
+    assert api.gate.halted is None
+
+
+def test_check_health_uses_new_key(monkeypatch):
+    api = _api(monkeypatch)
+    used_keys = []
+
+    def request_once(url, endpoint, params, use_cache, timeout=None):
+        used_keys.append(params['key'])
+        if params['key'] == 'old-key':
+            raise AmapAPIError('Key无效', ERROR_KEY, '10001')
+        return {'status': '1'}
+
+    api._request_once = request_once
+    assert not api.check_health()[0]
+
+    api.set_api_key('new-key')
+    ok, _, _ = api.check_health(force=True)
+
+    assert ok
+    assert used_keys == ['old-key', 'new-key']
+
+
+def test_config_dialog_applies_new_key(monkeypatch):
+    from app.ui.geospatial import dialogs
+
+    monkeypatch.setattr(amap_module.config, 'set_amap_api_key', lambda api_key: True)
+    monkeypatch.setattr(dialogs.messagebox, 'showinfo', lambda *args: None)
+    monkeypatch.setattr(dialogs.amap_api, 'api_key', 'old-key')
+    monkeypatch.setattr(dialogs.amap_api, 'gate', RequestGate())
+    dialogs.amap_api.gate.halt(AmapAPIError('Key无效', ERROR_KEY, '10001'))
+
+    dialog = dialogs.ConfigDialog.__new__(dialogs.ConfigDialog)
+    dialog.config = amap_module.config
+    dialog.api_key_var = type('Var', (), {'get': lambda self: ' new-key '})()
+    dialog.dialog = type('Window', (), {'destroy': lambda self: None})()
+    dialog.save_config()
+
+    assert dialogs.amap_api.api_key == 'new-key'
+    assert dialogs.amap_api.gate.halted is None
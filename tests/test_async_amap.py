@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""异步API适配器的测试：并发数受线程池大小限制"""
+
+import asyncio
+import threading
+import time
+
+from app.utils.async_amap import AsyncAmapAPI, EventLoopThread
+
+
+class _SlowAPI:
+    """记录同时进行的调用数的同步API"""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def regeocode(self, lng, lat):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        return {'status': 'success', 'lng': lng, 'lat': lat}
+
+
+def test_gather_runs_calls_concurrently_up_to_pool_size():
+    api = _SlowAPI()
+    async_api = AsyncAmapAPI(api)
+    loop_thread = EventLoopThread(max_workers=3)
+
+    async def gather():
+        return await asyncio.gather(*(async_api.regeocode(i, i) for i in range(6)))
+
+    results = loop_thread.submit(gather()).result(timeout=5)
+
+    assert [r['lng'] for r in results] == list(range(6))
+    assert api.max_active == 3
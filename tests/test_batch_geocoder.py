@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""批量地理编码器的测试"""
+
+import threading
+import time
+
+import pytest
+
+from app.utils.batch_geocoder import BatchCancelledError, BatchGeocoder, RateLimiter
+from app.utils.batch_journal import BatchJournal
+
+
+def test_run_batched_reports_every_row():
+    items = ['a', 'b', 'a', 'c', 'd']
+    seen = {}
+
+    results = BatchGeocoder(workers=2, limiter=RateLimiter(1000)).run_batched(
+        items, lambda batch: [item.upper() for item in batch], batch_size=2,
+        on_result=lambda i, result: seen.setdefault(i, result))
+
+    assert results == ['A', 'B', 'A', 'C', 'D']
+    assert seen == dict(enumerate(results))
+
+
+def _slow_upper(calls):
+    """记录调用次数、稍有延迟的处理函数"""
+    lock = threading.Lock()
+
+    def func(item):
+        with lock:
+            calls.append(item)
+        time.sleep(0.01)
+        return item.upper()
+
+    return func
+
+
+def test_run_stops_submitting_when_callback_raises():
+    calls = []
+
+    def on_result(i, result):
+        raise RuntimeError('界面已关闭')
+
+    with pytest.raises(RuntimeError):
+        BatchGeocoder(workers=2, limiter=RateLimiter(1000)).run(
+            [f'item{i}' for i in range(200)], _slow_upper(calls), on_result=on_result)
+
+    # 只有已排队的窗口（并发数的2倍）内的输入项可能被处理
+    assert len(calls) <= 4
+
+
+def test_stop_cancels_remaining_items():
+    calls = []
+    geocoder = BatchGeocoder(workers=2, limiter=RateLimiter(1000))
+
+    def on_result(i, result):
+        if len(calls) >= 3:
+            geocoder.stop()
+
+    results = geocoder.run([f'item{i}' for i in range(200)], _slow_upper(calls), on_result=on_result,
+                           on_error=lambda e: type(e))
+
+    assert len(calls) < 10
+    assert results.count(BatchCancelledError) == 200 - len(calls)
+
+
+def test_run_batched_journals_in_worker(tmp_path):
+    journal = BatchJournal(str(tmp_path / 'job.journal'), should_record=lambda result: True)
+    calls = []
+    lock = threading.Lock()
+
+    def batch_func(batch):
+        with lock:
+            calls.extend(batch)
+        return [item.upper() for item in batch]
+
+    def on_result(i, result):
+        raise RuntimeError('界面已关闭')
+
+    with pytest.raises(RuntimeError):
+        BatchGeocoder(workers=2, limiter=RateLimiter(1000)).run_batched(
+            [f'item{i}' for i in range(100)], batch_func, batch_size=5, journal=journal,
+            on_result=on_result)
+
+    # 已发出请求的每一行都已写入日志，重新运行时不会再次请求
+    restored = BatchJournal(journal.path).restore([f'item{i}' for i in range(100)])
+    assert sorted(restored.values()) == sorted(item.upper() for item in calls)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""批量任务断点续传日志的测试"""
+
+import json
+
+from app.utils.batch_geocoder import BatchGeocoder
+from app.utils.batch_journal import BatchJournal, journal_path
+
+
+def _ok(value):
+    return {'status': 'success', 'value': value}
+
+
+def test_restore_after_reopen(tmp_path):
+    path = journal_path(str(tmp_path / '地址.xlsx'), 'geocode')
+    items = ['甲', '乙', '丙']
+    journal = BatchJournal(path)
+    journal.record(0, items[0], _ok(0))
+    journal.record(1, items[1], {'status': 'error', 'message': '网络异常'})
+    journal.record(2, items[2], _ok(2))
+    journal.close()
+
+    restored = BatchJournal(path).restore(items)
+
+    # 失败的结果不记录，恢复后重新查询
+    assert restored == {0: _ok(0), 2: _ok(2)}
+
+
+def test_restore_ignores_changed_items(tmp_path):
+    path = str(tmp_path / 'a.journal')
+    journal = BatchJournal(path)
+    journal.record(0, '甲', _ok(0))
+    journal.record(1, '乙', _ok(1))
+    journal.close()
+
+    assert BatchJournal(path).restore(['甲', '改过的乙']) == {0: _ok(0)}
+
+
+def test_truncated_last_line_is_skipped_and_not_merged(tmp_path):
+    path = str(tmp_path / 'a.journal')
+    journal = BatchJournal(path)
+    journal.record(0, '甲', _ok(0))
+    journal.record(1, '乙', _ok(1))
+    journal.close()
+    # 模拟写到一半时程序被关闭
+    with open(path, 'rb+') as f:
+        f.seek(-10, 2)
+        f.truncate()
+
+    resumed = BatchJournal(path)
+    assert resumed.restore(['甲', '乙', '丙']) == {0: _ok(0)}
+    resumed.record(1, '乙', _ok(1))
+    resumed.record(2, '丙', _ok(2))
+    resumed.close()
+
+    assert BatchJournal(path).restore(['甲', '乙', '丙']) == {0: _ok(0), 1: _ok(1), 2: _ok(2)}
+
+
+def test_unknown_version_starts_over(tmp_path):
+    path = str(tmp_path / 'a.journal')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'version': 0}) + '\n')
+        f.write(json.dumps({'i': 0, 'key': '"甲"', 'result': _ok(0)}) + '\n')
+
+    journal = BatchJournal(path)
+    assert journal.completed == 0
+    journal.record(0, '甲', _ok(1))
+    journal.close()
+
+    assert BatchJournal(path).restore(['甲']) == {0: _ok(1)}
+
+
+def test_run_batched_resumes_from_journal(tmp_path):
+    path = str(tmp_path / 'a.journal')
+    items = [f'地址{i}' for i in range(6)]
+    journal = BatchJournal(path)
+    for i in range(3):
+        journal.record(i, items[i], _ok(items[i]))
+    journal.close()
+    requested = []
+
+    def batch_func(batch):
+        requested.extend(batch)
+        return [_ok(item) for item in batch]
+
+    resumed = BatchJournal(path)
+    results = BatchGeocoder(workers=2).run_batched(items, batch_func, batch_size=2, journal=resumed)
+    resumed.finish()
+
+    assert results == [_ok(item) for item in items]
+    assert sorted(requested) == items[3:]
+    assert not (tmp_path / 'a.journal').exists()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""格式转换选项卡的测试：转换任务在后台线程中执行"""
+
+import threading
+
+from app.ui.geospatial import conversion_tab
+
+
+class _Parent:
+    """记录 after 调度的回调，由测试在“主线程”中执行"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, delay, func, *args):
+        self.scheduled.append((func, args))
+
+
+def _tab():
+    tab = conversion_tab.ConversionTab.__new__(conversion_tab.ConversionTab)
+    tab.parent = _Parent()
+    tab.update_status = lambda message: None
+    return tab
+
+
+def test_task_runs_off_the_calling_thread():
+    tab = _tab()
+    finished = threading.Event()
+    task_threads = []
+
+    def task():
+        task_threads.append(threading.current_thread())
+        finished.set()
+
+    tab._run_in_background(task, "转换失败", "转换时发生错误", "转换失败")
+
+    assert finished.wait(5)
+    assert task_threads[0] is not threading.current_thread()
+
+
+def test_task_error_is_reported_through_after(monkeypatch):
+    tab = _tab()
+    shown = []
+    monkeypatch.setattr(conversion_tab.messagebox, 'showerror', lambda title, message: shown.append(message))
+    done = threading.Event()
+
+    def task():
+        try:
+            raise ValueError("文件损坏")
+        finally:
+            done.set()
+
+    tab._run_in_background(task, "转换失败", "转换时发生错误", "转换失败")
+    done.wait(5)
+    # 等待后台线程调度完提示
+    for _ in range(100):
+        if len(tab.parent.scheduled) >= 2:
+            break
+        threading.Event().wait(0.01)
+    for func, args in tab.parent.scheduled:
+        func(*args)
+
+    assert shown == ["转换时发生错误: 文件损坏"]
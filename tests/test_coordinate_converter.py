@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""坐标转换数组版本与标量版本的对比测试"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils import coordinate_converter as cc
+
+
+def _random_points(seed, n=500):
+    """生成中国境内的随机坐标"""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(74.0, 135.0, n), rng.uniform(4.0, 53.0, n)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_wgs84_to_gcj02_array_matches_scalar(seed):
+    lngs, lats = _random_points(seed)
+
+    out_lng, out_lat = cc.wgs84_to_gcj02_array(lngs, lats)
+
+    expected = np.array([cc.wgs84_to_gcj02(lng, lat) for lng, lat in zip(lngs, lats)])
+    np.testing.assert_allclose(out_lng, expected[:, 0], rtol=0, atol=1e-12)
+    np.testing.assert_allclose(out_lat, expected[:, 1], rtol=0, atol=1e-12)
+
+
+def test_array_conversion_passes_through_outside_china_and_nan():
+    lngs = np.array([2.35, -74.0, 116.4, np.nan, 116.4])
+    lats = np.array([48.85, 40.7, 39.9, 39.9, np.nan])
+
+    out_lng, out_lat = cc.wgs84_to_gcj02_array(lngs, lats)
+    back_lng, back_lat = cc.gcj02_to_wgs84_array(lngs, lats)
+
+    for result_lng, result_lat in ((out_lng, out_lat), (back_lng, back_lat)):
+        np.testing.assert_array_equal(result_lng[[0, 1, 3, 4]], lngs[[0, 1, 3, 4]])
+        np.testing.assert_array_equal(result_lat[[0, 1, 3, 4]], lats[[0, 1, 3, 4]])
+        assert result_lng[2] != lngs[2]
+    assert cc.wgs84_to_gcj02(2.35, 48.85) == (2.35, 48.85)
+
+
+def test_array_conversion_keeps_series_index():
+    lngs = pd.Series([116.4, 121.5], index=[10, 20], name='经度')
+    lats = pd.Series([39.9, 31.2], index=[10, 20], name='纬度')
+
+    out_lng, out_lat = cc.wgs84_to_gcj02_array(lngs, lats)
+
+    assert list(out_lng.index) == [10, 20] and out_lng.name == '经度'
+    assert list(out_lat.index) == [10, 20] and out_lat.name == '纬度'
+    # 输入不应被修改
+    assert lngs.iloc[0] == 116.4
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_gcj02_inverse_round_trip(seed):
+    lngs, lats = _random_points(seed)
+    gcj_lng, gcj_lat = cc.wgs84_to_gcj02_array(lngs, lats)
+
+    back_lng, back_lat = cc.gcj02_to_wgs84_array(gcj_lng, gcj_lat)
+
+    # 1e-9度约为0.1毫米
+    np.testing.assert_allclose(back_lng, lngs, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(back_lat, lats, rtol=0, atol=1e-9)
+
+
+def test_gcj02_inverse_array_matches_scalar():
+    lngs, lats = _random_points(7, n=200)
+
+    out_lng, out_lat = cc.gcj02_to_wgs84_array(lngs, lats)
+
+    expected = np.array([cc.gcj02_to_wgs84(lng, lat) for lng, lat in zip(lngs, lats)])
+    np.testing.assert_allclose(out_lng, expected[:, 0], rtol=0, atol=1e-12)
+    np.testing.assert_allclose(out_lat, expected[:, 1], rtol=0, atol=1e-12)
+
+
+def test_gcj02_inverse_iterations_improve_on_single_step():
+    lng, lat = 116.397428, 39.90923
+    gcj = cc.wgs84_to_gcj02(lng, lat)
+
+    single = cc.gcj02_to_wgs84(*gcj, max_iterations=1)
+    iterated = cc.gcj02_to_wgs84(*gcj)
+
+    single_error = max(abs(single[0] - lng), abs(single[1] - lat))
+    iterated_error = max(abs(iterated[0] - lng), abs(iterated[1] - lat))
+    # 单步近似误差为米级（约1e-5度），迭代后应在容差以内
+    assert single_error > 1e-7
+    assert iterated_error < 1e-9
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_bd09_round_trip(seed):
+    lngs, lats = _random_points(seed)
+
+    bd_lng, bd_lat = cc.convert_coordinates_array(lngs, lats, 'WGS84', 'BD09')
+    back_lng, back_lat = cc.convert_coordinates_array(bd_lng, bd_lat, 'BD09', 'WGS84')
+
+    # BD09逆转换为近似公式，误差在1e-5度（约1米）以内
+    np.testing.assert_allclose(back_lng, lngs, rtol=0, atol=1e-5)
+    np.testing.assert_allclose(back_lat, lats, rtol=0, atol=1e-5)
+
+
+def test_bd09_array_matches_scalar():
+    lngs, lats = _random_points(11, n=200)
+
+    out_lng, out_lat = cc.convert_coordinates_array(lngs, lats, 'WGS84', 'BD09')
+
+    expected = np.array([cc.wgs84_to_bd09(lng, lat) for lng, lat in zip(lngs, lats)])
+    np.testing.assert_allclose(out_lng, expected[:, 0], rtol=0, atol=1e-12)
+    np.testing.assert_allclose(out_lat, expected[:, 1], rtol=0, atol=1e-12)
+
+
+def test_get_transform_accepts_aliases():
+    direct = cc.get_transform('WGS84', 'BD09')
+
+    assert cc.get_transform('gps', 'baidu') is direct
+    assert cc.convert_coordinates(116.4, 39.9, 'gcj-02', 'GCJ02') == (116.4, 39.9)
+    with pytest.raises(ValueError):
+        cc.get_transform('WGS84', 'CGCS2000')
+
+
+def test_distance_matrix_matches_scalar_haversine():
+    lngs1, lats1 = _random_points(1, n=20)
+    lngs2, lats2 = _random_points(2, n=30)
+
+    matrix = cc.distance_matrix(lngs1, lats1, lngs2, lats2)
+
+    expected = np.array([[cc.calculate_distance(lng1, lat1, lng2, lat2) for lng2, lat2 in zip(lngs2, lats2)]
+                         for lng1, lat1 in zip(lngs1, lats1)])
+    assert matrix.shape == (20, 30)
+    np.testing.assert_allclose(matrix, expected, rtol=1e-12, atol=1e-6)
+
+
+def test_distance_one_to_many_matches_scalar_haversine():
+    lngs, lats = _random_points(3, n=50)
+
+    distances = cc.distance_one_to_many(116.4, 39.9, lngs, lats)
+
+    expected = [cc.calculate_distance(116.4, 39.9, lng, lat) for lng, lat in zip(lngs, lats)]
+    np.testing.assert_allclose(distances, expected, rtol=1e-12, atol=1e-6)
+
+
+def test_distance_float32_stays_close():
+    lngs, lats = _random_points(4, n=50)
+
+    distances = cc.distance_one_to_many(116.4, 39.9, lngs, lats, dtype=np.float32)
+
+    assert distances.dtype == np.float32
+    np.testing.assert_allclose(distances, cc.distance_one_to_many(116.4, 39.9, lngs, lats), rtol=1e-4)
+
+
+def test_vincenty_distance():
+    # Vincenty原论文中的算例：Flinders Peak 至 Buninyong
+    lng1, lat1 = 144 + 25 / 60 + 29.52440 / 3600, -(37 + 57 / 60 + 3.72030 / 3600)
+    lng2, lat2 = 143 + 55 / 60 + 35.38390 / 3600, -(37 + 39 / 60 + 10.15610 / 3600)
+
+    distances = cc.distance_pairwise([lng1, lng1, np.nan], [lat1, lat1, lat1],
+                                     [lng2, lng1, lng2], [lat2, lat1, lat2], method='vincenty')
+
+    assert distances[0] == pytest.approx(54972.271, abs=1e-3)
+    assert distances[1] == 0
+    assert np.isnan(distances[2])
+    assert cc.calculate_distance(lng1, lat1, lng2, lat2, method='vincenty') == pytest.approx(distances[0])
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""分块Haversine最近点计算的测试"""
+
+import numpy as np
+import pytest
+
+from app.ui.point_matcher.distance_calculator import haversine_distance, haversine_nearest_chunked
+from app.ui.point_matcher.spatial_index import SpatialIndex
+
+
+@pytest.mark.parametrize('n_refs', [1, 7, 64, 500])
+@pytest.mark.parametrize('max_memory_mb', [0.01, 256])
+def test_matches_spatial_index(n_refs, max_memory_mb):
+    rng = np.random.default_rng(n_refs)
+    ref_lons, ref_lats = rng.uniform(115, 117, n_refs), rng.uniform(39, 41, n_refs)
+    lons, lats = rng.uniform(115, 117, 1000), rng.uniform(39, 41, 1000)
+    lons[:5] = np.nan
+
+    indices, distances = haversine_nearest_chunked(lats, lons, ref_lats, ref_lons, max_memory_mb)
+    expected_indices, expected_distances = SpatialIndex(ref_lons, ref_lats).query_nearest(lons, lats)
+
+    np.testing.assert_allclose(distances, expected_distances, atol=1e-6)
+    # 坐标缺失的点位应返回-1
+    assert np.array_equal(indices[:5], [-1] * 5)
+    np.testing.assert_array_equal(indices[5:], expected_indices[5:])
+
+
+def test_matches_scalar_haversine():
+    ref_lats, ref_lons = np.array([39.9, 31.2, 23.1]), np.array([116.4, 121.5, 113.3])
+
+    indices, distances = haversine_nearest_chunked([30.6], [114.3], ref_lats, ref_lons)
+
+    expected = [haversine_distance(30.6, 114.3, lat, lon) for lat, lon in zip(ref_lats, ref_lons)]
+    assert indices[0] == int(np.argmin(expected))
+    assert distances[0] == pytest.approx(min(expected), abs=1e-6)
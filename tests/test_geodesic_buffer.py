@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""测地线圆形生成与重叠圆合并的测试"""
+
+import numpy as np
+import pytest
+
+from app.utils import geodesic_buffer as gb
+from app.utils.coordinate_converter import distance_matrix, distance_one_to_many
+
+
+def _covered(polygons, point):
+    """点是否在合并结果的某个多边形内（在外环内且不在其内环内）"""
+    return any(gb._point_in_ring(point, rings[0]) and not any(gb._point_in_ring(point, hole) for hole in rings[1:])
+               for rings in polygons)
+
+
+def _assert_matches_union(lngs, lats, radius, polygons, samples=1500, band=3.0, seed=0):
+    """随机采样比较合并结果与各圆的并集，距边界 band 米以内的采样点不比较"""
+    rng = np.random.default_rng(seed)
+    margin = radius * 1.5 / 111000
+    sample_lngs = rng.uniform(lngs.min() - margin * 1.4, lngs.max() + margin * 1.4, samples)
+    sample_lats = rng.uniform(lats.min() - margin, lats.max() + margin, samples)
+    nearest = distance_matrix(sample_lngs, sample_lats, lngs, lats, method='vincenty').min(axis=1)
+    checked = np.abs(nearest - radius) > band
+    assert checked.sum() > samples * 0.8
+    for lng, lat, distance in zip(sample_lngs[checked], sample_lats[checked], nearest[checked]):
+        assert _covered(polygons, (lng, lat)) == (distance < radius), (lng, lat, distance)
+
+
+def test_circle_vertex_count():
+    assert gb.circle_vertex_count(1000, 1.0) == 71
+    assert gb.circle_vertex_count(0.5, 1.0) == gb.MIN_CIRCLE_VERTICES
+    assert gb.circle_vertex_count(1e7, 0.01) == gb.MAX_CIRCLE_VERTICES
+
+
+def test_geodesic_circle_vertices_lie_on_radius():
+    rings = gb.geodesic_circles([116.4, 121.5], [39.9, 31.2], 2000, num_points=36)
+
+    assert rings.shape == (2, 37, 2)
+    np.testing.assert_array_equal(rings[:, 0], rings[:, -1])
+    for ring, (lng, lat) in zip(rings, [(116.4, 39.9), (121.5, 31.2)]):
+        distances = distance_one_to_many(lng, lat, ring[:, 0], ring[:, 1], method='vincenty')
+        np.testing.assert_allclose(distances, 2000, atol=1e-3)
+
+
+def test_isolated_circles_stay_separate():
+    lngs, lats = np.array([116.0, 116.1, np.nan]), np.array([39.9, 39.9, 39.9])
+
+    polygons = gb.merge_circles(lngs, lats, 500, num_points=36)
+
+    assert len(polygons) == 2
+    assert all(len(rings) == 1 and len(rings[0]) == 37 for rings in polygons)
+
+
+def test_duplicate_centers_merge_to_one_circle():
+    polygons = gb.merge_circles([116.4, 116.4, 116.4], [39.9, 39.9, 39.9], 500)
+
+    assert len(polygons) == 1 and len(polygons[0]) == 1
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_merged_coverage_matches_sampled_union(seed):
+    rng = np.random.default_rng(seed)
+    lngs = rng.uniform(116.38, 116.42, 25)
+    lats = rng.uniform(39.89, 39.92, 25)
+
+    polygons = gb.merge_circles(lngs, lats, 500)
+
+    _assert_matches_union(lngs, lats, 500, polygons, seed=seed)
+
+
+def test_ring_of_circles_leaves_a_hole():
+    angles = np.radians(np.arange(0, 360, 20))
+    # 18个半径300米的圆均匀分布在半径1000米的圆周上，相邻圆相交，中间留下空洞
+    lngs = 116.4 + 1000 * np.sin(angles) / (111320 * np.cos(np.radians(39.9)))
+    lats = 39.9 + 1000 * np.cos(angles) / 110950
+
+    polygons = gb.merge_circles(lngs, lats, 300)
+
+    assert len(polygons) == 1 and len(polygons[0]) == 2
+    assert not _covered(polygons, (116.4, 39.9))
+    _assert_matches_union(lngs, lats, 300, polygons)
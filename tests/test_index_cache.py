@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""基准点位索引缓存的测试：使用缓存与否的匹配结果应完全一致"""
+
+import numpy as np
+import pandas as pd
+
+from app.ui.point_matcher import index_cache
+from app.ui.point_matcher.point_matcher_tab import PointMatcherTab, build_nearest_result
+
+
+def _tab():
+    """不创建界面，仅用于调用基准点位加载逻辑的选项卡对象"""
+    tab = PointMatcherTab.__new__(PointMatcherTab)
+    tab.log = lambda message: None
+    return tab
+
+
+def _match(tab, data_file, point_df, use_cache):
+    names, lons, lats, _ = tab._load_reference(data_file, use_cache)
+    indices = np.arange(len(point_df))
+    distances = np.zeros(len(point_df))
+    return build_nearest_result(point_df, names, indices, distances,
+                                {'points': 0, 'invalid': 0, 'unmatched': 0, 'records': 0})
+
+
+def test_cached_names_match_uncached(tmp_path, monkeypatch):
+    monkeypatch.setattr(index_cache, 'DEFAULT_CACHE_DIR', str(tmp_path / 'cache'))
+    data_file = tmp_path / 'reference.csv'
+    data_file.write_text('点位名称,经度,纬度\n'
+                         'A,116.30,39.90\n'
+                         ',116.31,39.91\n'
+                         '101,116.32,39.92\n', encoding='utf-8')
+    point_df = pd.DataFrame({'点位名称': ['p1', 'p2', 'p3'],
+                             '经度': [116.30, 116.31, 116.32],
+                             '纬度': [39.90, 39.91, 39.92]})
+
+    tab = _tab()
+    uncached = _match(tab, str(data_file), point_df, use_cache=False)
+    first = _match(tab, str(data_file), point_df, use_cache=True)
+    cached = _match(tab, str(data_file), point_df, use_cache=True)
+
+    pd.testing.assert_frame_equal(first, uncached)
+    pd.testing.assert_frame_equal(cached, uncached)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""KML/KMZ流式读取与写入的测试"""
+
+import io
+import zipfile
+
+import numpy as np
+import pytest
+
+from app.ui.geospatial import kml_utils
+from app.ui.geospatial.kml_utils import KmlWriter, iter_kml_features, iter_kml_placemarks, iter_kml_points
+
+
+def _kml(body, namespace=' xmlns="http://www.opengis.net/kml/2.2"'):
+    return f'<?xml version="1.0" encoding="UTF-8"?><kml{namespace}><Document>{body}</Document></kml>'.encode('utf-8')
+
+
+def _point(name, coordinates):
+    return f'<Placemark><name>{name}</name><Point><coordinates>{coordinates}</coordinates></Point></Placemark>'
+
+
+@pytest.mark.parametrize('namespace', [' xmlns="http://www.opengis.net/kml/2.2"',
+                                       ' xmlns="http://earth.google.com/kml/2.1"', ''])
+def test_points_with_any_namespace(namespace):
+    body = _point('甲', '116.4,39.9,0') + f'<Folder><name>分组</name>{_point("乙", "121.5,31.2")}</Folder>'
+
+    points = list(iter_kml_points(io.BytesIO(_kml(body, namespace))))
+
+    assert [(p['name'], p['lon'], p['lat']) for p in points] == [('甲', 116.4, 39.9), ('乙', 121.5, 31.2)]
+
+
+def test_coordinates_with_spaces_after_commas():
+    points = list(iter_kml_points(io.BytesIO(_kml(_point('甲', ' 116.4, 39.9, 10 ')))))
+
+    assert (points[0]['lon'], points[0]['lat']) == (116.4, 39.9)
+
+
+def test_placemarks_are_released_while_streaming(monkeypatch):
+    body = '<Folder>' + ''.join(_point(f'点{i}', f'116.{i},39.9') for i in range(50)) + '</Folder>'
+    iterparse = kml_utils.ET.iterparse
+    folders = []
+
+    def recording_iterparse(source, events):
+        for event, elem in iterparse(source, events):
+            if event == 'start' and elem.tag.endswith('Folder'):
+                folders.append(elem)
+            yield event, elem
+
+    monkeypatch.setattr(kml_utils.ET, 'iterparse', recording_iterparse)
+    folder_sizes = [len(folders[0]) for _ in iter_kml_placemarks(io.BytesIO(_kml(body)))]
+
+    # iterparse 按缓冲区预读，首次返回时树中已有预读的元素；
+    # 之后已读完的Placemark均从父元素中移除，树中不会累积
+    assert len(folder_sizes) == 50
+    assert folder_sizes[1:] == [0] * 49
+
+
+def test_parse_kml_points_reports_invalid_xml(tmp_path):
+    path = tmp_path / 'bad.kml'
+    path.write_bytes(b'<kml><Document><Placemark>')
+
+    points, error = kml_utils.parse_kml_points(str(path))
+
+    assert points == []
+    assert 'KML文件解析错误' in error
+
+
+def test_multigeometry_with_holes_and_lines():
+    outer = '116,39 117,39 117,40 116,40 116,39'
+    hole = '116.2,39.2 116.4,39.2 116.4,39.4 116.2,39.2'
+    body = ('<Placemark><name>组合</name><MultiGeometry>'
+            '<Point><coordinates>116.5,39.5</coordinates></Point>'
+            f'<Polygon><outerBoundaryIs><LinearRing><coordinates>{outer}</coordinates></LinearRing></outerBoundaryIs>'
+            f'<innerBoundaryIs><LinearRing><coordinates>{hole}</coordinates></LinearRing></innerBoundaryIs></Polygon>'
+            '<LineString><coordinates>116,39 118,41</coordinates></LineString>'
+            '</MultiGeometry></Placemark>')
+
+    feature, = iter_kml_features(io.BytesIO(_kml(body)))
+    geometry = feature['geometry']
+
+    assert geometry.geom_type == 'MultiGeometry'
+    assert [kind for kind, _ in geometry.parts()] == [kml_utils.PART_POINT, kml_utils.PART_OUTER,
+                                                      kml_utils.PART_INNER, kml_utils.PART_LINE]
+    assert geometry.vertex_count == 1 + 5 + 4 + 2
+    polygons = geometry.polygons()
+    assert len(polygons) == 1 and len(polygons[0]) == 2
+    np.testing.assert_array_equal(polygons[0][1][0], [116.2, 39.2])
+    np.testing.assert_array_equal(geometry.points(), [[116.5, 39.5]])
+    assert geometry.representative_point() == (116.5, 39.5)
+
+
+def test_single_geometry_types():
+    body = ('<Placemark><name>线</name><LineString><coordinates>116,39,0 117,40,0</coordinates></LineString></Placemark>'
+            '<Placemark><name>面</name><Polygon><outerBoundaryIs><LinearRing>'
+            '<coordinates>116,39 118,39 118,41 116,41 116,39</coordinates></LinearRing></outerBoundaryIs></Polygon>'
+            '</Placemark>')
+
+    line, polygon = iter_kml_features(io.BytesIO(_kml(body)))
+
+    assert line['geometry'].geom_type == 'LineString'
+    assert polygon['geometry'].geom_type == 'Polygon'
+    # 闭合环的重复顶点不参与代表点计算
+    assert polygon['geometry'].representative_point() == (117.0, 40.0)
+    # 线和面没有点，不会作为点读出
+    assert list(iter_kml_points(io.BytesIO(_kml(body)))) == []
+
+
+def test_bad_and_empty_coordinates_are_skipped():
+    body = (_point('坏', 'abc,def') + _point('缺纬度', '116.4') + _point('空', '') +
+            '<Placemark><name>无几何</name></Placemark>' + _point('好', '116.4,39.9'))
+
+    features = list(iter_kml_features(io.BytesIO(_kml(body))))
+
+    assert [feature['name'] for feature in features] == ['好']
+
+
+def test_kmz_reads_main_document(tmp_path):
+    path = tmp_path / 'points.kmz'
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('files/readme.txt', 'x')
+        archive.writestr('doc.kml', _kml(_point('甲', '116.4,39.9')))
+
+    points, error = kml_utils.parse_kml_points(str(path))
+
+    assert error is None
+    assert [(p['name'], p['lon'], p['lat']) for p in points] == [('甲', 116.4, 39.9)]
+
+
+def test_kmz_without_kml_is_reported(tmp_path):
+    path = tmp_path / 'empty.kmz'
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('readme.txt', 'x')
+
+    points, error = kml_utils.parse_kml_points(str(path))
+
+    assert points == [] and 'KMZ文件中没有KML文档' in error
+
+
+@pytest.mark.parametrize('filename, indent', [('out.kml', '  '), ('out.kml', ''), ('out.kmz', '  ')])
+def test_writer_round_trip(tmp_path, filename, indent):
+    path = str(tmp_path / filename)
+    ring = np.array([[116.0, 39.0], [117.0, 39.0], [117.0, 40.0], [116.0, 39.0]])
+    hole = np.array([[116.5, 39.2], [116.7, 39.2], [116.6, 39.4], [116.5, 39.2]])
+
+    with KmlWriter(path, '结果 & 测试', indent=indent) as writer:
+        writer.write_point('<甲>', 116.4, 39.9, '描述 & 说明')
+        writer.write_polygons('面', [[ring, hole]])
+        writer.write_polygons('多面', [[ring], [ring + 1]])
+        writer.write_element(kml_utils.create_kml_placemark('乙', 121.5, 31.2))
+
+    assert writer.count == 4
+    assert zipfile.is_zipfile(path) == filename.endswith('.kmz')
+    point, polygon, multi, element = iter_kml_features(path)
+    assert (point['name'], point['description']) == ('<甲>', '描述 & 说明')
+    np.testing.assert_array_equal(point['geometry'].points(), [[116.4, 39.9]])
+    assert polygon['geometry'].geom_type == 'Polygon'
+    np.testing.assert_array_equal(polygon['geometry'].polygons()[0][0], ring)
+    np.testing.assert_array_equal(polygon['geometry'].polygons()[0][1], hole)
+    assert multi['geometry'].geom_type == 'MultiGeometry'
+    np.testing.assert_array_equal(multi['geometry'].polygons()[1][0], ring + 1)
+    assert element['name'] == '乙'
+
+
+def test_writer_precision(tmp_path):
+    path = str(tmp_path / 'out.kml')
+
+    with KmlWriter(path, precision=3) as writer:
+        writer.write_polygons('面', [[np.array([[116.123456, 39.987654], [117.0, 39.0], [116.123456, 39.987654]])]])
+
+    feature, = iter_kml_features(path)
+    np.testing.assert_array_equal(feature['geometry'].coords[0], [116.123, 39.988])
+
+
+def test_writer_abort_keeps_existing_file(tmp_path):
+    path = tmp_path / 'out.kml'
+    path.write_text('旧文件', encoding='utf-8')
+
+    with pytest.raises(RuntimeError):
+        with KmlWriter(str(path)) as writer:
+            writer.write_point('甲', 116.4, 39.9)
+            raise RuntimeError('中途出错')
+
+    assert path.read_text(encoding='utf-8') == '旧文件'
+    assert list(tmp_path.iterdir()) == [path]
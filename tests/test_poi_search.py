@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""周边POI搜索自动翻页的测试"""
+
+import importlib
+import threading
+
+from app.utils.batch_geocoder import RateLimiter
+from app.utils.retry_policy import AmapAPIError, ERROR_QUOTA
+
+poi_module = importlib.import_module('app.ui.geospatial.amap_api')
+
+
+def _poi(poi_id):
+    return {'id': poi_id, 'name': f'POI{poi_id}', 'location': '116.397428,39.90923'}
+
+
+def _fake_search(monkeypatch, count, pages, workers=4):
+    """替换共享AmapAPI的周边搜索，pages为 {页码: POI列表或异常}，返回实际请求过的页码"""
+    requested = []
+    lock = threading.Lock()
+
+    def search_around(page=1, **query):
+        with lock:
+            requested.append(page)
+        result = pages.get(page, [])
+        if isinstance(result, Exception):
+            raise result
+        return {'status': '1', 'count': str(count), 'pois': result}
+
+    monkeypatch.setattr(poi_module.amap_api, 'search_around', search_around)
+    monkeypatch.setattr(poi_module, 'get_amap_rate_limiter', lambda: RateLimiter(1000))
+    monkeypatch.setattr(poi_module.config, 'get',
+                        lambda key, default=None: workers if key == 'api_settings.batch_workers' else default)
+    return requested
+
+
+def test_pages_stop_at_total_count_and_dedupe_by_id(monkeypatch):
+    requested = _fake_search(monkeypatch, count=60, pages={
+        1: [_poi(str(i)) for i in range(25)],
+        2: [_poi('24')] + [_poi(str(i)) for i in range(25, 49)],
+        3: [_poi(str(i)) for i in range(49, 60)],
+    })
+
+    error, pois = poi_module.search_nearby_pois_amap(116.39, 39.9, 1000, '餐厅', api_key='key')
+
+    assert error is None
+    assert sorted(requested) == [1, 2, 3]
+    assert [poi['id'] for poi in pois] == [str(i) for i in range(60)]
+
+
+def test_quota_error_stops_remaining_pages(monkeypatch):
+    requested = _fake_search(monkeypatch, count=25 * 20, workers=1, pages={
+        1: [_poi('first')],
+        2: AmapAPIError('API调用失败: 配额用尽', ERROR_QUOTA, '10044'),
+    })
+
+    error, pois = poi_module.search_nearby_pois_amap(116.39, 39.9, 1000, '餐厅', api_key='key')
+
+    assert '10044' in error
+    assert [poi['id'] for poi in pois] == ['first']
+    # 单线程按页码顺序请求，第2页配额用尽后最多还有已在执行的一页
+    assert len(requested) <= 3
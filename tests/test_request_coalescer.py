@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""相同请求合并的并发测试"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.utils.batch_geocoder import BatchGeocoder
+from app.utils.request_coalescer import RequestCoalescer
+
+CALLERS = 8
+
+
+def _run_concurrently(coalescer, key, func):
+    """让 CALLERS 个线程在 func 执行期间同时请求同一个key，返回各自得到的结果或异常"""
+    started = threading.Event()
+    release = threading.Event()
+
+    def leader_func():
+        started.set()
+        release.wait(5)
+        return func()
+
+    def call(i):
+        try:
+            return coalescer.run(key, leader_func if i == 0 else func)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(CALLERS) as executor:
+        futures = [executor.submit(call, 0)]
+        started.wait(5)
+        futures += [executor.submit(call, i) for i in range(1, CALLERS)]
+        # 等待其余线程都进入等待状态后再让首个请求完成
+        while not all(f.running() for f in futures):
+            time.sleep(0.01)
+        time.sleep(0.1)
+        release.set()
+        return [f.result() for f in futures]
+
+
+def test_concurrent_callers_share_one_request():
+    coalescer = RequestCoalescer()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {'status': '1'}
+
+    results = _run_concurrently(coalescer, 'geocode/geo?address=北京', fetch)
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert coalescer.inflight == 0
+
+
+def test_exception_is_shared_and_next_call_retries():
+    coalescer = RequestCoalescer()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        raise RuntimeError('网络异常')
+
+    results = _run_concurrently(coalescer, 'key', fetch)
+
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    # 请求结束后不再合并，之后的相同请求会重新发出
+    assert coalescer.run('key', lambda: 'ok') == 'ok'
+
+
+def test_different_keys_are_not_merged():
+    coalescer = RequestCoalescer()
+
+    assert coalescer.run('a', lambda: 1) == 1
+    assert coalescer.run('b', lambda: 2) == 2
+    with pytest.raises(ValueError):
+        coalescer.run('a', lambda: int('x'))
+
+
+def test_run_batched_sends_duplicates_once():
+    requested = []
+
+    def batch_func(batch):
+        requested.extend(batch)
+        return [item.upper() for item in batch]
+
+    items = ['a', 'b', 'a', 'c', 'b', 'a']
+
+    results = BatchGeocoder(workers=2).run_batched(items, batch_func, batch_size=2)
+
+    assert results == ['A', 'B', 'A', 'C', 'B', 'A']
+    assert sorted(requested) == ['a', 'b', 'c']
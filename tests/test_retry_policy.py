@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""高德API错误分类与全局停止请求的测试"""
+
+import pytest
+
+from app.utils.amap_api import AmapAPI
+from app.utils.retry_policy import (AmapAPIError, RequestGate, classify_infocode,
+                                    ERROR_KEY, ERROR_PARAMS, ERROR_PERMISSION, ERROR_QUOTA)
+
+
+@pytest.mark.parametrize('infocode, category', [
+    ('10001', ERROR_KEY),
+    ('10003', ERROR_QUOTA),
+    ('10002', ERROR_PERMISSION),
+    ('10012', ERROR_PERMISSION),
+    ('10041', ERROR_PERMISSION),
+    ('20011', ERROR_PARAMS),
+])
+def test_classify_infocode(infocode, category):
+    assert classify_infocode(infocode) == category
+
+
+def _failing_api(infocode):
+    """每次请求都返回指定infocode错误的AmapAPI"""
+    api = AmapAPI()
+    api.gate = RequestGate()
+
+    def request_once(*args, **kwargs):
+        raise AmapAPIError('请求失败', classify_infocode(infocode), infocode)
+
+    api._request_once = request_once
+    return api
+
+
+@pytest.mark.parametrize('infocode', ['10002', '10012', '10041', '20011'])
+def test_per_request_errors_do_not_halt(infocode):
+    api = _failing_api(infocode)
+
+    with pytest.raises(AmapAPIError):
+        api._fetch('geocode/regeo', {}, use_cache=False)
+
+    assert api.gate.halted is None
+
+
+@pytest.mark.parametrize('infocode', ['10001', '10003'])
+def test_key_and_quota_errors_halt(infocode):
+    api = _failing_api(infocode)
+
+    with pytest.raises(AmapAPIError):
+        api._fetch('geocode/regeo', {}, use_cache=False)
+
+    assert api.gate.halted is not None
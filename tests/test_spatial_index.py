@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""空间索引查询结果与暴力Haversine计算的随机对比测试"""
+
+import numpy as np
+import pytest
+
+from app.ui.point_matcher.distance_calculator import haversine_distance_pairwise
+from app.ui.point_matcher.parallel_matcher import ParallelMatcher
+from app.ui.point_matcher.spatial_index import SpatialIndex
+
+
+def _random_case(seed):
+    """生成一组基准点位和目标点位，部分坐标取整以制造落在包围盒边界上的点"""
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 300))
+    ref_lons = rng.uniform(116.0, 116.05, n)
+    ref_lats = rng.uniform(39.9, 39.95, n)
+    if seed % 2:
+        ref_lons, ref_lats = np.round(ref_lons, 3), np.round(ref_lats, 3)
+    lons = rng.uniform(116.0, 116.05, 200)
+    lats = rng.uniform(39.9, 39.95, 200)
+    # 部分目标点位与基准点位重合
+    picks = rng.integers(0, n, 50)
+    lons[:50], lats[:50] = ref_lons[picks], ref_lats[picks]
+    return ref_lons, ref_lats, lons, lats
+
+
+def _brute_force(ref_lons, ref_lats, lons, lats):
+    """暴力计算全部目标点位到全部基准点位的距离矩阵"""
+    return haversine_distance_pairwise(lats[:, None], lons[:, None], ref_lats[None, :], ref_lons[None, :])
+
+
+@pytest.mark.parametrize('leaf_size', [1, 2, 4, 64])
+@pytest.mark.parametrize('seed', range(40))
+def test_query_nearest_matches_brute_force(seed, leaf_size):
+    ref_lons, ref_lats, lons, lats = _random_case(seed)
+    index = SpatialIndex(ref_lons, ref_lats, leaf_size=leaf_size)
+
+    _, distances = index.query_nearest(lons, lats)
+
+    expected = _brute_force(ref_lons, ref_lats, lons, lats).min(axis=1)
+    np.testing.assert_allclose(distances, expected, atol=1e-6)
+
+
+@pytest.mark.parametrize('leaf_size', [1, 3, 64])
+@pytest.mark.parametrize('seed', range(20))
+def test_query_knn_matches_brute_force(seed, leaf_size):
+    ref_lons, ref_lats, lons, lats = _random_case(seed)
+    index = SpatialIndex(ref_lons, ref_lats, leaf_size=leaf_size)
+    k = min(5, len(ref_lons))
+
+    _, distances = index.query_knn(lons, lats, k)
+
+    expected = np.sort(_brute_force(ref_lons, ref_lats, lons, lats), axis=1)[:, :k]
+    np.testing.assert_allclose(distances[:, :k], expected, atol=1e-6)
+
+
+def test_parallel_query_matches_brute_force():
+    ref_lons, ref_lats, lons, lats = _random_case(1)
+    index = SpatialIndex(ref_lons, ref_lats, leaf_size=1)
+
+    with ParallelMatcher(index, workers=2, shard_size=64) as matcher:
+        _, distances = matcher.query(lons, lats, 'nearest')
+
+    expected = _brute_force(ref_lons, ref_lats, lons, lats).min(axis=1)
+    np.testing.assert_allclose(distances, expected, atol=1e-6)
+
+
+def test_query_nearest_skips_invalid_targets():
+    ref_lons, ref_lats, lons, lats = _random_case(2)
+    lons[:3] = np.nan
+    lats[3] = np.inf
+    index = SpatialIndex(ref_lons, ref_lats)
+
+    indices, distances = index.query_nearest(lons, lats)
+
+    assert np.array_equal(indices[:4], [-1] * 4)
+    assert np.all(np.isnan(distances[:4]))
+    assert np.all(indices[4:] >= 0)
+
+
+def test_query_nearest_across_antimeridian():
+    index = SpatialIndex([179.999, -170.0, 0.0], [0.0, 0.0, 0.0], leaf_size=1)
+
+    indices, _ = index.query_nearest([-179.999], [0.0])
+
+    assert indices[0] == 0
+
+
+def test_from_arrays_matches_original():
+    ref_lons, ref_lats, lons, lats = _random_case(3)
+    index = SpatialIndex(ref_lons, ref_lats, leaf_size=4)
+    restored = SpatialIndex.from_arrays(index.to_arrays(), leaf_size=4)
+
+    expected = index.query_nearest(lons, lats)
+    actual = restored.query_nearest(lons, lats)
+
+    np.testing.assert_array_equal(actual[0], expected[0])
+    np.testing.assert_array_equal(actual[1], expected[1])
+
+
+@pytest.mark.parametrize('lons, lats', [
+    ([], []),
+    ([116.0, 117.0], [39.9]),
+    ([116.0, np.nan], [39.9, 40.0]),
+])
+def test_rejects_invalid_reference_points(lons, lats):
+    with pytest.raises(ValueError):
+        SpatialIndex(lons, lats)